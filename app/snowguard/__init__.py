@@ -0,0 +1,4 @@
+"""
+SnowGuard - Shared Library
+Data access and RBAC helpers used by the Streamlit dashboard
+"""
@@ -0,0 +1,387 @@
+"""
+SnowGuard - Command Line
+Headless entry point for schedulers and scripts: `python -m snowguard <command>`
+(run from the app directory). Shares the planner, executor and backends with the
+dashboard but never imports Streamlit or Plotly, and each command imports only
+the modules it uses.
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import time
+
+from snowguard.config import config_value, load_config
+
+# Seconds the command's own imports may take before --check-imports fails
+IMPORT_BUDGET = 2.0
+
+# Dashboard-only packages the CLI must never pull in
+UI_MODULES = ('streamlit', 'plotly')
+
+# Modules each command needs; imported (and timed) before the command runs
+PLANNING_MODULES = ['snowguard.backends', 'snowguard.connection', 'snowguard.planner']
+COMMAND_MODULES = {
+    'plan': PLANNING_MODULES,
+    'grant': PLANNING_MODULES + ['snowguard.executor'],
+    'revoke': PLANNING_MODULES + ['snowguard.executor'],
+    'status': PLANNING_MODULES + ['snowguard.index', 'snowguard.intervals'],
+    'export': PLANNING_MODULES,
+    'tick': PLANNING_MODULES + ['snowguard.executor', 'snowguard.scheduler'],
+}
+
+SECRETS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.streamlit', 'secrets.toml')
+
+# Environment variables that override the [snowflake] connection settings
+ENV_SETTINGS = {
+    'user': 'SNOWFLAKE_USER',
+    'password': 'SNOWFLAKE_PASSWORD',
+    'account': 'SNOWFLAKE_ACCOUNT',
+    'warehouse': 'SNOWFLAKE_WAREHOUSE',
+    'role': 'SNOWFLAKE_ROLE',
+    'database': 'SNOWFLAKE_DATABASE',
+    'schema': 'SNOWFLAKE_SCHEMA',
+}
+
+
+def _connection_settings(config):
+    """[snowflake] from config.ini, then .streamlit/secrets.toml, then SNOWFLAKE_* variables."""
+    settings = {key: config_value(config, 'snowflake', key) for key in ENV_SETTINGS}
+    if os.path.exists(SECRETS_PATH):
+        import tomllib
+        with open(SECRETS_PATH, 'rb') as f:
+            settings.update(tomllib.load(f).get('snowflake', {}))
+    settings.update({key: os.environ[var] for key, var in ENV_SETTINGS.items() if os.environ.get(var)})
+    return settings
+
+
+def _backend(args, config):
+    # Kept on args so --query-metrics can save through the same pool afterwards
+    if getattr(args, 'backend', None) is None:
+        args.backend = _open_backend(args, config)
+    return args.backend
+
+
+def _open_backend(args, config):
+    from snowguard.query_log import QUERY_LOG
+
+    if args.local:
+        from snowguard.local import LocalBackend, account_from_config
+        return LocalBackend(account_from_config(config), grants_source=args.grants_source,
+                            max_size=config_value(config, 'local', 'pool_size', 4, int), query_log=QUERY_LOG)
+    if args.offline:
+        import pandas as pd
+        from snowguard.backends import FixtureBackend
+        from snowguard.loaders import sample_metadata
+        metadata = pd.read_csv(args.metadata) if args.metadata else sample_metadata()
+        grants = pd.read_csv(args.grants) if args.grants else None
+        return FixtureBackend(metadata, grants)
+
+    from snowguard.backends import SnowflakeBackend
+    from snowguard.connection import ConnectionPool, build_conn_kwargs
+    pool = ConnectionPool(build_conn_kwargs(_connection_settings(config)), query_log=QUERY_LOG)
+    return SnowflakeBackend(pool, grants_source=args.grants_source)
+
+
+def _plan(args, backend):
+    import pandas as pd
+    from snowguard.planner import (
+        TABLE_KEY, coalesce_privileges, collapse_schema_grants, managed_schemas, plan_reconciliation,
+        reconcile_future_grants
+    )
+
+    metadata = backend.load_metadata()
+    roles = metadata['role_name'].dropna().unique().tolist() if args.grants_source == 'show_grants' else None
+    plan = plan_reconciliation(
+        metadata, backend.load_grants(roles), as_of=args.as_of,
+        database=args.database, schema=args.schema, role=args.role
+    )
+    schemas = managed_schemas(metadata, args.database, args.schema)
+    catalog = pd.DataFrame(columns=TABLE_KEY)
+    if args.collapse or args.future_grants:
+        catalog = backend.load_catalog([database for database, _ in schemas])
+    if args.collapse:
+        plan = collapse_schema_grants(plan, metadata, catalog, as_of=args.as_of)
+    # Future grants are always read, so ones the metadata no longer covers are revoked
+    plan = reconcile_future_grants(
+        plan, metadata, catalog, backend.load_future_grants(schemas), as_of=args.as_of,
+        database=args.database, schema=args.schema, role=args.role, grant_future=args.future_grants
+    )
+    return coalesce_privileges(plan), metadata
+
+
+def _write(df, output, fmt):
+    from snowguard.spans import span
+
+    with span(f"{fmt} output", 'export', rows=len(df)):
+        if fmt == 'json':
+            text = df.to_json(orient='records', date_format='iso', indent=2)
+        else:
+            text = df.to_csv(index=False)
+    if output in (None, '-'):
+        sys.stdout.write(text)
+    else:
+        with open(output, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+
+
+def _write_batches(batches, output, fmt):
+    # CSV is written chunk by chunk so the whole result is never held at once; JSON needs one array
+    if fmt == 'json':
+        import pandas as pd
+        return _write(pd.concat(list(batches), ignore_index=True), output, fmt)
+    from snowguard.spans import span
+
+    f = sys.stdout if output in (None, '-') else open(output, 'w', encoding='utf-8', newline='')
+    try:
+        with span(f"{fmt} output", 'export') as timing:
+            timing.rows = 0
+            for i, df in enumerate(batches):
+                f.write(df.to_csv(index=False, header=i == 0))
+                timing.rows += len(df)
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+
+def _write_timings(path):
+    import json
+    from snowguard.query_log import QUERY_LOG
+    from snowguard.spans import RECORDER
+
+    if path.endswith('.prom'):
+        text = RECORDER.to_prometheus() + QUERY_LOG.to_prometheus()
+    else:
+        document = json.loads(RECORDER.to_json())
+        document['queries'] = QUERY_LOG.to_records()
+        text = json.dumps(document, indent=2, default=str)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def _save_query_metrics(args):
+    from snowguard.query_log import METRICS_TABLE, QUERY_LOG
+
+    pool = getattr(getattr(args, 'backend', None), 'pool', None)
+    if pool is None:
+        print("No Snowflake queries to save (--offline)", file=sys.stderr)
+        return
+    try:
+        saved = QUERY_LOG.flush(pool)
+    except Exception as e:
+        print(f"Could not save query metrics: {e}", file=sys.stderr)
+        return
+    print(f"Saved {saved} query record(s) to {METRICS_TABLE}", file=sys.stderr)
+
+
+def cmd_plan(args, config):
+    from snowguard.planner import plan_summary
+
+    plan, metadata = _plan(args, _backend(args, config))
+    if args.format == 'text':
+        for sql in plan['sql_statement'].drop_duplicates():
+            print(f"{sql};")
+        summary = plan_summary(
+            plan, metadata, as_of=args.as_of, database=args.database, schema=args.schema, role=args.role
+        )
+        print(
+            f"-- {summary['grants']} grant(s), {summary['revokes']} revoke(s), "
+            f"{summary['statements']} statement(s), {summary['unchanged']} unchanged",
+            file=sys.stderr
+        )
+    else:
+        _write(plan, args.output, args.format)
+    return 0
+
+
+def _apply(args, config, action):
+    from snowguard.executor import apply_plan, format_results
+
+    backend = _backend(args, config)
+    plan, _ = _plan(args, backend)
+    plan = plan[plan['action'] == action].reset_index(drop=True)
+    concurrency = args.concurrency or config_value(config, 'performance', 'grant_concurrency', 1, int)
+    timeout = config_value(config, 'performance', 'operation_timeout', None, int)
+    results, summary = apply_plan(
+        backend, plan, dry_run=args.dry_run, label=f"SnowGuard CLI {action.lower()}",
+        concurrency=concurrency, timeout=timeout
+    )
+    print(format_results(results, summary))
+    return 1 if summary['failed'] else 0
+
+
+def cmd_grant(args, config):
+    return _apply(args, config, 'GRANT')
+
+
+def cmd_revoke(args, config):
+    return _apply(args, config, 'REVOKE')
+
+
+def cmd_tick(args, config):
+    import pandas as pd
+    from snowguard.executor import format_results
+    from snowguard.scheduler import ExpiryScheduler
+
+    backend = _backend(args, config)
+    auto_expire = config_value(config, 'app', 'auto_expire_permissions', True, bool) and args.auto_expire
+    scheduler = ExpiryScheduler(backend, auto_expire=auto_expire).load(backend.load_metadata(), args.since)
+    results, summary = scheduler.tick(
+        dry_run=args.dry_run, label="SnowGuard CLI tick",
+        concurrency=args.concurrency or config_value(config, 'performance', 'grant_concurrency', 1, int),
+        timeout=config_value(config, 'performance', 'operation_timeout', None, int)
+    )
+    if summary is None:
+        print(f"Nothing due (last applied through {pd.Timestamp(scheduler.last_tick):%Y-%m-%d})")
+        return 0
+    print(format_results(results, summary))
+    print(f"-- {summary['boundaries']} boundary(ies), {summary['expiries_skipped']} expiry(ies) skipped",
+          file=sys.stderr)
+    return 1 if summary['failed'] else 0
+
+
+def cmd_status(args, config):
+    from snowguard.index import PermissionIndex
+    from snowguard.intervals import EffectiveDateIndex
+
+    metadata = _backend(args, config).load_metadata()
+    index = PermissionIndex(metadata, as_of=args.as_of)
+    if args.table:
+        parts = args.table.split('.')
+        if len(parts) != 3:
+            print("--table must be DATABASE.SCHEMA.TABLE", file=sys.stderr)
+            return 2
+        effective = index.roles_for_table(*parts)
+        if effective.empty:
+            print("No role has active access to this table.")
+        else:
+            print(effective[['role_name', 'privileges']].to_string(index=False))
+        entries = index.get_table_rbac_status(*parts)
+        if not entries.empty:
+            print()
+            print(entries.to_string(index=False))
+        return 0
+
+    dates = EffectiveDateIndex(metadata)
+    print(f"Metadata rows:         {len(metadata)}")
+    print(f"In effect:             {dates.active_count(args.as_of)}")
+    print(f"Roles:                 {len(index.names['role_name'])}")
+    print(f"Databases:             {len(index.names['database_name'])}")
+    expiries = dates.next_expiries(args.limit, args.as_of)
+    if not expiries.empty:
+        print()
+        print("Next expiries:")
+        print(expiries[['effective_end_date', 'database_name', 'schema_name', 'table_name', 'role_name',
+                        'permission_type']].to_string(index=False))
+    return 0
+
+
+def cmd_export(args, config):
+    backend = _backend(args, config)
+    if args.what == 'metadata':
+        df = backend.load_metadata()
+    elif args.what == 'audit-log':
+        _write_batches(backend.iter_audit_log(), args.output, args.format)
+        return 0
+    else:
+        df, _ = _plan(args, backend)
+    _write(df, args.output, args.format)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m snowguard', description="SnowGuard RBAC command line")
+    parser.add_argument('--offline', action='store_true',
+                        help="use an in-memory backend instead of Snowflake (sample data unless --metadata)")
+    parser.add_argument('--local', action='store_true',
+                        help="use the SQLite stand-in for Snowflake configured under [local] in config.ini")
+    parser.add_argument('--metadata', help="metadata CSV for --offline")
+    parser.add_argument('--grants', help="current grants CSV (GRANT_KEY columns) for --offline")
+    parser.add_argument('--grants-source', choices=['account_usage', 'show_grants'], default='account_usage')
+    parser.add_argument('--timings', metavar='FILE',
+                        help="write span and query timings after the command (Prometheus text for *.prom, else JSON)")
+    parser.add_argument('--query-metrics', action='store_true',
+                        help="save the command's queries, with bytes scanned, to audit.adw_rbac_query_metrics")
+    parser.add_argument('--check-imports', action='store_true',
+                        help=f"exit 1 if the command's imports take over {IMPORT_BUDGET}s or load a UI package")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def planning(sub):
+        sub.add_argument('--database')
+        sub.add_argument('--schema')
+        sub.add_argument('--role')
+        sub.add_argument('--as-of', help="plan as of this date (default today)")
+        sub.add_argument('--no-collapse', dest='collapse', action='store_false',
+                         help="keep per-table statements instead of schema-level ones")
+        sub.add_argument('--future-grants', action='store_true',
+                         help="also grant ON FUTURE TABLES in schemas the metadata fully covers "
+                              "(future grants it no longer covers are revoked either way)")
+
+    sub = commands.add_parser('plan', help="print the statements needed to reconcile grants with the metadata")
+    planning(sub)
+    sub.add_argument('--format', choices=['text', 'csv', 'json'], default='text')
+    sub.add_argument('-o', '--output')
+    sub.set_defaults(handler=cmd_plan)
+
+    for name, handler, text in (('grant', cmd_grant, "missing grants"), ('revoke', cmd_revoke, "stale grants")):
+        sub = commands.add_parser(name, help=f"execute the planned statements for {text}")
+        planning(sub)
+        sub.add_argument('--dry-run', action='store_true')
+        sub.add_argument('--concurrency', type=int, help="statements in flight (default: grant_concurrency)")
+        sub.set_defaults(handler=handler)
+
+    sub = commands.add_parser('status', help="metadata summary, or one table's roles and metadata entries")
+    sub.add_argument('--table', help="DATABASE.SCHEMA.TABLE")
+    sub.add_argument('--as-of')
+    sub.add_argument('--limit', type=int, default=10, help="upcoming expiries to list")
+    sub.set_defaults(handler=cmd_status)
+
+    sub = commands.add_parser('tick', help="apply the effective-date boundaries due since the last tick")
+    sub.add_argument('--since', help="apply boundaries after this date instead of the saved last tick")
+    sub.add_argument('--dry-run', action='store_true', help="plan the due statements without saving the tick")
+    sub.add_argument('--no-auto-expire', dest='auto_expire', action='store_false',
+                     help="only grant rows that started; leave ended ones in place")
+    sub.add_argument('--concurrency', type=int, help="statements in flight (default: grant_concurrency)")
+    sub.set_defaults(handler=cmd_tick)
+
+    sub = commands.add_parser('export', help="write the metadata, audit log or plan as CSV/JSON")
+    sub.add_argument('what', choices=['metadata', 'audit-log', 'plan'])
+    planning(sub)
+    sub.add_argument('--format', choices=['csv', 'json'], default='csv')
+    sub.add_argument('-o', '--output')
+    sub.set_defaults(handler=cmd_export)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    started = time.perf_counter()
+    for module in COMMAND_MODULES[args.command]:
+        importlib.import_module(module)
+    elapsed = time.perf_counter() - started
+    if args.check_imports:
+        loaded = sorted(m for m in sys.modules if m.split('.')[0] in UI_MODULES)
+        if loaded:
+            print(f"UI packages imported: {', '.join(loaded)}", file=sys.stderr)
+            return 1
+        if elapsed > IMPORT_BUDGET:
+            print(f"Imports took {elapsed:.2f}s, over the {IMPORT_BUDGET}s budget", file=sys.stderr)
+            return 1
+        print(f"Imports took {elapsed:.2f}s (budget {IMPORT_BUDGET}s)", file=sys.stderr)
+    if not args.timings and not args.query_metrics:
+        return args.handler(args, load_config())
+
+    from snowguard.spans import RECORDER
+    try:
+        with RECORDER.rerun(args.command):
+            return args.handler(args, load_config())
+    finally:
+        if args.query_metrics:
+            _save_query_metrics(args)
+        if args.timings:
+            _write_timings(args.timings)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
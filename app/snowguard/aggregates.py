@@ -0,0 +1,64 @@
+"""
+SnowGuard - Dashboard Aggregates
+Counts and chart data for the dashboard, computed once per data version
+"""
+
+import pandas as pd
+
+# Most recent audit rows the dashboard shows (the timeline uses the first RECENT_OPERATIONS)
+RECENT_ACTIVITY = 10
+RECENT_OPERATIONS = 7
+
+RECENT_ACTIVITY_COLUMNS = [
+    'operation_type', 'database_name', 'schema_name', 'table_name', 'role_name', 'execution_status', 'execution_time'
+]
+
+
+def data_version(df, ts_column='record_updated_ts'):
+    """
+    Cheap identity for a frame's contents: its row count plus the newest `ts_column`.
+
+    Appends change the count and edits bump record_updated_ts, so aggregates keyed
+    on this can be reused until either happens.
+    """
+    if df is None:
+        return (0, None)
+    if ts_column not in df.columns or df.empty:
+        return (len(df), None)
+    column = df[ts_column]
+    if not pd.api.types.is_datetime64_any_dtype(column):
+        column = pd.to_datetime(column, errors='coerce')
+    newest = column.max()
+    return (len(df), None if pd.isna(newest) else pd.Timestamp(newest).isoformat())
+
+
+def _counts(metadata, column):
+    counts = metadata.groupby(column, observed=True).size().reset_index(name='count')
+    # Plain strings for the charts; plotly groups categorical columns by every category
+    return counts.astype({column: object})
+
+
+def metadata_aggregates(metadata):
+    """Key metrics and per-role / per-database / per-type counts over the metadata."""
+    return {
+        'total_permissions': len(metadata),
+        'active_permissions': int((metadata['record_status_cd'] == 'A').sum()),
+        'unique_roles': metadata['role_name'].nunique(),
+        'unique_databases': metadata['database_name'].nunique(),
+        'by_role': _counts(metadata, 'role_name'),
+        'by_database': _counts(metadata, 'database_name'),
+        'by_permission_type': _counts(metadata, 'permission_type'),
+    }
+
+
+def audit_aggregates(audit_log):
+    """Success count and the most recent operations from the audit log."""
+    times = pd.to_datetime(audit_log['execution_time'], errors='coerce').reset_index(drop=True)
+    # nlargest does a partial selection instead of sorting the whole log
+    latest = times.nlargest(RECENT_ACTIVITY).index
+    recent = audit_log.iloc[latest].reset_index(drop=True).assign(execution_time=times.iloc[latest].to_numpy())
+    return {
+        'successful_operations': int((audit_log['execution_status'] == 'SUCCESS').sum()),
+        'recent_operations': recent.head(RECENT_OPERATIONS),
+        'recent_activity': recent[RECENT_ACTIVITY_COLUMNS],
+    }
@@ -0,0 +1,370 @@
+"""
+SnowGuard - Grant Backends
+Where the planner and executor read desired/actual state and run statements:
+Snowflake itself (or the SQLite stand-in in snowguard.local, which answers the
+same queries), or an in-memory fixture for offline runs and tests
+"""
+
+import re
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+from snowguard.bulk_load import METADATA_COLUMNS, METADATA_TABLE
+from snowguard.loaders import AUDIT_LOG_QUERY, fetch_dataframe, fetch_frame, iter_frames
+from snowguard.planner import ALL_TABLE_PRIVILEGES, GRANT_KEY, SCHEMA_GROUP, TABLE_KEY
+
+AUDIT_TABLE = "audit.adw_rbac_audit_log"
+SCHEDULER_STATE_TABLE = "audit.adw_rbac_scheduler_state"
+
+AUDIT_COLUMNS = [
+    'operation_type', 'database_name', 'schema_name', 'table_name', 'role_name',
+    'permission_type', 'sql_statement', 'execution_status', 'error_message', 'execution_time'
+]
+
+# ACCOUNT_USAGE lags by up to two hours but answers for every role in one query
+GRANTS_TO_ROLES_QUERY = """
+    SELECT
+        table_catalog AS database_name,
+        table_schema AS schema_name,
+        name AS table_name,
+        grantee_name AS role_name,
+        privilege
+    FROM snowflake.account_usage.grants_to_roles
+    WHERE granted_on = 'TABLE'
+      AND granted_to = 'ROLE'
+      AND deleted_on IS NULL
+"""
+
+# Base tables per database; INFORMATION_SCHEMA is current, unlike ACCOUNT_USAGE
+CATALOG_QUERY = """
+    SELECT table_catalog AS database_name, table_schema AS schema_name, table_name
+    FROM {database}.information_schema.tables
+    WHERE table_type = 'BASE TABLE'
+"""
+
+STATEMENT_PATTERN = re.compile(
+    r"^(GRANT|REVOKE)\s+(.+?)\s+ON\s+(TABLE|ALL\s+TABLES\s+IN\s+SCHEMA|FUTURE\s+TABLES\s+IN\s+SCHEMA)\s+(\S+)"
+    r"\s+(?:TO|FROM)\s+ROLE\s+(\S+?);?$",
+    re.IGNORECASE
+)
+
+
+def _split_object_name(name):
+    # SHOW GRANTS reports tables as DB.SCHEMA."Table" with quotes only where needed
+    parts = [p.strip('"') for p in re.findall(r'"[^"]*"|[^.]+', name)]
+    return (parts + [None, None, None])[:3]
+
+
+class Backend:
+    """
+    What the CLI, executor and expiry scheduler need from a backend.
+
+    Loads return DataFrames (metadata and audit log in their table's columns,
+    grants as GRANT_KEY rows, future grants as SCHEMA_GROUP rows, the catalog as
+    TABLE_KEY rows). `execute` runs one statement and raises on failure;
+    `submit` / `poll` / `cancel` are the async form `apply_plan` uses when
+    concurrency > 1.
+    """
+
+    def load_metadata(self):
+        raise NotImplementedError
+
+    def load_audit_log(self):
+        raise NotImplementedError
+
+    def iter_audit_log(self):
+        """The audit log as a sequence of DataFrames, for exports that write one chunk at a time."""
+        yield self.load_audit_log()
+
+    def load_grants(self, roles=None):
+        raise NotImplementedError
+
+    def load_future_grants(self, schemas):
+        """Future table grants to roles in `schemas`, a sequence of (database, schema) pairs."""
+        raise NotImplementedError
+
+    def load_catalog(self, databases):
+        raise NotImplementedError
+
+    def execute(self, statement):
+        raise NotImplementedError
+
+    def submit(self, statement):
+        raise NotImplementedError
+
+    def poll(self, query_id):
+        """'RUNNING' or 'DONE'; raises the statement's error if it failed."""
+        raise NotImplementedError
+
+    def cancel(self, query_id):
+        raise NotImplementedError
+
+    def write_audit(self, rows):
+        """Append AUDIT_COLUMNS dicts to the audit log."""
+        raise NotImplementedError
+
+    def load_last_tick(self, scheduler):
+        """The day `scheduler` last applied boundaries through (a Timestamp), or None if it never ran."""
+        raise NotImplementedError
+
+    def save_last_tick(self, scheduler, day):
+        raise NotImplementedError
+
+
+class SnowflakeBackend(Backend):
+    """Reads state from and executes statements on Snowflake through a ConnectionPool."""
+
+    def __init__(self, pool, grants_source='account_usage'):
+        if grants_source not in ('account_usage', 'show_grants'):
+            raise ValueError(f"Unknown grants source: {grants_source}")
+        self.pool = pool
+        self.grants_source = grants_source
+
+    def load_metadata(self):
+        return fetch_frame(self.pool, f"SELECT {', '.join(METADATA_COLUMNS)} FROM {METADATA_TABLE}")
+
+    def load_audit_log(self):
+        return fetch_frame(self.pool, AUDIT_LOG_QUERY)
+
+    def iter_audit_log(self):
+        return iter_frames(self.pool, AUDIT_LOG_QUERY)
+
+    def load_grants(self, roles=None):
+        """Current table grants as GRANT_KEY rows, optionally limited to `roles`."""
+        if self.grants_source == 'account_usage':
+            query = GRANTS_TO_ROLES_QUERY
+            params = None
+            if roles:
+                params = {f"role_{i}": r for i, r in enumerate(roles)}
+                query += f"  AND grantee_name IN ({', '.join(f'%({k})s' for k in params)})"
+            return fetch_dataframe(self.pool, query, params)[GRANT_KEY]
+
+        # SHOW GRANTS is current (no ACCOUNT_USAGE latency) but costs one query per role
+        rows = []
+        with self.pool.connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                for role in roles or []:
+                    cur.execute(f"SHOW GRANTS TO ROLE {role}")
+                    columns = [d[0].lower() for d in cur.description]
+                    for record in cur.fetchall():
+                        grant = dict(zip(columns, record))
+                        if grant.get('granted_on') != 'TABLE':
+                            continue
+                        database, schema, table = _split_object_name(grant['name'])
+                        rows.append((database, schema, table, grant['grantee_name'], grant['privilege']))
+            finally:
+                cur.close()
+        return pd.DataFrame(rows, columns=GRANT_KEY)
+
+    def load_future_grants(self, schemas):
+        """Future table grants in `schemas` as SCHEMA_GROUP rows; one SHOW FUTURE GRANTS per schema."""
+        # Neither ACCOUNT_USAGE nor INFORMATION_SCHEMA reports schema-level future grants
+        rows = []
+        with self.pool.connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                for database, schema in schemas:
+                    cur.execute(f"SHOW FUTURE GRANTS IN SCHEMA {database}.{schema}")
+                    columns = [d[0].lower() for d in cur.description]
+                    for record in cur.fetchall():
+                        grant = dict(zip(columns, record))
+                        if grant.get('grant_on') != 'TABLE' or grant.get('grant_to') != 'ROLE':
+                            continue
+                        rows.append((database, schema, grant['grantee_name'], grant['privilege']))
+            finally:
+                cur.close()
+        return pd.DataFrame(rows, columns=SCHEMA_GROUP)
+
+    def load_catalog(self, databases):
+        """Snapshot of the base tables in `databases`, as TABLE_KEY rows."""
+        databases = sorted(set(databases))
+        if not databases:
+            return pd.DataFrame(columns=TABLE_KEY)
+        query = " UNION ALL ".join(CATALOG_QUERY.format(database=db) for db in databases)
+        return fetch_dataframe(self.pool, query)[TABLE_KEY]
+
+    def execute(self, statement):
+        """Run one statement; returns its query id."""
+        with self.pool.connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                cur.execute(statement)
+                return cur.sfqid
+            finally:
+                cur.close()
+
+    def submit(self, statement):
+        """Start `statement` with the connector's async API; returns its query id."""
+        with self.pool.connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                cur.execute_async(statement)
+                return cur.sfqid
+            finally:
+                cur.close()
+
+    def poll(self, query_id):
+        """'RUNNING' or 'DONE'; raises the query's error if it failed."""
+        with self.pool.connection() as cnx:
+            status = cnx.get_query_status_throw_if_error(query_id)
+            return 'RUNNING' if cnx.is_still_running(status) else 'DONE'
+
+    def cancel(self, query_id):
+        with self.pool.connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                cur.execute("SELECT SYSTEM$CANCEL_QUERY(%(query_id)s)", {'query_id': query_id})
+            finally:
+                cur.close()
+
+    def write_audit(self, rows):
+        """Insert audit rows in one multi-row INSERT."""
+        if not rows:
+            return
+        placeholders = ", ".join(f"%({col})s" for col in AUDIT_COLUMNS)
+        with self.pool.connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                cur.executemany(
+                    f"INSERT INTO {AUDIT_TABLE} ({', '.join(AUDIT_COLUMNS)}, record_status_cd, "
+                    "record_created_by, record_create_ts, record_updated_by, record_updated_ts) "
+                    f"VALUES ({placeholders}, 'A', CURRENT_USER(), CURRENT_TIMESTAMP(), "
+                    "CURRENT_USER(), CURRENT_TIMESTAMP())",
+                    rows
+                )
+            finally:
+                cur.close()
+
+    def load_last_tick(self, scheduler):
+        state = fetch_dataframe(
+            self.pool, f"SELECT last_tick_date FROM {SCHEDULER_STATE_TABLE} WHERE scheduler_name = %(name)s",
+            {'name': scheduler}
+        )
+        if state.empty or pd.isna(state['last_tick_date'].iloc[0]):
+            return None
+        return pd.Timestamp(state['last_tick_date'].iloc[0]).normalize()
+
+    def save_last_tick(self, scheduler, day):
+        params = {'name': scheduler, 'day': pd.Timestamp(day).date()}
+        with self.pool.connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                cur.execute(
+                    f"UPDATE {SCHEDULER_STATE_TABLE} SET last_tick_date = %(day)s, record_updated_by = CURRENT_USER(), "
+                    "record_updated_ts = CURRENT_TIMESTAMP() WHERE scheduler_name = %(name)s", params
+                )
+                if cur.rowcount == 0:
+                    cur.execute(
+                        f"INSERT INTO {SCHEDULER_STATE_TABLE} (scheduler_name, last_tick_date, record_updated_by, "
+                        "record_updated_ts) VALUES (%(name)s, %(day)s, CURRENT_USER(), CURRENT_TIMESTAMP())", params
+                    )
+            finally:
+                cur.close()
+
+
+class FixtureBackend(Backend):
+    """
+    In-memory backend for offline planning and tests.
+
+    `metadata` is a metadata-shaped DataFrame and `grants` a DataFrame of GRANT_KEY rows.
+    Executed GRANT/REVOKE statements update `grants`, so a second plan against
+    the same fixture comes back empty. `catalog` lists the tables that exist (by
+    default every table the metadata names), `fail_on` lists statements to reject
+    and `latency` makes async statements stay RUNNING for that many seconds.
+    """
+
+    def __init__(self, metadata, grants=None, catalog=None, fail_on=(), latency=0.0):
+        self.metadata = metadata.copy()
+        self.grants = set() if grants is None else set(grants[GRANT_KEY].itertuples(index=False, name=None))
+        self.catalog = (metadata if catalog is None else catalog)[TABLE_KEY].drop_duplicates(ignore_index=True)
+        self.future_grants = set()
+        self.fail_on = set(fail_on)
+        self.latency = latency
+        self.executed = []
+        self.audit_rows = []
+        self._submitted = {}
+        self.last_ticks = {}
+        self._lock = threading.Lock()
+
+    def load_metadata(self):
+        return self.metadata.copy()
+
+    def load_audit_log(self):
+        return pd.DataFrame(self.audit_rows, columns=AUDIT_COLUMNS)
+
+    def load_grants(self, roles=None):
+        grants = pd.DataFrame(sorted(self.grants), columns=GRANT_KEY)
+        if roles:
+            grants = grants[grants['role_name'].str.upper().isin([r.upper() for r in roles])]
+        return grants.reset_index(drop=True)
+
+    def load_future_grants(self, schemas):
+        schemas = {(d.upper(), s.upper()) for d, s in schemas}
+        return pd.DataFrame(sorted(g for g in self.future_grants if g[:2] in schemas), columns=SCHEMA_GROUP)
+
+    def load_catalog(self, databases):
+        catalog = self.catalog.copy()
+        return catalog[catalog['database_name'].str.upper().isin([d.upper() for d in databases])]
+
+    def execute(self, statement):
+        match = STATEMENT_PATTERN.match(statement.strip())
+        if not match or statement in self.fail_on:
+            raise RuntimeError(f"Statement rejected by fixture backend: {statement}")
+        action, privileges, target, name, role = match.groups()
+        privileges = [p.strip().upper() for p in privileges.split(',')]
+        if 'ALL' in privileges:
+            privileges = ALL_TABLE_PRIVILEGES
+        parts = [p.upper() for p in name.split('.')]
+        target = ' '.join(target.upper().split())
+        role = role.upper()
+
+        with self._lock:
+            if target == 'FUTURE TABLES IN SCHEMA':
+                keys = {(parts[0], parts[1], role, p) for p in privileges}
+                grants = self.future_grants
+            else:
+                if target == 'TABLE':
+                    tables = [tuple(parts)]
+                else:
+                    in_schema = (self.catalog['database_name'].str.upper() == parts[0]) & \
+                                (self.catalog['schema_name'].str.upper() == parts[1])
+                    tables = [tuple(t.upper() for t in row)
+                              for row in self.catalog[in_schema].itertuples(index=False, name=None)]
+                keys = {(*table, role, p) for table in tables for p in privileges}
+                grants = self.grants
+            if action.upper() == 'GRANT':
+                grants |= keys
+            else:
+                grants -= keys
+            self.executed.append(statement)
+        return str(uuid.uuid4())
+
+    def submit(self, statement):
+        query_id = str(uuid.uuid4())
+        self._submitted[query_id] = (statement, time.monotonic() + self.latency)
+        return query_id
+
+    def poll(self, query_id):
+        statement, ready_at = self._submitted[query_id]
+        if time.monotonic() < ready_at:
+            return 'RUNNING'
+        del self._submitted[query_id]
+        self.execute(statement)
+        return 'DONE'
+
+    def cancel(self, query_id):
+        self._submitted.pop(query_id, None)
+
+    def write_audit(self, rows):
+        with self._lock:
+            self.audit_rows.extend(rows)
+
+    def load_last_tick(self, scheduler):
+        return self.last_ticks.get(scheduler)
+
+    def save_last_tick(self, scheduler, day):
+        self.last_ticks[scheduler] = pd.Timestamp(day).normalize()
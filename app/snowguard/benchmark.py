@@ -0,0 +1,221 @@
+"""
+SnowGuard - Benchmarks
+Times the hot paths against synthetic data at a chosen scale and writes the
+results as JSON: `python -m snowguard.benchmark --scale small -o bench.json`
+(run from the app directory). With --baseline, exits 1 if any benchmark got
+slower than the baseline by more than --tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from snowguard.aggregates import audit_aggregates, data_version, metadata_aggregates
+from snowguard.index import PermissionIndex
+from snowguard.ingest import ingest_permission_csv
+from snowguard.planner import coalesce_privileges, collapse_schema_grants, plan_reconciliation
+from snowguard.synthetic import (
+    SCALES, synthetic_audit_log, synthetic_catalog, synthetic_grants, synthetic_metadata, write_upload_csv
+)
+
+# A benchmark counts as a regression when its median exceeds the baseline's by this share
+DEFAULT_TOLERANCE = 0.2
+
+# Filters timed on the Metadata Management page: (roles, databases, statuses)
+FILTER_CASES = [
+    (None, None, ['A']),
+    (['ROLE_0000000', 'ROLE_0000001', 'ROLE_0000002'], None, None),
+    (None, ['DB_0000000'], ['A', 'I']),
+]
+
+# Table lookups timed per run of metadata_filtering
+LOOKUPS = 100
+
+
+def _time(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+class Workload:
+    """Synthetic frames for one scale, generated once and shared by every benchmark."""
+
+    def __init__(self, sizes, seed=0):
+        self.sizes = sizes
+        self.seed = seed
+        self.metadata = synthetic_metadata(seed=seed, **sizes)
+        self.audit_log = synthetic_audit_log(self.metadata, seed=seed, **sizes)
+        self.grants = synthetic_grants(self.metadata, seed=seed)
+        self.catalog = synthetic_catalog(**sizes)
+        self.index = PermissionIndex(self.metadata)
+        self.workdir = tempfile.mkdtemp(prefix="snowguard-bench-")
+        self.upload_path = write_upload_csv(os.path.join(self.workdir, "upload.csv"), seed=seed, **sizes)
+
+    def cleanup(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def bench_dashboard_aggregation(w):
+    data_version(w.metadata)
+    data_version(w.audit_log, ts_column='execution_time')
+    metadata_aggregates(w.metadata)
+    audit_aggregates(w.audit_log)
+    return len(w.metadata) + len(w.audit_log)
+
+
+def bench_metadata_index_build(w):
+    PermissionIndex(w.metadata)
+    return len(w.metadata)
+
+
+def bench_metadata_filtering(w):
+    for roles, databases, statuses in FILTER_CASES:
+        w.metadata[w.index.row_mask(roles, databases, statuses)]
+    tables = w.metadata[['database_name', 'schema_name', 'table_name']].head(LOOKUPS)
+    for database, schema, table in tables.itertuples(index=False, name=None):
+        w.index.roles_for_table(database, schema, table)
+    return len(FILTER_CASES) * len(w.metadata) + len(tables)
+
+
+def bench_bulk_upload_validation(w):
+    with open(w.upload_path, 'rb') as f:
+        result = ingest_permission_csv(f, workdir=tempfile.mkdtemp(dir=w.workdir))
+    result.cleanup()
+    return result.total_rows
+
+
+def bench_grant_planning(w):
+    plan = plan_reconciliation(w.metadata, w.grants)
+    plan = collapse_schema_grants(plan, w.metadata, w.catalog)
+    coalesce_privileges(plan)
+    return len(w.metadata)
+
+
+def bench_export(w):
+    w.metadata.to_csv(os.path.join(w.workdir, "metadata.csv"), index=False)
+    w.audit_log.to_csv(os.path.join(w.workdir, "audit_log.csv"), index=False)
+    return len(w.metadata) + len(w.audit_log)
+
+
+BENCHMARKS = {
+    'dashboard_aggregation': bench_dashboard_aggregation,
+    'metadata_index_build': bench_metadata_index_build,
+    'metadata_filtering': bench_metadata_filtering,
+    'bulk_upload_validation': bench_bulk_upload_validation,
+    'grant_planning': bench_grant_planning,
+    'export': bench_export,
+}
+
+
+def run_benchmarks(sizes, names=None, repeat=3, seed=0, progress=None):
+    """
+    Run the named benchmarks (default all) `repeat` times each over one workload.
+
+    Returns a dict of name -> median/min seconds, the rows each run processed and
+    rows per second at the median.
+    """
+    workload = Workload(sizes, seed=seed)
+    results = {}
+    try:
+        for name in names or BENCHMARKS:
+            fn = BENCHMARKS[name]
+            rows = fn(workload)  # warm-up, not timed
+            timings = _time(lambda: fn(workload), repeat)
+            median = statistics.median(timings)
+            results[name] = {
+                'median_seconds': round(median, 6),
+                'min_seconds': round(min(timings), 6),
+                'rows': rows,
+                'rows_per_second': round(rows / median) if median else None,
+            }
+            if progress is not None:
+                progress(name, results[name])
+    finally:
+        workload.cleanup()
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Benchmarks whose median grew by more than `tolerance` over the baseline's, as (name, old, new)."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if previous and result['median_seconds'] > previous['median_seconds'] * (1 + tolerance):
+            regressions.append((name, previous['median_seconds'], result['median_seconds']))
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m snowguard.benchmark', description="SnowGuard benchmarks")
+    parser.add_argument('--scale', choices=list(SCALES), default='small')
+    for size in SCALES['small']:
+        parser.add_argument(f"--{size.replace('_', '-')}", dest=size, type=int, help=f"override the scale's {size}")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per benchmark")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', action='append', choices=list(BENCHMARKS), help="run only these (repeatable)")
+    parser.add_argument('-o', '--output', help="write results as JSON here")
+    parser.add_argument('--baseline', help="earlier JSON output to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown over the baseline, as a share (default %(default)s)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sizes = dict(SCALES[args.scale])
+    sizes.update({size: getattr(args, size) for size in sizes if getattr(args, size) is not None})
+
+    def progress(name, result):
+        print(f"{name:<24} {result['median_seconds']:>10.4f}s  {result['rows_per_second'] or 0:>14,} rows/s",
+              file=sys.stderr)
+
+    print(f"Scale {args.scale}: {sizes}", file=sys.stderr)
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'scale': args.scale,
+        'sizes': sizes,
+        'repeat': args.repeat,
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+        },
+        'benchmarks': run_benchmarks(sizes, args.only, args.repeat, args.seed, progress),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('sizes') != sizes:
+            print("Baseline was run at different sizes; timings may not be comparable", file=sys.stderr)
+        regressions = compare(report['benchmarks'], baseline, args.tolerance)
+        for name, old, new in regressions:
+            print(f"REGRESSION {name}: {old:.4f}s -> {new:.4f}s", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
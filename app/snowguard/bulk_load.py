@@ -0,0 +1,145 @@
+"""
+SnowGuard - Bulk Metadata Load
+Writes validated permission rows to audit.adw_rbac_metadata in bulk instead of
+one USP_ADD_RBAC_ENTRY call per row
+"""
+
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from snowguard.loaders import fetch_dataframe
+from snowguard.spans import span
+
+METADATA_TABLE = "audit.adw_rbac_metadata"
+
+# Columns written by a bulk load; rbac_id is left to the IDENTITY column
+LOAD_COLUMNS = [
+    'database_name', 'schema_name', 'table_name', 'role_name', 'permission_type',
+    'effective_start_date', 'effective_end_date', 'description', 'record_status_cd',
+    'record_created_by', 'record_create_ts', 'record_updated_by', 'record_updated_ts'
+]
+
+METADATA_COLUMNS = ['rbac_id'] + LOAD_COLUMNS
+
+# Above this many rows a PUT + COPY (write_pandas) beats batched INSERTs
+COPY_MIN_ROWS = 10_000
+
+HIGH_WATER_QUERY = f"SELECT COALESCE(MAX(rbac_id), 0) AS max_rbac_id FROM {METADATA_TABLE}"
+
+
+def prepare_load_frame(batch, created_by, load_ts):
+    """Shape a batch of validated rows into the metadata table's columns."""
+    frame = pd.DataFrame(index=batch.index)
+    for col in ('database_name', 'schema_name', 'table_name', 'role_name', 'permission_type', 'description'):
+        frame[col] = batch[col] if col in batch.columns else None
+    for col in ('effective_start_date', 'effective_end_date'):
+        # DATE columns: plain dates, None for missing end dates
+        dates = pd.to_datetime(batch[col], errors='coerce') if col in batch.columns else pd.Series(pd.NaT, index=batch.index)
+        frame[col] = dates.dt.date.astype(object).where(dates.notna(), None)
+    # Normalise missing values to None before adding the per-load constants, so the
+    # connector binds plain Python objects
+    frame = frame.astype(object).where(frame.notna(), None)
+    frame['record_status_cd'] = 'A'
+    frame['record_created_by'] = created_by
+    frame['record_create_ts'] = pd.Series([load_ts] * len(frame), index=frame.index, dtype=object)
+    frame['record_updated_by'] = created_by
+    frame['record_updated_ts'] = frame['record_create_ts']
+    return frame[LOAD_COLUMNS]
+
+
+def _insert_batch(cnx, frame):
+    # The connector rewrites executemany() on an INSERT ... VALUES into a single
+    # multi-row INSERT, so each batch is one round-trip
+    placeholders = ", ".join(f"%({col})s" for col in LOAD_COLUMNS)
+    cur = cnx.cursor()
+    try:
+        cur.executemany(
+            f"INSERT INTO {METADATA_TABLE} ({', '.join(LOAD_COLUMNS)}) VALUES ({placeholders})",
+            frame.to_dict('records')
+        )
+    finally:
+        cur.close()
+
+
+def _copy_batch(cnx, frame):
+    from snowflake.connector.pandas_tools import write_pandas
+
+    schema, table = METADATA_TABLE.split('.')
+    success, _, nrows, _ = write_pandas(
+        cnx, frame.reset_index(drop=True), table.upper(), schema=schema.upper(),
+        quote_identifiers=False, use_logical_type=True
+    )
+    if not success:
+        raise RuntimeError(f"COPY into {METADATA_TABLE} did not load all rows ({nrows} loaded)")
+
+
+def bulk_load_metadata(pool, batches, total_rows, batch_size=1000, created_by='BULK_UPLOAD', progress=None):
+    """
+    Write validated permission rows to audit.adw_rbac_metadata.
+
+    `batches` yields DataFrames of validated rows (e.g. `IngestResult.iter_valid_batches`).
+    Small loads use multi-row INSERTs of `batch_size` rows; loads of COPY_MIN_ROWS or
+    more are staged with write_pandas (PUT + COPY). The highest rbac_id before the
+    load is recorded as `after_rbac_id`; with `load_ts` and `created_by` it lets
+    `fetch_loaded_rows` read back exactly this load's rows and their assigned rbac_ids.
+
+    Returns a stats dict with rows, batches, seconds, rows_per_sec, method, load_ts
+    and after_rbac_id.
+    """
+    method = 'copy' if total_rows >= COPY_MIN_ROWS else 'insert'
+    if method == 'insert':
+        write_batch = _insert_batch
+    elif pool.copy_fn is not None:
+        # The pool's account has no stage (snowguard.local); it takes the frame directly
+        write_batch = lambda cnx, frame: pool.copy_fn(frame, METADATA_TABLE)
+    else:
+        write_batch = _copy_batch
+    # IDENTITY values only grow, so this load's rows all get rbac_ids above the current maximum
+    after_rbac_id = int(fetch_dataframe(pool, HIGH_WATER_QUERY)['max_rbac_id'].iloc[0])
+    load_ts = datetime.now()
+    rows = 0
+    batch_count = 0
+    started = time.perf_counter()
+
+    with span(f"{METADATA_TABLE} {method}", 'query') as timing, pool.connection() as cnx:
+        for batch in batches:
+            # INSERT batches are capped at [performance] max_batch_size rows
+            step = len(batch) if method == 'copy' else max(int(batch_size), 1)
+            for start in range(0, len(batch), step):
+                frame = prepare_load_frame(batch.iloc[start:start + step], created_by, load_ts)
+                write_batch(cnx, frame)
+                rows += len(frame)
+                batch_count += 1
+                if progress is not None:
+                    progress(min(rows / total_rows, 1.0) if total_rows else 1.0, rows)
+        timing.rows = rows
+
+    seconds = time.perf_counter() - started
+    return {
+        'rows': rows,
+        'batches': batch_count,
+        'seconds': seconds,
+        'rows_per_sec': rows / seconds if seconds > 0 else float(rows),
+        'method': method,
+        'load_ts': load_ts,
+        'after_rbac_id': after_rbac_id,
+    }
+
+
+def fetch_loaded_rows(pool, stats, created_by='BULK_UPLOAD'):
+    """
+    Read back the rows of one bulk load, including their IDENTITY-assigned rbac_id.
+
+    `stats` is what `bulk_load_metadata` returned. Rows are matched by rbac_id above
+    the load's high-water mark as well as by its load_ts and creator, so an earlier
+    import with the same creator and timestamp cannot be picked up.
+    """
+    query = (
+        f"SELECT {', '.join(METADATA_COLUMNS)} FROM {METADATA_TABLE} "
+        "WHERE rbac_id > %(after_rbac_id)s AND record_create_ts = %(load_ts)s "
+        "AND record_created_by = %(created_by)s ORDER BY rbac_id"
+    )
+    params = {'after_rbac_id': stats['after_rbac_id'], 'load_ts': stats['load_ts'], 'created_by': created_by}
+    return fetch_dataframe(pool, query, params)
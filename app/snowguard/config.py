@@ -0,0 +1,30 @@
+"""
+SnowGuard - Configuration
+Typed access to app/config.ini
+"""
+
+import configparser
+import os
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.ini')
+
+
+def load_config(path=CONFIG_PATH):
+    """Parse config.ini; a missing file yields an empty config so defaults apply."""
+    parser = configparser.ConfigParser(inline_comment_prefixes=('#',))
+    parser.read(path, encoding='utf-8')
+    return parser
+
+
+def config_value(config, section, key, default=None, cast=str):
+    """Read `section.key`, stripping the quotes config.ini puts around strings."""
+    raw = config.get(section, key, fallback=None)
+    if raw is None:
+        return default
+    raw = raw.strip().strip('"').strip("'")
+    if cast is bool:
+        return raw.lower() in ('true', 'yes', 'on', '1')
+    try:
+        return cast(raw)
+    except ValueError:
+        return default
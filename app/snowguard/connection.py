@@ -0,0 +1,145 @@
+"""
+SnowGuard - Snowflake Connection Pool
+A process-wide pool of Snowflake sessions shared by every dashboard session and loader
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Snowflake error numbers raised when a session or its token has expired
+SESSION_EXPIRED_ERRNOS = {390111, 390112, 390114}
+
+
+def build_conn_kwargs(sf):
+    """Build connector keyword arguments from a `[snowflake]` secrets/config section."""
+    conn_kwargs = {
+        "user": sf.get("user"),
+        "password": sf.get("password"),
+        "account": sf.get("account"),
+        "warehouse": sf.get("warehouse"),
+        "role": sf.get("role"),
+        "database": sf.get("database"),
+        "schema": sf.get("schema"),
+    }
+    # Remove None values (connector doesn't like them)
+    conn_kwargs = {k: v for k, v in conn_kwargs.items() if v}
+
+    if not conn_kwargs.get("user") or not conn_kwargs.get("account"):
+        raise ValueError("Snowflake credentials not found in st.secrets['snowflake'].")
+
+    # Keep pooled sessions alive between borrows so we don't pay the login handshake again
+    conn_kwargs.setdefault("client_session_keep_alive", True)
+    return conn_kwargs
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of Snowflake connections.
+
+    Connections are opened lazily, handed out one borrower at a time, health-checked
+    when they have been idle longer than `health_check_interval` seconds, and replaced
+    transparently when the session has expired. With a `query_log`
+    (snowguard.query_log.QueryLog), borrowed connections record every statement in it.
+    Accounts without a stage pass `copy_fn(frame, table)`, which bulk loads use in
+    place of PUT + COPY.
+    """
+
+    def __init__(self, conn_kwargs, max_size=4, health_check_interval=300, connect_fn=None, query_log=None,
+                 copy_fn=None):
+        self.conn_kwargs = dict(conn_kwargs)
+        self.max_size = max_size
+        self.health_check_interval = health_check_interval
+        self.query_log = query_log
+        self.copy_fn = copy_fn
+        self._connect_fn = connect_fn
+        self._idle = []  # list of (connection, last_used_monotonic)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._closed = False
+
+    def _connect(self):
+        if self._connect_fn is not None:
+            return self._connect_fn(**self.conn_kwargs)
+        import snowflake.connector
+        return snowflake.connector.connect(**self.conn_kwargs)
+
+    def _is_healthy(self, cnx, last_used):
+        try:
+            if cnx.is_closed():
+                return False
+            if time.monotonic() - last_used < self.health_check_interval:
+                return True
+            cur = cnx.cursor()
+            try:
+                cur.execute("SELECT 1").fetchone()
+            finally:
+                cur.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _discard(cnx):
+        try:
+            cnx.close()
+        except Exception:
+            pass
+
+    def _acquire(self):
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                if not self._idle:
+                    break
+                cnx, last_used = self._idle.pop()
+            if self._is_healthy(cnx, last_used):
+                return cnx
+            self._discard(cnx)
+        return self._connect()
+
+    def _release(self, cnx):
+        with self._lock:
+            if not self._closed:
+                self._idle.append((cnx, time.monotonic()))
+                return
+        self._discard(cnx)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Borrow a connection for the duration of a `with` block."""
+        if not self._slots.acquire(timeout=timeout if timeout is not None else -1):
+            raise TimeoutError(f"No Snowflake connection available within {timeout}s")
+        cnx = None
+        try:
+            cnx = self._acquire()
+            yield cnx if self.query_log is None else self.query_log.wrap(cnx)
+        except Exception as e:
+            # Drop sessions that expired mid-use; the next borrower gets a fresh login
+            if cnx is not None and (getattr(e, "errno", None) in SESSION_EXPIRED_ERRNOS or cnx.is_closed()):
+                self._discard(cnx)
+                cnx = None
+            raise
+        finally:
+            if cnx is not None:
+                self._release(cnx)
+            self._slots.release()
+
+    def ping(self):
+        """Run a trivial query on a pooled connection; raises if Snowflake is unreachable."""
+        with self.connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                cur.execute("SELECT 1").fetchone()
+            finally:
+                cur.close()
+        return True
+
+    def close(self):
+        """Close all idle connections and refuse further borrows."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for cnx, _ in idle:
+            self._discard(cnx)
@@ -0,0 +1,219 @@
+"""
+SnowGuard - Grant Executor
+Runs a reconciliation plan against a backend with the same audit trail as
+USP_GRANT_RBAC / USP_REVOKE_RBAC
+"""
+
+import time
+from collections import deque
+from datetime import datetime
+
+DRY_RUN_OPERATIONS = {'GRANT': 'DRY_RUN', 'REVOKE': 'DRY_RUN_REVOKE'}
+
+RESULT_ICONS = {'SUCCESS': '✓ SUCCESS', 'FAILED': '❌ FAILED', 'DRY_RUN': '🔍 DRY RUN'}
+
+# Seconds between status polls of in-flight async statements
+POLL_INTERVAL = 0.05
+
+# Audit rows per write_audit call; USP_GRANT_RBAC's p_audit_batch_size default
+AUDIT_BATCH_SIZE = 500
+
+
+def _audit_row(operation_type, sql_statement, status, error_message=None, step=None, execution_time=None):
+    row = {
+        'operation_type': operation_type,
+        'database_name': None,
+        'schema_name': None,
+        'table_name': None,
+        'role_name': None,
+        'permission_type': None,
+        'sql_statement': sql_statement,
+        'execution_status': status,
+        'error_message': error_message,
+        'execution_time': execution_time or datetime.now(),
+    }
+    if step is not None:
+        for col in ('database_name', 'schema_name', 'table_name', 'role_name'):
+            row[col] = step[col]
+        row['permission_type'] = step['privilege']
+    return row
+
+
+def _run_sequential(backend, statements, settle, progress=None):
+    for done, sql in enumerate(statements, 1):
+        try:
+            backend.execute(sql)
+            settle(sql, ('SUCCESS', None, datetime.now()))
+        except Exception as e:
+            settle(sql, ('FAILED', str(e), datetime.now()))
+        if progress is not None:
+            progress(done / len(statements), done)
+
+
+def _cancel(backend, handle, timeout):
+    # A failed cancel must not abort the run: the statement is recorded and the rest carry on
+    try:
+        backend.cancel(handle)
+    except Exception as e:
+        return 'FAILED', f"Timed out after {timeout}s; cancel failed: {e}", datetime.now()
+    return 'FAILED', f"Timed out after {timeout}s", datetime.now()
+
+
+def _run_concurrent(backend, statements, settle, concurrency, timeout=None, poll_interval=POLL_INTERVAL,
+                    progress=None):
+    """
+    Keep up to `concurrency` statements in flight with the backend's async API
+    (`submit` / `poll` / `cancel`) and poll each one until it settles. A statement
+    still running after `timeout` seconds is cancelled and recorded as FAILED.
+    Each outcome goes to `settle(statement, outcome)` as soon as it is known.
+    """
+    pending = deque(statements)
+    in_flight = {}
+    done = 0
+
+    while pending or in_flight:
+        while pending and len(in_flight) < concurrency:
+            sql = pending.popleft()
+            try:
+                in_flight[sql] = (backend.submit(sql), time.monotonic())
+            except Exception as e:
+                settle(sql, ('FAILED', str(e), datetime.now()))
+                done += 1
+
+        for sql, (handle, submitted) in list(in_flight.items()):
+            try:
+                state = backend.poll(handle)
+            except Exception as e:
+                outcome = ('FAILED', str(e), datetime.now())
+            else:
+                if state == 'RUNNING':
+                    if timeout is None or time.monotonic() - submitted < timeout:
+                        continue
+                    outcome = _cancel(backend, handle, timeout)
+                else:
+                    outcome = ('SUCCESS', None, datetime.now())
+            del in_flight[sql]
+            settle(sql, outcome)
+            done += 1
+
+        if progress is not None:
+            progress(done / len(statements), done)
+        if in_flight:
+            time.sleep(poll_interval)
+
+
+class _AuditBuffer:
+    """Audit rows handed to `backend.write_audit` every `batch_size` rows, like the procedures' audit_buffer."""
+
+    def __init__(self, backend, batch_size):
+        self.backend = backend
+        self.batch_size = max(int(batch_size), 1)
+        self.rows = []
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            rows, self.rows = self.rows, []
+            self.backend.write_audit(rows)
+
+
+def apply_plan(backend, plan, dry_run=False, log_details=True, label='SnowGuard reconciliation',
+               concurrency=1, timeout=None, progress=None, audit_batch_size=AUDIT_BATCH_SIZE):
+    """
+    Execute each planned statement and record the outcome.
+
+    Mirrors the stored procedures: a PROCESS_START row, one GRANT/REVOKE row per
+    plan row with SUCCESS or FAILED (DRY_RUN/DRY_RUN_REVOKE when `dry_run`), and a
+    PROCESS_END row with the totals. Plan rows that share a statement (e.g. after
+    `collapse_schema_grants`) run it once and each get its outcome. With
+    `concurrency` > 1 up to that many statements run at once through the backend's
+    async API. Audit rows are recorded as each statement settles and written every
+    `audit_batch_size` rows, as with the procedures' p_audit_batch_size. The rest
+    are written at the end, or when an error escapes mid-run; then a FAILED
+    PROCESS_END row records how far the run got.
+    Returns the plan with `execution_status` and `error_message` columns added,
+    plus a summary dict.
+    """
+    audit = _AuditBuffer(backend, audit_batch_size)
+    steps = plan.to_dict('records')
+    statements = list(dict.fromkeys(step['sql_statement'] for step in steps))
+    steps_by_statement = {}
+    for step in steps:
+        steps_by_statement.setdefault(step['sql_statement'], []).append(step)
+    settled = {}
+
+    def settle(sql, outcome):
+        settled[sql] = outcome
+        if log_details:
+            status, error, finished = outcome
+            audit_status = 'SUCCESS' if status == 'DRY_RUN' else status
+            for step in steps_by_statement[sql]:
+                operation = DRY_RUN_OPERATIONS[step['action']] if dry_run else step['action']
+                audit.add(_audit_row(operation, sql, audit_status, error, step, finished))
+
+    started = time.perf_counter()
+    try:
+        if log_details:
+            audit.add(_audit_row(
+                'PROCESS_START', f"{label} executed with {len(plan)} planned grants, DryRun: {'Y' if dry_run else 'N'}",
+                'SUCCESS'
+            ))
+        if dry_run:
+            for sql in statements:
+                settle(sql, ('DRY_RUN', None, datetime.now()))
+        elif concurrency > 1 and len(statements) > 1:
+            _run_concurrent(backend, statements, settle, concurrency, timeout, progress=progress)
+        else:
+            _run_sequential(backend, statements, settle, progress)
+
+        outcomes = [settled[step['sql_statement']] for step in steps]
+        results = plan.assign(
+            execution_status=[outcome[0] for outcome in outcomes],
+            error_message=[outcome[1] for outcome in outcomes],
+        )
+        summary = {
+            'total': len(results),
+            'success': int(results['execution_status'].isin(['SUCCESS', 'DRY_RUN']).sum()),
+            'failed': int((results['execution_status'] == 'FAILED').sum()),
+            'statements': len(statements),
+            'dry_run': dry_run,
+            'seconds': time.perf_counter() - started,
+        }
+        if log_details:
+            audit.add(_audit_row(
+                'PROCESS_END', f"Total: {summary['total']}, Success: {summary['success']}, Failed: {summary['failed']}",
+                'SUCCESS'
+            ))
+    except BaseException as e:
+        if log_details:
+            audit.add(_audit_row(
+                'PROCESS_END', f"Aborted after {len(settled)} of {len(statements)} statements", 'FAILED', str(e)
+            ))
+        raise
+    finally:
+        audit.flush()
+    return results, summary
+
+
+def format_results(results, summary):
+    """Plain-text report in the style of the stored procedures' result message."""
+    lines = [
+        f"{RESULT_ICONS[row.execution_status]}: {row.sql_statement}"
+        + (f" - Error: {row.error_message}" if row.error_message else "")
+        for row in results.drop_duplicates('sql_statement').itertuples(index=False)
+    ]
+    lines += [
+        "",
+        "========================================",
+        "RBAC Reconciliation Summary:",
+        f"- Total Grants: {summary['total']}",
+        f"- Statements Executed: {summary['statements']}",
+        f"- Successful: {summary['success']}",
+        f"- Failed: {summary['failed']}",
+        f"- Dry Run Mode: {'Y' if summary['dry_run'] else 'N'}",
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,247 @@
+"""
+SnowGuard - Permission Index
+Array-backed index over the metadata for fast "who has what" lookups
+"""
+
+import numpy as np
+import pandas as pd
+
+from snowguard.planner import ALL_TABLE_PRIVILEGES, active_metadata_mask
+
+PRIVILEGE_BITS = {p: 1 << i for i, p in enumerate(ALL_TABLE_PRIVILEGES)}
+PRIVILEGE_BITS['ALL'] = (1 << len(ALL_TABLE_PRIVILEGES)) - 1
+
+NAME_COLUMNS = ['database_name', 'schema_name', 'table_name', 'role_name']
+
+# Same columns, in the same order, as audit.GET_TABLE_RBAC_STATUS
+TABLE_STATUS_COLUMNS = [
+    'role_name', 'permission_type', 'effective_start_date', 'effective_end_date',
+    'record_status_cd', 'record_create_ts', 'description'
+]
+
+
+def privilege_names(mask):
+    """Privilege names set in `mask`, in ALL_TABLE_PRIVILEGES order."""
+    return [p for p in ALL_TABLE_PRIVILEGES if mask & PRIVILEGE_BITS[p]]
+
+
+# Display text for every possible mask, so scans map masks to labels with one take()
+MASK_LABELS = np.array([', '.join(privilege_names(m)) for m in range(PRIVILEGE_BITS['ALL'] + 1)], dtype=object)
+
+
+def _intern(series):
+    # Case-insensitive ids, like Snowflake's unquoted identifiers; upper-case each
+    # distinct value once rather than every row
+    codes, uniques = pd.factorize(series.astype(str), use_na_sentinel=False)
+    folded, names = pd.factorize(pd.Index(uniques).str.upper())
+    return folded[codes].astype(np.int32), pd.Index(names)
+
+
+def _ranges(sorted_values, size):
+    # offsets[i]:offsets[i + 1] is the run of `i` in a sorted array of ids
+    return np.searchsorted(sorted_values, np.arange(size + 1))
+
+
+class PermissionIndex:
+    """
+    Interned, array-backed view of the metadata.
+
+    Each name column is interned to integer ids and every row becomes int32 codes.
+    Rows active on `as_of` are folded into one privilege bitmask per (object, role),
+    stored under a sorted, packed int64 key, so a point lookup is a few dict probes
+    for the names plus one binary search. Rows and (object, role) pairs are
+    also kept in object and role order so per-table and per-role scans are slices.
+    """
+
+    def __init__(self, metadata_df, as_of=None):
+        self.metadata = metadata_df.reset_index(drop=True)
+        self.names = {}
+        self.codes = {}
+        self._ids = {}
+        for col in NAME_COLUMNS:
+            self.codes[col], self.names[col] = _intern(self.metadata[col])
+            self._ids[col] = dict(zip(self.names[col], range(len(self.names[col]))))
+        self.sizes = {col: max(len(self.names[col]), 1) for col in NAME_COLUMNS}
+
+        role = self.codes['role_name']
+        obj = self._pack_object(
+            self.codes['database_name'], self.codes['schema_name'], self.codes['table_name']
+        )
+        self._row_objects = obj
+
+        # Privilege bitmask per (object, role) from the rows active today
+        active = active_metadata_mask(self.metadata, as_of).to_numpy()
+        bits = (
+            self.metadata['permission_type'].fillna('SELECT').astype(str).str.upper()
+            .map(PRIVILEGE_BITS).fillna(0).astype(np.uint8).to_numpy()
+        )
+        pairs = obj[active] * self.sizes['role_name'] + role[active]
+        order = np.argsort(pairs, kind='stable')
+        pairs, bits = pairs[order], bits[active][order]
+        starts = np.flatnonzero(np.r_[True, pairs[1:] != pairs[:-1]]) if len(pairs) else np.array([], dtype=np.int64)
+        self._pair_keys = pairs[starts]
+        self._pair_masks = np.bitwise_or.reduceat(bits, starts) if len(starts) else np.array([], dtype=np.uint8)
+
+        # Pairs in role order for by-role scans
+        pair_roles = self._pair_keys % self.sizes['role_name']
+        self._pairs_by_role = np.argsort(pair_roles, kind='stable')
+        self._pair_role_offsets = _ranges(pair_roles[self._pairs_by_role], self.sizes['role_name'])
+
+        # Rows in object and role order for by-table and by-role row scans
+        self._rows_by_object = np.argsort(obj, kind='stable')
+        self._sorted_row_objects = obj[self._rows_by_object]
+        self._rows_by_role = np.argsort(role, kind='stable')
+        self._row_role_offsets = _ranges(role[self._rows_by_role], self.sizes['role_name'])
+
+    def __len__(self):
+        return len(self.metadata)
+
+    def _pack_object(self, database, schema, table):
+        return (
+            (np.asarray(database, dtype=np.int64) * self.sizes['schema_name'] + schema)
+            * self.sizes['table_name'] + table
+        )
+
+    def _id(self, col, name):
+        return self._ids[col].get(str(name).upper())
+
+    def _object_key(self, database, schema, table):
+        ids = [self._id(col, name) for col, name in zip(NAME_COLUMNS[:3], (database, schema, table))]
+        if None in ids:
+            return None
+        database, schema, table = ids
+        return (database * self.sizes['schema_name'] + schema) * self.sizes['table_name'] + table
+
+    def _unpack_pairs(self, keys):
+        role = keys % self.sizes['role_name']
+        obj = keys // self.sizes['role_name']
+        table = obj % self.sizes['table_name']
+        obj //= self.sizes['table_name']
+        return obj // self.sizes['schema_name'], obj % self.sizes['schema_name'], table, role
+
+    def privilege_mask(self, database, schema, table, role):
+        """Bitmask of the privileges `role` holds on the table today (0 if none)."""
+        obj, role_id = self._object_key(database, schema, table), self._id('role_name', role)
+        if obj is None or role_id is None:
+            return 0
+        key = obj * self.sizes['role_name'] + role_id
+        i = int(np.searchsorted(self._pair_keys, key))
+        if i < len(self._pair_keys) and self._pair_keys[i] == key:
+            return int(self._pair_masks[i])
+        return 0
+
+    def privileges(self, database, schema, table, role):
+        """Privileges `role` holds on the table today, e.g. ['SELECT', 'INSERT']."""
+        return privilege_names(self.privilege_mask(database, schema, table, role))
+
+    def has_privilege(self, database, schema, table, role, privilege='SELECT'):
+        bits = PRIVILEGE_BITS[privilege.upper()]
+        return self.privilege_mask(database, schema, table, role) & bits == bits
+
+    def _pair_frame(self, positions):
+        keys = self._pair_keys[positions]
+        database, schema, table, role = self._unpack_pairs(keys)
+        return pd.DataFrame({
+            'database_name': self.names['database_name'].take(database),
+            'schema_name': self.names['schema_name'].take(schema),
+            'table_name': self.names['table_name'].take(table),
+            'role_name': self.names['role_name'].take(role),
+            'privileges': MASK_LABELS[self._pair_masks[positions]],
+        })
+
+    def roles_for_table(self, database, schema, table):
+        """Roles with active privileges on a table, one row per role."""
+        obj = self._object_key(database, schema, table)
+        if obj is None:
+            return self._pair_frame(np.array([], dtype=np.int64))
+        lo, hi = np.searchsorted(self._pair_keys, [obj * self.sizes['role_name'], (obj + 1) * self.sizes['role_name']])
+        return self._pair_frame(np.arange(lo, hi))
+
+    def tables_for_role(self, role):
+        """Tables a role has active privileges on, one row per table."""
+        role_id = self._id('role_name', role)
+        if role_id is None:
+            return self._pair_frame(np.array([], dtype=np.int64))
+        lo, hi = self._pair_role_offsets[role_id], self._pair_role_offsets[role_id + 1]
+        return self._pair_frame(np.sort(self._pairs_by_role[lo:hi]))
+
+    def rows_for_table(self, database, schema, table):
+        """Positions of every metadata row (any status) for a table."""
+        obj = self._object_key(database, schema, table)
+        if obj is None:
+            return np.array([], dtype=np.int64)
+        lo, hi = np.searchsorted(self._sorted_row_objects, [obj, obj + 1])
+        return self._rows_by_object[lo:hi]
+
+    def rows_for_roles(self, roles):
+        """Positions of every metadata row (any status) for the given roles."""
+        ids = [i for i in (self._id('role_name', r) for r in roles) if i is not None]
+        runs = [self._rows_by_role[self._row_role_offsets[i]:self._row_role_offsets[i + 1]] for i in ids]
+        return np.sort(np.concatenate(runs)) if runs else np.array([], dtype=np.int64)
+
+    def schemas(self, database):
+        """Schema names that appear under a database."""
+        db = self._id('database_name', database)
+        if db is None:
+            return []
+        codes = np.unique(self.codes['schema_name'][self.codes['database_name'] == db])
+        return sorted(self.names['schema_name'].take(codes))
+
+    def tables(self, database, schema):
+        """Table names that appear under a database and schema."""
+        db, sc = self._id('database_name', database), self._id('schema_name', schema)
+        if db is None or sc is None:
+            return []
+        in_schema = (self.codes['database_name'] == db) & (self.codes['schema_name'] == sc)
+        return sorted(self.names['table_name'].take(np.unique(self.codes['table_name'][in_schema])))
+
+    def get_table_rbac_status(self, database, schema, table):
+        """Python counterpart of audit.GET_TABLE_RBAC_STATUS: every metadata row for a table, by role."""
+        rows = self.metadata.iloc[self.rows_for_table(database, schema, table)]
+        return rows.reindex(columns=TABLE_STATUS_COLUMNS).sort_values('role_name', kind='stable', ignore_index=True)
+
+    def row_mask(self, roles=None, databases=None, statuses=None):
+        """Boolean row filter computed on the interned codes rather than the strings."""
+        mask = np.ones(len(self.metadata), dtype=bool)
+        for col, values in (('role_name', roles), ('database_name', databases)):
+            if values:
+                ids = [i for i in (self._id(col, v) for v in values) if i is not None]
+                mask &= np.isin(self.codes[col], ids)
+        if statuses:
+            mask &= self.metadata['record_status_cd'].isin(statuses).to_numpy()
+        return mask
+
+    def role_summary(self):
+        """Per role: metadata rows plus the distinct permission types, databases and schemas."""
+        role = self.codes['role_name']
+        counts = np.bincount(role, minlength=self.sizes['role_name'])
+
+        def distinct(values):
+            pairs = pd.DataFrame({'role': role, 'value': values}).drop_duplicates()
+            return pairs.groupby('role')['value'].agg(', '.join)
+
+        summary = pd.DataFrame({
+            'role_name': self.names['role_name'],
+            'total_permissions': counts[:len(self.names['role_name'])],
+        })
+        permission = self.metadata['permission_type'].fillna('SELECT').astype(str).to_numpy()
+        for col, values in (
+            ('permission_type', permission),
+            ('database_name', self.names['database_name'].take(self.codes['database_name'])),
+            ('schema_name', self.names['schema_name'].take(self.codes['schema_name'])),
+        ):
+            summary[col] = summary.index.map(distinct(values))
+        return summary.sort_values('role_name', ignore_index=True)
+
+    def database_summary(self):
+        """Per database and schema: metadata rows, distinct roles and distinct tables."""
+        codes = pd.DataFrame({col: self.codes[col] for col in NAME_COLUMNS})
+        grouped = codes.groupby(['database_name', 'schema_name'])
+        summary = pd.DataFrame({
+            'total_permissions': grouped.size(),
+            'unique_roles': grouped['role_name'].nunique(),
+            'unique_tables': grouped['table_name'].nunique(),
+        }).reset_index()
+        for col in ('database_name', 'schema_name'):
+            summary[col] = self.names[col].take(summary[col])
+        return summary.sort_values(['database_name', 'schema_name'], ignore_index=True)
@@ -0,0 +1,150 @@
+"""
+SnowGuard - Streaming CSV Ingestion
+Reads large permission CSVs in chunks, validates each chunk and spills the
+results to disk so memory stays bounded regardless of file size
+"""
+
+import os
+import tempfile
+import weakref
+from collections import Counter
+from dataclasses import dataclass, field
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from snowguard.validation import DATE_COLUMNS, validate_permission_rows
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Errors kept in memory for on-screen display; the full list lives in the error file
+ERROR_PREVIEW_ROWS = 1_000
+
+VALID_FILE = "valid_rows.parquet"
+ERROR_FILE = "validation_errors.csv"
+
+
+def _remove_spill_files(workdir):
+    # Only the files ingest writes, then the directory if that left it empty, so a
+    # caller-supplied workdir keeps anything else in it
+    for name in (VALID_FILE, ERROR_FILE):
+        path = os.path.join(workdir, name)
+        if os.path.exists(path):
+            os.remove(path)
+    if os.path.isdir(workdir) and not os.listdir(workdir):
+        os.rmdir(workdir)
+
+
+@dataclass
+class IngestResult:
+    """
+    Outcome of streaming a CSV through validation.
+
+    The spill files are removed by `cleanup()`, or otherwise when the result is
+    garbage collected (e.g. with the session that held it) or the process exits.
+    """
+    workdir: str
+    total_rows: int = 0
+    valid_rows: int = 0
+    error_rows: int = 0
+    valid_path: str = None
+    error_path: str = None
+    error_summary: Counter = field(default_factory=Counter)
+    error_preview: pd.DataFrame = None
+
+    def __post_init__(self):
+        self.valid_path = self.valid_path or os.path.join(self.workdir, VALID_FILE)
+        self.error_path = self.error_path or os.path.join(self.workdir, ERROR_FILE)
+        self._finalizer = weakref.finalize(self, _remove_spill_files, self.workdir)
+
+    def iter_valid_batches(self, batch_size=DEFAULT_CHUNK_SIZE):
+        """Yield the validated rows back as DataFrames of at most `batch_size` rows."""
+        if not self.valid_rows:
+            return
+        for batch in pq.ParquetFile(self.valid_path).iter_batches(batch_size=batch_size):
+            yield batch.to_pandas()
+
+    def read_valid_rows(self, limit=None):
+        """Load validated rows (or only the first `limit`) into a DataFrame."""
+        frames = []
+        remaining = limit
+        for batch in self.iter_valid_batches(batch_size=min(limit or DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_SIZE)):
+            if remaining is not None:
+                batch = batch.head(remaining)
+                remaining -= len(batch)
+            frames.append(batch)
+            if remaining == 0:
+                break
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def cleanup(self):
+        """Remove the spill files; safe to call more than once."""
+        self._finalizer()
+
+
+def _arrow_schema(columns):
+    # Fixed schema so every chunk appends to the same Parquet file, even when a
+    # chunk happens to have a column that is entirely empty
+    return pa.schema([
+        pa.field(col, pa.timestamp('ns') if col in DATE_COLUMNS else pa.string())
+        for col in columns
+    ])
+
+
+def ingest_permission_csv(file_obj, chunksize=DEFAULT_CHUNK_SIZE, progress=None, workdir=None):
+    """
+    Stream `file_obj` through `validate_permission_rows` one chunk at a time.
+
+    Valid rows are appended to a Parquet file and failing rows (with their CSV
+    line number and messages) to a CSV error file under `workdir`. `progress`,
+    if given, is called as `progress(fraction_read, rows_so_far)` after each chunk.
+    """
+    result = IngestResult(workdir=workdir or tempfile.mkdtemp(prefix="snowguard-ingest-"))
+    total_size = getattr(file_obj, 'size', None)
+    writer = None
+    previews = []
+
+    try:
+        # Read everything as text; validation decides what parses
+        for chunk in pd.read_csv(file_obj, chunksize=chunksize, dtype=str):
+            row_offset = 2 + result.total_rows
+            valid_df, error_report = validate_permission_rows(chunk, row_offset=row_offset)
+            result.total_rows += len(chunk)
+
+            if not valid_df.empty:
+                if writer is None:
+                    schema = _arrow_schema(valid_df.columns)
+                    writer = pq.ParquetWriter(result.valid_path, schema)
+                writer.write_table(pa.Table.from_pandas(valid_df, schema=schema, preserve_index=False))
+                result.valid_rows += len(valid_df)
+
+            if not error_report.empty:
+                failed = chunk.iloc[error_report['row'].to_numpy() - row_offset]
+                error_rows = pd.concat([error_report.reset_index(drop=True), failed.reset_index(drop=True)], axis=1)
+                error_rows.to_csv(result.error_path, mode='a', header=result.error_rows == 0, index=False)
+                result.error_rows += len(error_rows)
+                result.error_summary.update(
+                    message for errors in error_report['errors'] for message in errors.split(' | ')
+                )
+                if sum(len(p) for p in previews) < ERROR_PREVIEW_ROWS:
+                    previews.append(error_rows)
+
+            if progress is not None:
+                fraction = file_obj.tell() / total_size if total_size else 0.0
+                progress(min(fraction, 1.0), result.total_rows)
+    except BaseException:
+        # Nothing will reference a failed ingest, so its partial files go now
+        if writer is not None:
+            writer.close()
+            writer = None
+        result.cleanup()
+        raise
+    finally:
+        if writer is not None:
+            writer.close()
+
+    result.error_preview = (
+        pd.concat(previews, ignore_index=True).head(ERROR_PREVIEW_ROWS) if previews else pd.DataFrame()
+    )
+    return result
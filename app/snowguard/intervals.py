@@ -0,0 +1,160 @@
+"""
+SnowGuard - Effective Date Index
+Interval index over the metadata's effective date ranges for point-in-time queries
+"""
+
+import numpy as np
+import pandas as pd
+
+# Nodes with at most this many ranges are scanned instead of split further
+LEAF_SIZE = 64
+
+# Open-ended ranges (no effective_end_date) and missing start dates
+OPEN_END = np.iinfo(np.int64).max
+OPEN_START = np.iinfo(np.int64).min
+
+CHANGE_COLUMNS = ['change', 'change_date']
+
+
+def _day(value):
+    return pd.Timestamp(value).normalize().value
+
+
+def effective_days(series, missing):
+    """Dates as int64 day stamps (ns since epoch, midnight); missing dates become `missing`."""
+    # Day granularity, as vw_active_rbac_metadata compares dates with CURRENT_DATE()
+    days = pd.to_datetime(series, errors='coerce').dt.normalize()
+    return np.where(days.isna(), missing, days.to_numpy(dtype='datetime64[ns]').view(np.int64))
+
+
+class _Node:
+    __slots__ = ('center', 'by_start', 'starts', 'by_end', 'ends', 'left', 'right')
+
+
+def _build(positions, starts, ends):
+    if len(positions) <= LEAF_SIZE:
+        return positions
+    s, e = starts[positions], ends[positions]
+    endpoints = np.concatenate([s[s != OPEN_START], e[e != OPEN_END]])
+    if not len(endpoints):
+        return positions
+    center = int(np.median(endpoints))
+    left, right = positions[e < center], positions[s > center]
+    if len(left) == len(positions) or len(right) == len(positions):
+        return positions
+    node = _Node()
+    node.center = center
+    here = positions[(s <= center) & (e >= center)]
+    order = np.argsort(starts[here], kind='stable')
+    node.by_start, node.starts = here[order], starts[here][order]
+    order = np.argsort(-ends[here], kind='stable')
+    node.by_end, node.ends = here[order], ends[here][order]
+    node.left = _build(left, starts, ends)
+    node.right = _build(right, starts, ends)
+    return node
+
+
+class EffectiveDateIndex:
+    """
+    Interval index over the effective ranges of active-status metadata rows.
+
+    A row is in effect on day T when effective_start_date <= T <= effective_end_date,
+    with a missing start or end treated as open, matching vw_active_rbac_metadata.
+    Ranges live in a centered interval tree, so "what was in effect on T" visits
+    O(log n) nodes plus the rows it returns; start and end dates are also kept
+    sorted, so change windows, upcoming expiries and counts are binary searches.
+    """
+
+    def __init__(self, metadata_df):
+        self.metadata = metadata_df.reset_index(drop=True)
+        rows = np.flatnonzero((self.metadata['record_status_cd'] == 'A').to_numpy())
+        self._rows = rows
+        self._starts = effective_days(self.metadata['effective_start_date'], OPEN_START)[rows]
+        self._ends = effective_days(self.metadata['effective_end_date'], OPEN_END)[rows]
+        self._tree = _build(np.arange(len(rows)), self._starts, self._ends)
+
+        self._start_order = np.argsort(self._starts, kind='stable')
+        self._sorted_starts = self._starts[self._start_order]
+        self._end_order = np.argsort(self._ends, kind='stable')
+        self._sorted_ends = self._ends[self._end_order]
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _stab(self, day):
+        found = []
+        node = self._tree
+        while isinstance(node, _Node):
+            if day < node.center:
+                found.append(node.by_start[:np.searchsorted(node.starts, day, side='right')])
+                node = node.left
+            elif day > node.center:
+                # ends are stored descending, so those >= day form a prefix
+                found.append(node.by_end[:np.searchsorted(-node.ends, -day, side='right')])
+                node = node.right
+            else:
+                found.append(node.by_start)
+                node = None
+        if node is not None:
+            found.append(node[(self._starts[node] <= day) & (self._ends[node] >= day)])
+        return np.sort(np.concatenate(found)) if found else np.array([], dtype=np.int64)
+
+    def active_rows(self, as_of=None):
+        """Positions of the metadata rows in effect on `as_of` (default today)."""
+        return self._rows[self._stab(_day(as_of or pd.Timestamp.now()))]
+
+    def active_at(self, as_of=None):
+        """Metadata rows in effect on `as_of`, for point-in-time access reports."""
+        return self.metadata.iloc[self.active_rows(as_of)]
+
+    def active_count(self, as_of=None):
+        day = _day(as_of or pd.Timestamp.now())
+        started = np.searchsorted(self._sorted_starts, day, side='right')
+        ended = np.searchsorted(self._sorted_ends, day, side='left')
+        return int(started - ended)
+
+    def changes_between(self, start, end):
+        """
+        Rows that come into or go out of effect after day `start` up to day `end`.
+
+        START rows have effective_start_date in (start, end]; END rows were in effect
+        on `start` and ended before `end` (change_date is their last day in effect).
+        """
+        start, end = _day(start), _day(end)
+        lo, hi = np.searchsorted(self._sorted_starts, [start, end], side='right')
+        started = self._start_order[lo:hi]
+        lo, hi = np.searchsorted(self._sorted_ends, [start, end], side='left')
+        ended = self._end_order[lo:hi]
+        # A range that both starts and ends inside the window is reported twice
+        frames = [
+            self.metadata.iloc[self._rows[started]].assign(change='START', change_date=pd.to_datetime(self._starts[started])),
+            self.metadata.iloc[self._rows[ended]].assign(change='END', change_date=pd.to_datetime(self._ends[ended])),
+        ]
+        changes = pd.concat(frames)
+        return changes[CHANGE_COLUMNS + list(self.metadata.columns)].sort_values(
+            'change_date', kind='stable', ignore_index=True
+        )
+
+    def next_expiries(self, n=10, as_of=None):
+        """The `n` rows in effect on `as_of` whose effective_end_date comes soonest."""
+        day = _day(as_of or pd.Timestamp.now())
+        lo = np.searchsorted(self._sorted_ends, day, side='left')
+        picked = []
+        # Walk ends in order, skipping ranges that have not started yet
+        for i in range(lo, len(self._sorted_ends)):
+            if len(picked) == n or self._sorted_ends[i] == OPEN_END:
+                break
+            if self._starts[self._end_order[i]] <= day:
+                picked.append(self._end_order[i])
+        return self.metadata.iloc[self._rows[np.array(picked, dtype=np.int64)]].reset_index(drop=True)
+
+    def timeline(self, start, end, freq='D'):
+        """Number of rows in effect at each point of a date range, one binary search per point."""
+        points = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq=freq)
+        # Day stamps are ns like _day; date_range may come back in another unit (us under pandas 3)
+        values = points.as_unit('ns').asi8
+        counts = (
+            np.searchsorted(self._sorted_starts, values, side='right')
+            - np.searchsorted(self._sorted_ends, values, side='left')
+        )
+        return pd.DataFrame({'date': points, 'active_permissions': counts})
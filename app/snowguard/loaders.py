@@ -0,0 +1,377 @@
+"""
+SnowGuard - Data Loaders
+Queries that populate the dashboard's metadata and audit log frames, plus the
+embedded sample data used when Snowflake is not configured
+"""
+
+import re
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from snowguard.schema import AUDIT_LOG_SCHEMA, CATEGORY_MAX_RATIO, METADATA_SCHEMA, apply_schema, concat_frames
+from snowguard.spans import span
+
+# Data sourced from audit.T_RBAC_METADATA table (as per RBAC_Framework_Handbook.md)
+METADATA_QUERY = """
+    SELECT
+        rbac_id,
+        database_name,
+        schema_name,
+        table_name,
+        role_name,
+        permission_type,
+        effective_start_date,
+        effective_end_date,
+        description,
+        record_status_cd,
+        record_created_by,
+        record_create_ts,
+        record_updated_by,
+        record_updated_ts
+    FROM audit.T_RBAC_METADATA
+    -- Optionally add WHERE clauses to filter, e.g. active records only
+"""
+
+AUDIT_LOG_QUERY = """
+    SELECT
+        log_id,
+        operation_type,
+        database_name,
+        schema_name,
+        table_name,
+        role_name,
+        permission_type,
+        sql_statement,
+        execution_status,
+        error_message,
+        execution_time,
+        record_status_cd,
+        record_created_by,
+        record_create_ts,
+        record_updated_by,
+        record_updated_ts
+    FROM audit.T_RBAC_AUDIT_LOG
+    -- Optionally add WHERE clauses to limit rows for interactive use
+"""
+
+
+def _query_name(query):
+    # Span name for a query: the first table it reads
+    match = re.search(r"\bFROM\s+([\w.$]+)", query, re.IGNORECASE)
+    return match.group(1) if match else query.split(None, 1)[0]
+
+
+def fetch_dataframe(pool, query, params=None):
+    """Run a query on a pooled connection and return the result as a DataFrame."""
+    with span(_query_name(query), 'query') as timing, pool.connection() as cnx:
+        cur = cnx.cursor()
+        try:
+            # Use fetch_pandas_all to get a DataFrame directly (available in modern connector)
+            df = cur.execute(query, params).fetch_pandas_all()
+        finally:
+            cur.close()
+        timing.rows = len(df)
+    # Snowflake upper-cases unquoted identifiers; the app works with lower-case column names
+    df.columns = [c.lower() for c in df.columns]
+    return df
+
+
+def _project(table, columns):
+    # Lower-case names as fetch_dataframe does, then keep only `columns` (in that order)
+    table = table.rename_columns([c.lower() for c in table.column_names])
+    if columns is not None:
+        table = table.select([c for c in columns if c in table.column_names])
+    return table
+
+
+def _is_text(arrow_type):
+    return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+
+
+def iter_arrow_batches(pool, query, params=None, columns=None):
+    """
+    Yield the result of `query` as pyarrow Tables, one per result chunk.
+
+    Column names are lower-cased and each chunk is projected to `columns` as it
+    arrives, so dropped columns are released chunk by chunk. An empty result
+    yields one empty Table so callers still see the column names. The pooled
+    connection is held until the iterator is exhausted or closed.
+    """
+    with pool.connection() as cnx:
+        cur = cnx.cursor()
+        try:
+            cur.execute(query, params)
+            empty = True
+            for batch in cur.fetch_arrow_batches():
+                empty = False
+                yield _project(batch, columns)
+            if empty:
+                names = [d[0] for d in cur.description or []]
+                yield _project(pa.table({name: pa.array([], pa.null()) for name in names}), columns)
+        finally:
+            cur.close()
+
+
+def iter_frames(pool, query, params=None, columns=None):
+    """`iter_arrow_batches` as DataFrames, for exporters that write one chunk at a time."""
+    for batch in iter_arrow_batches(pool, query, params, columns):
+        yield batch.to_pandas()
+
+
+def fetch_arrow_table(pool, query, params=None, columns=None, dictionary_columns=()):
+    """
+    The whole result of `query` as one pyarrow Table, built from its chunks.
+
+    String columns named in `dictionary_columns` are dictionary-encoded chunk by
+    chunk, so repeated values are held once instead of once per row.
+    """
+    with span(_query_name(query), 'query') as timing:
+        batches = []
+        for batch in iter_arrow_batches(pool, query, params, columns):
+            for col in dictionary_columns:
+                if col in batch.column_names and _is_text(batch[col].type):
+                    batch = batch.set_column(batch.column_names.index(col), col, pc.dictionary_encode(batch[col]))
+            batches.append(batch)
+        table = pa.concat_tables(batches).unify_dictionaries()
+        timing.rows = table.num_rows
+    return table
+
+
+def fetch_frame(pool, query, params=None, schema=None, columns=None):
+    """
+    Run a query through Arrow batches and return a DataFrame.
+
+    Unlike `fetch_dataframe` the connector's result and the pandas copy are never
+    both held in full: chunks are collected as Arrow and handed to pandas with
+    `self_destruct`, which frees each column's buffers once converted (numeric and
+    timestamp columns are converted zero-copy where their layout allows). With a
+    `schema` the frame comes back as `apply_schema` would type it, its 'category'
+    columns built from dictionary-encoded chunks rather than per-row strings.
+    """
+    categories = [col for col, kind in (schema or {}).items() if kind == 'category']
+    table = fetch_arrow_table(pool, query, params, columns, dictionary_columns=categories)
+    with span(f"{_query_name(query)} to pandas", 'transform', rows=table.num_rows):
+        df = table.to_pandas(self_destruct=True, split_blocks=True)
+        del table
+        if schema is None:
+            return df
+        for col in categories:
+            if col not in df.columns or not isinstance(df[col].dtype, pd.CategoricalDtype):
+                continue
+            # Same rule and category order as apply_schema: too many distinct values costs more as categories
+            if len(df[col].cat.categories) > CATEGORY_MAX_RATIO * len(df):
+                df[col] = df[col].astype(df[col].cat.categories.dtype)
+            else:
+                df[col] = df[col].cat.set_categories(df[col].cat.categories.sort_values())
+        return apply_schema(df, schema)
+
+
+def load_metadata(pool):
+    """Load audit.T_RBAC_METADATA; raises if Snowflake returns nothing usable."""
+    df = fetch_frame(pool, METADATA_QUERY, schema=METADATA_SCHEMA)
+    if not isinstance(df, pd.DataFrame) or df.empty:
+        # Treat empty results as a failure to load from Snowflake so we fall back to sample data
+        raise ValueError("Empty metadata from Snowflake")
+    return df
+
+
+def load_audit_log(pool):
+    """Load audit.T_RBAC_AUDIT_LOG; raises if Snowflake returns nothing usable."""
+    audit_df = fetch_frame(pool, AUDIT_LOG_QUERY, schema=AUDIT_LOG_SCHEMA)
+    if not isinstance(audit_df, pd.DataFrame) or audit_df.empty:
+        # Treat empty results as a failure so we fall back to sample audit log
+        raise ValueError("Empty audit log from Snowflake")
+    return audit_df
+
+
+def audit_log_watermark(audit_df, previous=None):
+    """
+    Return the highest log_id and execution_time seen in `audit_df`.
+
+    When `previous` is given the result never moves backwards, so callers can
+    advance the watermark from just the newly fetched rows.
+    """
+    watermark = dict(previous or {'log_id': 0, 'execution_time': None})
+    if audit_df is None or audit_df.empty:
+        return watermark
+    max_log_id = pd.to_numeric(audit_df['log_id'], errors='coerce').max()
+    if pd.notna(max_log_id):
+        watermark['log_id'] = max(int(watermark['log_id']), int(max_log_id))
+    max_time = pd.to_datetime(audit_df['execution_time'], errors='coerce').max()
+    if pd.notna(max_time) and (watermark['execution_time'] is None or max_time > watermark['execution_time']):
+        watermark['execution_time'] = max_time
+    return watermark
+
+
+def load_audit_log_since(pool, watermark):
+    """Fetch only the audit rows written after `watermark` (may be empty)."""
+    # log_id is an IDENTITY column but Snowflake doesn't guarantee its order across
+    # concurrent writers, so late rows are also picked up by execution_time
+    predicate = "log_id > %(log_id)s"
+    params = {'log_id': int(watermark['log_id'])}
+    if watermark.get('execution_time') is not None:
+        predicate += " OR execution_time > %(execution_time)s"
+        params['execution_time'] = pd.Timestamp(watermark['execution_time']).to_pydatetime()
+    query = AUDIT_LOG_QUERY.replace(
+        "-- Optionally add WHERE clauses to limit rows for interactive use",
+        f"WHERE {predicate}"
+    )
+    return fetch_dataframe(pool, query, params)
+
+
+def append_audit_rows(audit_df, new_rows):
+    """Append freshly fetched audit rows, keeping the latest copy of any repeated log_id."""
+    if new_rows is None or new_rows.empty:
+        return audit_df
+    combined = concat_frames(audit_df, new_rows, AUDIT_LOG_SCHEMA)
+    return combined.drop_duplicates(subset='log_id', keep='last', ignore_index=True)
+
+
+# Columns shown on the Audit Log page (log_id is the keyset pagination cursor)
+AUDIT_PAGE_COLUMNS = [
+    'log_id', 'operation_type', 'database_name', 'schema_name', 'table_name', 'role_name',
+    'permission_type', 'execution_status', 'execution_time', 'record_created_by'
+]
+
+
+def build_audit_filter(operation_types=None, statuses=None, since=None):
+    """
+    Turn the Audit Log page filters into a parameterised WHERE clause.
+
+    operation_type/execution_status are the table's clustering keys, so these
+    predicates prune micro-partitions. The time filter is on execution_time, the
+    same column the in-memory (offline) path filters and the page displays.
+    """
+    clauses, params = [], {}
+    for column, values in (('operation_type', operation_types), ('execution_status', statuses)):
+        if values:
+            names = [f"{column}_{i}" for i in range(len(values))]
+            clauses.append(f"{column} IN (" + ", ".join(f"%({n})s" for n in names) + ")")
+            params.update(zip(names, values))
+    if since is not None:
+        clauses.append("execution_time >= %(since)s")
+        params['since'] = pd.Timestamp(since).to_pydatetime()
+    where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+    return where, params
+
+
+def build_audit_page_query(filters, before_log_id=None, page_size=50):
+    """
+    Query for one page of the audit trail, newest first.
+
+    Keyset pagination: the next page starts below the last log_id shown, so
+    Snowflake never has to skip over earlier pages. One extra row is fetched to
+    tell whether an older page exists. `page_size=None` returns every match.
+    """
+    where, params = build_audit_filter(**filters)
+    if before_log_id is not None:
+        where += (" AND " if where else " WHERE ") + "log_id < %(before_log_id)s"
+        params['before_log_id'] = int(before_log_id)
+    query = f"SELECT {', '.join(AUDIT_PAGE_COLUMNS)} FROM audit.adw_rbac_audit_log{where} ORDER BY log_id DESC"
+    if page_size is not None:
+        query += f" LIMIT {int(page_size) + 1}"
+    return query, params
+
+
+def load_audit_page(pool, filters, before_log_id=None, page_size=50):
+    """Return (page DataFrame, has_older_page) for the Audit Log page."""
+    query, params = build_audit_page_query(filters, before_log_id, page_size)
+    page_df = fetch_dataframe(pool, query, params)
+    if page_size is None or len(page_df) <= page_size:
+        return page_df, False
+    return page_df.head(page_size), True
+
+
+def iter_audit_export(pool, filters):
+    """Every audit row matching the filters, newest first, as DataFrame chunks without log_id."""
+    query, params = build_audit_page_query(filters, page_size=None)
+    return iter_frames(pool, query, params, columns=[c for c in AUDIT_PAGE_COLUMNS if c != 'log_id'])
+
+
+def load_audit_status_counts(pool, filters):
+    """Count matching audit rows per execution_status without fetching them."""
+    where, params = build_audit_filter(**filters)
+    query = (
+        "SELECT execution_status, COUNT(*) AS operation_count "
+        f"FROM audit.adw_rbac_audit_log{where} GROUP BY execution_status"
+    )
+    counts_df = fetch_dataframe(pool, query, params)
+    return dict(zip(counts_df['execution_status'], counts_df['operation_count'].astype(int)))
+
+
+def load_audit_filter_options(pool):
+    """Distinct operation types and statuses for the Audit Log filter widgets."""
+    options = fetch_dataframe(
+        pool,
+        "SELECT DISTINCT operation_type, execution_status FROM audit.adw_rbac_audit_log"
+    )
+    return sorted(options['operation_type'].dropna().unique()), sorted(options['execution_status'].dropna().unique())
+
+
+def submit_loads(executor, pool, loaders):
+    """
+    Start every loader at once on `executor` and return {name: Future}.
+
+    `loaders` maps a name to a callable taking the connection pool. The loaders
+    must not touch Streamlit APIs since they run off the script thread.
+    """
+    return {name: executor.submit(loader, pool) for name, loader in loaders.items()}
+
+
+def sample_metadata():
+    """Embedded sample metadata for local/demo use."""
+    return pd.DataFrame({
+        'rbac_id': [1, 2, 3, 4, 5],
+        'database_name': ['SALES_PROD', 'SALES_PROD', 'SALES_PROD', 'SALES_DEV', 'SALES_DEV'],
+        'schema_name': ['ANALYTICS', 'ANALYTICS', 'REPORTS', 'ANALYTICS', 'REPORTS'],
+        'table_name': ['T_DIM_CUSTOMER', 'T_FACT_SALES', 'T_SALES_SUMMARY', 'T_DIM_PRODUCT', 'T_INVENTORY_ANALYSIS'],
+        'role_name': ['ANALYST_ROLE', 'ANALYST_ROLE', 'MANAGER_ROLE', 'ENGINEER_ROLE', 'ENGINEER_ROLE'],
+        'permission_type': ['SELECT', 'SELECT', 'SELECT', 'ALL', 'ALL'],
+        'effective_start_date': [datetime(2025, 1, 1), datetime(2025, 1, 1), datetime(2025, 2, 15), datetime(2025, 3, 1), datetime(2025, 3, 1)],
+        'effective_end_date': [None, None, datetime(2025, 12, 31), None, None],
+        'description': [
+            'Read access for analysts to customer dimension',
+            'Read access to sales fact data for analytics team',
+            'Sales summary reports access for managers until year-end',
+            'Full access for engineers product dimension',
+            'Full access for engineers inventory analytics'
+        ],
+        'record_status_cd': ['A', 'A', 'A', 'A', 'A'],
+        'record_created_by': ['ADMIN_USER', 'ADMIN_USER', 'ADMIN_USER', 'ADMIN_USER', 'ADMIN_USER'],
+        'record_create_ts': [datetime.now(), datetime.now(), datetime.now(), datetime.now(), datetime.now()],
+        'record_updated_by': ['ADMIN_USER', 'ADMIN_USER', 'ADMIN_USER', 'ADMIN_USER', 'ADMIN_USER'],
+        'record_updated_ts': [datetime.now(), datetime.now(), datetime.now(), datetime.now(), datetime.now()]
+    })
+
+
+def sample_audit_log():
+    """Embedded sample audit log for local/demo use."""
+    return pd.DataFrame({
+        'log_id': [1, 2, 3, 4],
+        'operation_type': ['GRANT', 'GRANT', 'DRY_RUN', 'REVOKE'],
+        'database_name': ['SALES_PROD', 'SALES_PROD', 'SALES_DEV', 'SALES_PROD'],
+        'schema_name': ['ANALYTICS', 'REPORTS', 'ANALYTICS', 'ANALYTICS'],
+        'table_name': ['T_DIM_CUSTOMER', 'T_SALES_SUMMARY', 'T_DIM_PRODUCT', 'T_ORDER_HISTORY'],
+        'role_name': ['ANALYST_ROLE', 'MANAGER_ROLE', 'ENGINEER_ROLE', 'LEGACY_ROLE'],
+        'permission_type': ['SELECT', 'SELECT', 'ALL', 'SELECT'],
+        'sql_statement': [
+            'GRANT SELECT ON TABLE SALES_PROD.ANALYTICS.T_DIM_CUSTOMER TO ROLE ANALYST_ROLE',
+            'GRANT SELECT ON TABLE SALES_PROD.REPORTS.T_SALES_SUMMARY TO ROLE MANAGER_ROLE',
+            'GRANT ALL ON TABLE SALES_DEV.ANALYTICS.T_DIM_PRODUCT TO ROLE ENGINEER_ROLE',
+            'REVOKE SELECT ON TABLE SALES_PROD.ANALYTICS.T_ORDER_HISTORY FROM ROLE LEGACY_ROLE'
+        ],
+        'execution_status': ['SUCCESS', 'SUCCESS', 'SUCCESS', 'SUCCESS'],
+        'error_message': [None, None, None, None],
+        'execution_time': [datetime.now() - timedelta(days=5), datetime.now() - timedelta(days=3),
+                           datetime.now() - timedelta(days=1), datetime.now() - timedelta(hours=2)],
+        'record_status_cd': ['A', 'A', 'A', 'A'],
+        'record_created_by': ['ADMIN_USER', 'ADMIN_USER', 'ADMIN_USER', 'ADMIN_USER'],
+        'record_create_ts': [datetime.now() - timedelta(days=5), datetime.now() - timedelta(days=3),
+                             datetime.now() - timedelta(days=1), datetime.now() - timedelta(hours=2)],
+        'record_updated_by': ['ADMIN_USER', 'ADMIN_USER', 'ADMIN_USER', 'ADMIN_USER'],
+        'record_updated_ts': [datetime.now() - timedelta(days=5), datetime.now() - timedelta(days=3),
+                              datetime.now() - timedelta(days=1), datetime.now() - timedelta(hours=2)]
+    })
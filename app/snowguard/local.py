@@ -0,0 +1,583 @@
+"""
+SnowGuard - Local Snowflake Stand-in
+SQLite database laid out like the RBAC schema, answering the connector calls the
+app makes so the loaders, bulk load, grant engine and dashboard can run at scale
+without a Snowflake account
+"""
+
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from snowguard.backends import AUDIT_COLUMNS, STATEMENT_PATTERN, SnowflakeBackend
+from snowguard.bulk_load import METADATA_COLUMNS
+from snowguard.config import config_value
+from snowguard.connection import ConnectionPool
+from snowguard.planner import ALL_TABLE_PRIVILEGES, GRANT_KEY, TABLE_KEY
+
+LOCAL_USER = 'LOCAL_USER'
+
+# Same tables and indexes as database/INSTALL_RBAC_METADATA.ddl, in SQLite types.
+# Snowflake does not enforce the unique index, so it is a plain one here; audit
+# name columns are nullable since PROCESS_START/END rows carry no object.
+SCHEMA_DDL = """
+CREATE TABLE IF NOT EXISTS audit.adw_rbac_metadata (
+    rbac_id                 INTEGER PRIMARY KEY AUTOINCREMENT,
+    database_name           TEXT NOT NULL,
+    schema_name             TEXT NOT NULL,
+    table_name              TEXT NOT NULL,
+    role_name               TEXT NOT NULL,
+    permission_type         TEXT NOT NULL DEFAULT 'SELECT',
+    effective_start_date    TEXT DEFAULT (date('now', 'localtime')),
+    effective_end_date      TEXT,
+    description             TEXT,
+    record_status_cd        TEXT NOT NULL DEFAULT 'A',
+    record_created_by       TEXT NOT NULL,
+    record_create_ts        TEXT NOT NULL,
+    record_updated_by       TEXT NOT NULL,
+    record_updated_ts       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS audit.idx_adw_rbac_metadata_uk
+ON adw_rbac_metadata(database_name, schema_name, table_name, role_name, permission_type, record_status_cd);
+CREATE INDEX IF NOT EXISTS audit.idx_adw_rbac_metadata_role ON adw_rbac_metadata(role_name, record_status_cd);
+
+CREATE TABLE IF NOT EXISTS audit.adw_rbac_audit_log (
+    log_id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    operation_type          TEXT NOT NULL,
+    database_name           TEXT,
+    schema_name             TEXT,
+    table_name              TEXT,
+    role_name               TEXT,
+    permission_type         TEXT,
+    sql_statement           TEXT,
+    execution_status        TEXT NOT NULL DEFAULT 'PENDING',
+    error_message           TEXT,
+    execution_time          TEXT,
+    record_status_cd        TEXT NOT NULL DEFAULT 'A',
+    record_created_by       TEXT NOT NULL,
+    record_create_ts        TEXT NOT NULL,
+    record_updated_by       TEXT NOT NULL,
+    record_updated_ts       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS audit.idx_adw_rbac_audit_status ON adw_rbac_audit_log(execution_status, record_create_ts);
+CREATE INDEX IF NOT EXISTS audit.idx_adw_rbac_audit_timestamp ON adw_rbac_audit_log(record_create_ts);
+
+-- The dashboard loaders read these names
+CREATE VIEW IF NOT EXISTS audit.T_RBAC_METADATA AS SELECT * FROM adw_rbac_metadata;
+CREATE VIEW IF NOT EXISTS audit.T_RBAC_AUDIT_LOG AS SELECT * FROM adw_rbac_audit_log;
+
+-- Account state: the tables that exist and the privileges granted on them
+CREATE TABLE IF NOT EXISTS audit.information_schema_tables (
+    table_catalog TEXT, table_schema TEXT, table_name TEXT, table_type TEXT DEFAULT 'BASE TABLE',
+    PRIMARY KEY (table_catalog, table_schema, table_name)
+);
+CREATE TABLE IF NOT EXISTS audit.grants (
+    database_name TEXT, schema_name TEXT, table_name TEXT, role_name TEXT, privilege TEXT,
+    created_on TEXT,
+    PRIMARY KEY (database_name, schema_name, table_name, role_name, privilege)
+);
+CREATE TABLE IF NOT EXISTS audit.future_grants (
+    database_name TEXT, schema_name TEXT, role_name TEXT, privilege TEXT,
+    PRIMARY KEY (database_name, schema_name, role_name, privilege)
+);
+CREATE VIEW IF NOT EXISTS audit.grants_to_roles AS
+SELECT database_name AS table_catalog, schema_name AS table_schema, table_name AS name,
+       'TABLE' AS granted_on, 'ROLE' AS granted_to, role_name AS grantee_name, privilege,
+       created_on, NULL AS deleted_on
+FROM grants;
+
+-- Same table as database/adw_rbac_scheduler_state.ddl
+CREATE TABLE IF NOT EXISTS audit.adw_rbac_scheduler_state (
+    scheduler_name          TEXT NOT NULL PRIMARY KEY,
+    last_tick_date          TEXT NOT NULL,
+    record_updated_by       TEXT NOT NULL,
+    record_updated_ts       TEXT NOT NULL
+);
+
+-- INFORMATION_SCHEMA.QUERY_HISTORY for statements run with a query id; bytes_scanned
+-- is estimated from the result size since SQLite does not report it
+CREATE TABLE IF NOT EXISTS audit.query_history (
+    query_id TEXT PRIMARY KEY, query_text TEXT, start_time TEXT, end_time TEXT, total_elapsed_time REAL,
+    rows_produced INTEGER, bytes_scanned INTEGER, warehouse_name TEXT, execution_status TEXT, error_message TEXT
+);
+
+-- Same table and view as database/adw_rbac_query_metrics.ddl
+CREATE TABLE IF NOT EXISTS audit.adw_rbac_query_metrics (
+    query_id                TEXT NOT NULL,
+    fingerprint             TEXT NOT NULL,
+    query_kind              TEXT,
+    query_text              TEXT,
+    page                    TEXT,
+    interaction             TEXT,
+    started_at              TEXT NOT NULL,
+    elapsed_ms              REAL,
+    server_elapsed_ms       REAL,
+    rows_produced           INTEGER,
+    bytes_scanned           INTEGER,
+    warehouse_name          TEXT,
+    error_message           TEXT,
+    record_created_by       TEXT NOT NULL,
+    record_create_ts        TEXT NOT NULL
+);
+CREATE VIEW IF NOT EXISTS audit.vw_slowest_queries AS
+SELECT fingerprint, MAX(query_kind) AS query_kind, MAX(query_text) AS query_text,
+       group_concat(DISTINCT page) AS pages, COUNT(*) AS executions, SUM(elapsed_ms) AS total_elapsed_ms,
+       AVG(elapsed_ms) AS avg_elapsed_ms, MAX(elapsed_ms) AS max_elapsed_ms,
+       SUM(bytes_scanned) AS total_bytes_scanned, SUM(rows_produced) AS total_rows, MAX(started_at) AS last_seen
+FROM adw_rbac_query_metrics
+GROUP BY fingerprint
+ORDER BY total_elapsed_ms DESC;
+"""
+
+# Snowflake spellings rewritten into SQLite before a statement runs
+REWRITES = [
+    (re.compile(r"%\((\w+)\)s"), r":\1"),
+    (re.compile(r"\bCURRENT_TIMESTAMP\(\)", re.IGNORECASE), "strftime('%Y-%m-%d %H:%M:%f000', 'now', 'localtime')"),
+    (re.compile(r"\bCURRENT_DATE\(\)", re.IGNORECASE), "date('now', 'localtime')"),
+    (re.compile(r"\bCURRENT_USER\(\)", re.IGNORECASE), f"'{LOCAL_USER}'"),
+    (re.compile(r"\bsnowflake\.account_usage\.grants_to_roles\b", re.IGNORECASE), "audit.grants_to_roles"),
+    (re.compile(r"\b(\w+)\.information_schema\.tables\b", re.IGNORECASE),
+     r"(SELECT * FROM audit.information_schema_tables WHERE table_catalog = UPPER('\1'))"),
+    (re.compile(r"\bTABLE\(\s*information_schema\.query_history\w*\([^)]*\)\s*\)", re.IGNORECASE),
+     "audit.query_history"),
+]
+
+SHOW_GRANTS_PATTERN = re.compile(r"^SHOW\s+GRANTS\s+TO\s+ROLE\s+(\S+?);?$", re.IGNORECASE)
+SHOW_FUTURE_GRANTS_PATTERN = re.compile(r"^SHOW\s+FUTURE\s+GRANTS\s+IN\s+SCHEMA\s+([^.\s]+)\.(\S+?);?$", re.IGNORECASE)
+CANCEL_PATTERN = re.compile(r"^SELECT\s+SYSTEM\$CANCEL_QUERY\(", re.IGNORECASE)
+
+SHOW_GRANTS_QUERY = """
+    SELECT created_on, privilege, 'TABLE' AS granted_on,
+           database_name || '.' || schema_name || '.' || table_name AS name,
+           'ROLE' AS granted_to, role_name AS grantee_name, 'false' AS grant_option, 'SYSADMIN' AS granted_by
+    FROM audit.grants WHERE role_name = :role ORDER BY name, privilege
+"""
+
+SHOW_FUTURE_GRANTS_QUERY = """
+    SELECT NULL AS created_on, privilege, 'TABLE' AS grant_on,
+           database_name || '.' || schema_name || '.<TABLE>' AS name,
+           'ROLE' AS grant_to, role_name AS grantee_name, 'false' AS grant_option
+    FROM audit.future_grants WHERE database_name = :database AND schema_name = :schema
+    ORDER BY role_name, privilege
+"""
+
+# Columns fetch_pandas_all returns as datetime64, as the connector does for DATE/TIMESTAMP
+TEMPORAL_COLUMNS = {
+    'effective_start_date', 'effective_end_date', 'execution_time', 'record_create_ts', 'record_updated_ts',
+    'created_on', 'deleted_on', 'start_time', 'end_time', 'started_at', 'last_tick_date',
+}
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+DATE_COLUMNS = ('effective_start_date', 'effective_end_date')
+
+LOCAL_WAREHOUSE = 'LOCAL_WH'
+
+# Rows per Table from fetch_arrow_batches; the connector's chunks vary in size, this stands in for them
+ARROW_CHUNK_ROWS = 10_000
+
+# Result rows sampled to estimate bytes_scanned for QUERY_HISTORY
+SIZE_SAMPLE = 100
+
+
+def _bind(value):
+    # sqlite3 has no default adapters for datetimes on 3.12+; store ISO text that sorts correctly
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _bind_params(params):
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return {k: _bind(v) for k, v in params.items()}
+    return [_bind(v) for v in params]
+
+
+def _result_bytes(rows):
+    # Average text width of a sample of rows, times the row count
+    if not rows:
+        return 0
+    sample = rows[:SIZE_SAMPLE]
+    width = sum(len(str(value)) for row in sample for value in row) / len(sample)
+    return int(width * len(rows))
+
+
+def _rows(frame, columns):
+    """Plain-Python rows of `frame[columns]` ready for executemany."""
+    frame = frame.reindex(columns=columns)
+    values = []
+    for col in columns:
+        column = frame[col]
+        if pd.api.types.is_datetime64_any_dtype(column) or col in TEMPORAL_COLUMNS:
+            stamps = pd.to_datetime(column, errors='coerce').to_numpy(dtype='datetime64[ns]')
+            # Same text _bind produces, formatted in one pass rather than per value
+            text = np.datetime_as_string(stamps, unit='D' if col in DATE_COLUMNS else 'us')
+            text = np.char.replace(text, 'T', ' ').astype(object)
+            text[np.isnat(stamps)] = None
+            values.append(text.tolist())
+        else:
+            # astype(object) boxes numpy scalars as Python ints/floats and categories as their values
+            column = column.astype(object)
+            values.append(column.where(column.notna(), None).tolist())
+    return list(zip(*values))
+
+
+class LocalQueryError(RuntimeError):
+    """A statement the stand-in rejected, with the query id Snowflake would report."""
+
+    def __init__(self, message, sfqid=None):
+        super().__init__(message)
+        self.sfqid = sfqid
+
+
+class LocalAccount:
+    """
+    One SQLite database standing in for a Snowflake account.
+
+    Holds the audit.adw_rbac_metadata and audit.adw_rbac_audit_log tables, a table
+    catalog and the current table grants. GRANT and REVOKE statements update the
+    grants, which the ACCOUNT_USAGE, INFORMATION_SCHEMA and SHOW GRANTS queries of
+    SnowflakeBackend read back. Every statement waits `latency` seconds (plus up to
+    `jitter`) outside the database lock, so concurrent callers overlap the way
+    warehouse queries do. `path` is ':memory:' or a SQLite file kept between runs.
+    """
+
+    def __init__(self, path=':memory:', latency=0.0, jitter=0.0, seed=None):
+        self.path = path
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(':memory:', check_same_thread=False, isolation_level=None)
+        self._db.execute("ATTACH DATABASE ? AS audit", (path,))
+        self._db.executescript(SCHEMA_DDL)
+        self._async = {}
+        self.statements = 0
+
+    def connect(self, **_):
+        """A connector-style connection; usable as ConnectionPool's connect_fn."""
+        return LocalConnection(self)
+
+    def pool(self, max_size=4, query_log=None):
+        # No stage to PUT to: bulk loads hand their frames to write_frame instead
+        return ConnectionPool({}, max_size=max_size, connect_fn=self.connect, query_log=query_log,
+                              copy_fn=self.write_frame)
+
+    def _wait(self):
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _run(self, statement, params=None, many=False, query_id=None, started=None):
+        """
+        Run one statement; returns (description, rows, rowcount). With a `query_id`
+        the statement is added to QUERY_HISTORY as having run since `started`.
+        """
+        with self._lock:
+            try:
+                result = self._execute(statement, params, many)
+            except LocalQueryError as e:
+                self._record_history(query_id, statement, started, error=e)
+                raise
+            self._record_history(query_id, statement, started, result)
+            return result
+
+    def _record_history(self, query_id, statement, started, result=None, error=None):
+        if query_id is None:
+            return
+        ended = datetime.now()
+        started = started or ended
+        description, rows, rowcount = result or (None, [], 0)
+        self._db.execute(
+            "INSERT OR REPLACE INTO audit.query_history VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (query_id, statement, started.strftime(TIMESTAMP_FORMAT), ended.strftime(TIMESTAMP_FORMAT),
+             (ended - started).total_seconds() * 1000, max(rowcount, 0), _result_bytes(rows) if description else 0,
+             LOCAL_WAREHOUSE, 'FAIL' if error else 'SUCCESS', str(error) if error else None)
+        )
+
+    def _execute(self, statement, params, many):
+        self.statements += 1
+        stripped = statement.strip()
+        match = STATEMENT_PATTERN.match(stripped)
+        if match:
+            return None, [], self._apply_grant(*match.groups())
+        match = SHOW_GRANTS_PATTERN.match(stripped)
+        future = SHOW_FUTURE_GRANTS_PATTERN.match(stripped)
+        if match:
+            statement, params = SHOW_GRANTS_QUERY, {'role': match.group(1).upper()}
+        elif future:
+            database, schema = future.groups()
+            statement, params = SHOW_FUTURE_GRANTS_QUERY, {'database': database.upper(), 'schema': schema.upper()}
+        elif CANCEL_PATTERN.match(stripped):
+            self._async.pop(next(iter(params.values())), None)
+            return [('status', None, None, None, None, None, None)], [('Cancelled',)], 1
+
+        for pattern, replacement in REWRITES:
+            statement = pattern.sub(replacement, statement)
+        try:
+            if many:
+                cur = self._db.executemany(statement, [_bind_params(p) for p in params])
+            else:
+                cur = self._db.execute(statement, _bind_params(params))
+        except sqlite3.Error as e:
+            raise LocalQueryError(f"SQL compilation error: {e}") from e
+        rows = cur.fetchall() if cur.description else []
+        return cur.description, rows, len(rows) if cur.description else cur.rowcount
+
+    def _apply_grant(self, action, privileges, target, name, role):
+        privileges = [p.strip().upper() for p in privileges.split(',')]
+        if 'ALL' in privileges:
+            privileges = ALL_TABLE_PRIVILEGES
+        parts = [p.strip('"').upper() for p in name.split('.')]
+        target = ' '.join(target.upper().split())
+        role = role.upper()
+        grant = action.upper() == 'GRANT'
+
+        if target == 'FUTURE TABLES IN SCHEMA':
+            sql = ("INSERT OR IGNORE INTO audit.future_grants VALUES (?, ?, ?, ?)" if grant else
+                   "DELETE FROM audit.future_grants WHERE database_name = ? AND schema_name = ? "
+                   "AND role_name = ? AND privilege = ?")
+            return self._db.executemany(sql, [(parts[0], parts[1], role, p) for p in privileges]).rowcount
+
+        if target == 'TABLE':
+            exists = self._db.execute(
+                "SELECT 1 FROM audit.information_schema_tables "
+                "WHERE table_catalog = ? AND table_schema = ? AND table_name = ?", parts
+            ).fetchone()
+            if not exists:
+                raise LocalQueryError(f"SQL compilation error: Table '{name}' does not exist or not authorized.")
+            scope, scope_params = "table_catalog = ? AND table_schema = ? AND table_name = ?", parts
+        else:
+            scope, scope_params = "table_catalog = ? AND table_schema = ?", parts[:2]
+
+        changed = 0
+        for privilege in privileges:
+            if grant:
+                changed += self._db.execute(
+                    "INSERT OR IGNORE INTO audit.grants SELECT table_catalog, table_schema, table_name, ?, ?, ? "
+                    f"FROM audit.information_schema_tables WHERE {scope}",
+                    [role, privilege, datetime.now().strftime(TIMESTAMP_FORMAT)] + list(scope_params)
+                ).rowcount
+            else:
+                changed += self._db.execute(
+                    "DELETE FROM audit.grants WHERE role_name = ? AND privilege = ? AND "
+                    "(database_name, schema_name, table_name) IN "
+                    f"(SELECT table_catalog, table_schema, table_name FROM audit.information_schema_tables WHERE {scope})",
+                    [role, privilege] + list(scope_params)
+                ).rowcount
+        return changed
+
+    def submit(self, statement, params=None):
+        """Start `statement` asynchronously; it runs once polled after its latency has passed."""
+        query_id = str(uuid.uuid4())
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        with self._lock:
+            self._async[query_id] = {'statement': statement, 'params': params, 'started': datetime.now(),
+                                     'ready_at': time.monotonic() + delay, 'status': 'RUNNING'}
+        return query_id
+
+    def status(self, query_id):
+        """'RUNNING', 'SUCCESS' or 'ABORTED'; raises the statement's error if it failed."""
+        with self._lock:
+            query = self._async.get(query_id)
+            if query is None:
+                return 'ABORTED'
+            if query['status'] == 'RUNNING' and time.monotonic() >= query['ready_at']:
+                try:
+                    self._run(query['statement'], query['params'], query_id=query_id, started=query['started'])
+                    query['status'] = 'SUCCESS'
+                except LocalQueryError as e:
+                    query['status'], query['error'] = 'FAILED_WITH_ERROR', e
+            if query['status'] == 'FAILED_WITH_ERROR':
+                raise LocalQueryError(str(query['error']), sfqid=query_id)
+            return query['status']
+
+    def _insert(self, table, frame, columns):
+        placeholders = ', '.join('?' for _ in columns)
+        with self._lock:
+            self._db.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", _rows(frame, columns)
+            )
+
+    def write_frame(self, frame, table):
+        """Append a DataFrame to one of the audit tables (the stand-in for PUT + COPY)."""
+        self._insert(table, frame, list(frame.columns))
+        return len(frame)
+
+    def is_empty(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM audit.adw_rbac_metadata").fetchone()[0] == 0
+
+    def seed(self, metadata, audit_log=None, grants=None, catalog=None):
+        """
+        Load existing state: metadata rows (keeping their rbac_id), audit rows,
+        GRANT_KEY grant rows and TABLE_KEY catalog rows. The catalog defaults to
+        every table the metadata names, like FixtureBackend.
+        """
+        catalog = (metadata if catalog is None else catalog)[TABLE_KEY].astype(str)
+        catalog = catalog.apply(lambda col: col.str.upper()).drop_duplicates()
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._insert('audit.adw_rbac_metadata', metadata, METADATA_COLUMNS)
+                if audit_log is not None:
+                    self._insert('audit.adw_rbac_audit_log', audit_log, ['log_id'] + AUDIT_COLUMNS + [
+                        'record_status_cd', 'record_created_by', 'record_create_ts', 'record_updated_by',
+                        'record_updated_ts'
+                    ])
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO audit.information_schema_tables (table_catalog, table_schema, table_name) "
+                    "VALUES (?, ?, ?)", catalog.itertuples(index=False, name=None)
+                )
+                if grants is not None:
+                    upper = grants[GRANT_KEY].astype(str).apply(lambda col: col.str.upper())
+                    self._db.executemany(
+                        "INSERT OR IGNORE INTO audit.grants (database_name, schema_name, table_name, role_name, "
+                        "privilege) VALUES (?, ?, ?, ?, ?)", upper.itertuples(index=False, name=None)
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return self
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class LocalCursor:
+    """The subset of SnowflakeCursor the app uses."""
+
+    def __init__(self, account):
+        self.account = account
+        self.description = None
+        self.rowcount = -1
+        self.sfqid = None
+        self._rows = []
+
+    def _finish(self, result):
+        self.description, self._rows, self.rowcount = result
+        return self
+
+    def execute(self, statement, params=None):
+        self.sfqid = str(uuid.uuid4())
+        started = datetime.now()
+        self.account._wait()
+        try:
+            return self._finish(self.account._run(statement, params, query_id=self.sfqid, started=started))
+        except LocalQueryError as e:
+            e.sfqid = self.sfqid
+            raise
+
+    def executemany(self, statement, seq_of_params):
+        # The connector sends a multi-row INSERT as one statement, so latency is paid once
+        self.sfqid = str(uuid.uuid4())
+        started = datetime.now()
+        self.account._wait()
+        return self._finish(
+            self.account._run(statement, list(seq_of_params), many=True, query_id=self.sfqid, started=started)
+        )
+
+    def execute_async(self, statement, params=None):
+        self.sfqid = self.account.submit(statement, params)
+        return {'queryId': self.sfqid}
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def fetch_pandas_all(self):
+        columns = [d[0].upper() for d in self.description or []]
+        df = pd.DataFrame(self._rows, columns=columns)
+        for col in columns:
+            if col.lower() in TEMPORAL_COLUMNS:
+                df[col] = pd.to_datetime(df[col], format='ISO8601', errors='coerce')
+        return df
+
+    def fetch_arrow_batches(self):
+        # Column types come from the whole result, so every chunk shares one schema as the connector's do
+        if not self._rows:
+            return
+        table = pa.Table.from_pandas(self.fetch_pandas_all(), preserve_index=False)
+        for batch in table.to_batches(max_chunksize=ARROW_CHUNK_ROWS):
+            yield pa.Table.from_batches([batch])
+
+    def close(self):
+        self._rows = []
+
+
+class LocalConnection:
+    """The subset of SnowflakeConnection the app uses."""
+
+    def __init__(self, account):
+        self.account = account
+        self._closed = False
+
+    def cursor(self):
+        return LocalCursor(self.account)
+
+    def get_query_status_throw_if_error(self, query_id):
+        return self.account.status(query_id)
+
+    def is_still_running(self, status):
+        return status == 'RUNNING'
+
+    def is_closed(self):
+        return self._closed
+
+    def close(self):
+        self._closed = True
+
+
+class LocalBackend(SnowflakeBackend):
+    """SnowflakeBackend over a pool of connections to a LocalAccount."""
+
+    def __init__(self, account=None, grants_source='account_usage', max_size=4, query_log=None):
+        self.account = account or LocalAccount()
+        super().__init__(self.account.pool(max_size, query_log), grants_source=grants_source)
+
+
+def account_from_config(config):
+    """
+    LocalAccount from the [local] section of config.ini, seeded when empty with
+    the embedded sample data or synthetic data at the configured scale.
+    """
+    account = LocalAccount(
+        path=config_value(config, 'local', 'path', ':memory:'),
+        latency=config_value(config, 'local', 'latency', 0.0, float),
+        jitter=config_value(config, 'local', 'jitter', 0.0, float),
+    )
+    seed = config_value(config, 'local', 'seed', 'sample')
+    if seed and seed != 'none' and account.is_empty():
+        if seed == 'sample':
+            from snowguard.loaders import sample_audit_log, sample_metadata
+            account.seed(sample_metadata(), sample_audit_log())
+        else:
+            from snowguard import synthetic
+            sizes = synthetic.SCALES[seed]
+            metadata = synthetic.synthetic_metadata(**sizes)
+            account.seed(
+                metadata, synthetic.synthetic_audit_log(metadata, **sizes),
+                grants=synthetic.synthetic_grants(metadata), catalog=synthetic.synthetic_catalog(**sizes)
+            )
+    return account
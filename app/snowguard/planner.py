@@ -0,0 +1,271 @@
+"""
+SnowGuard - Grant Reconciliation Planner
+Compares the desired grants in audit.adw_rbac_metadata with the grants that
+actually exist in Snowflake and plans only the statements needed to close the gap
+"""
+
+from datetime import datetime
+
+import pandas as pd
+
+TABLE_KEY = ['database_name', 'schema_name', 'table_name']
+OBJECT_KEY = TABLE_KEY + ['role_name']
+GRANT_KEY = OBJECT_KEY + ['privilege']
+
+# Grants are collapsed per (database, schema, role, privilege)
+SCHEMA_GROUP = ['database_name', 'schema_name', 'role_name', 'privilege']
+
+# A schema-level rewrite only pays off once it replaces at least this many statements
+COLLAPSE_MIN_TABLES = 2
+
+# Table privileges conferred by GRANT ALL; Snowflake reports them individually
+ALL_TABLE_PRIVILEGES = ['SELECT', 'INSERT', 'UPDATE', 'DELETE', 'TRUNCATE', 'REFERENCES']
+
+PLAN_COLUMNS = ['action'] + GRANT_KEY + ['rbac_id', 'sql_statement']
+
+
+def _normalise(df, columns):
+    df = df[columns].copy()
+    for col in columns:
+        if col != 'rbac_id':
+            # Clean each distinct value once; names repeat heavily across rows
+            codes, uniques = pd.factorize(df[col], use_na_sentinel=False)
+            cleaned = pd.Index(uniques).astype(str).str.strip().str.upper()
+            df[col] = cleaned.take(codes)
+    return df
+
+
+def _apply_filters(df, database=None, schema=None, role=None):
+    # Same optional filters as USP_GRANT_RBAC / USP_REVOKE_RBAC
+    for col, value in (('database_name', database), ('schema_name', schema), ('role_name', role)):
+        if value:
+            df = df[df[col] == value.upper()]
+    return df
+
+
+def active_metadata_mask(metadata_df, as_of=None):
+    """Rows that are active on `as_of` (default today), matching vw_active_rbac_metadata."""
+    as_of = pd.Timestamp(as_of or datetime.now()).normalize()
+    start = pd.to_datetime(metadata_df['effective_start_date'], errors='coerce')
+    end = pd.to_datetime(metadata_df['effective_end_date'], errors='coerce')
+    return (
+        (metadata_df['record_status_cd'] == 'A') &
+        (start.isna() | (start <= as_of)) &
+        (end.isna() | (end >= as_of))
+    )
+
+
+def _desired_from_normalised(metadata_df, as_of=None):
+    rows = metadata_df.loc[active_metadata_mask(metadata_df, as_of), GRANT_KEY + ['rbac_id']]
+
+    # ALL becomes its individual privileges so it compares cleanly with actual grants
+    is_all = rows['privilege'] == 'ALL'
+    expanded = rows[is_all].drop(columns='privilege').merge(
+        pd.DataFrame({'privilege': ALL_TABLE_PRIVILEGES}), how='cross'
+    )
+    desired = pd.concat([rows[~is_all], expanded], ignore_index=True)
+    return desired.drop_duplicates(subset=GRANT_KEY, keep='first', ignore_index=True)
+
+
+def _prepare_metadata(metadata_df):
+    metadata = metadata_df.assign(privilege=metadata_df['permission_type'].fillna('SELECT'))
+    status = metadata[['record_status_cd', 'effective_start_date', 'effective_end_date']]
+    return pd.concat([_normalise(metadata, GRANT_KEY + ['rbac_id']), status], axis=1)
+
+
+def desired_grants(metadata_df, as_of=None):
+    """Active metadata expanded to one row per (database, schema, table, role, privilege)."""
+    return _desired_from_normalised(_prepare_metadata(metadata_df), as_of)
+
+
+def _key(df, columns):
+    # One string per row, so a set difference is a single hashed isin() instead of
+    # a multi-column merge
+    key = df[columns[0]]
+    for col in columns[1:]:
+        key = key + '\x1f' + df[col]
+    return key
+
+
+def build_statements(plan):
+    """Vectorised GRANT/REVOKE text for each plan row."""
+    target = " ON TABLE " + plan['database_name'] + "." + plan['schema_name'] + "." + plan['table_name']
+    direction = plan['action'].map({'GRANT': ' TO ROLE ', 'REVOKE': ' FROM ROLE '})
+    return plan['action'] + " " + plan['privilege'] + target + direction + plan['role_name']
+
+
+def plan_reconciliation(metadata_df, actual_grants_df, as_of=None, database=None, schema=None, role=None):
+    """
+    Plan the GRANTs that are missing and the REVOKEs that are stale.
+
+    `actual_grants_df` has GRANT_KEY columns (one row per privilege held). Both
+    differences are hash anti-joins on GRANT_KEY. Revokes are limited to managed
+    privileges on (object, role) pairs that appear in the metadata, so grants
+    SnowGuard never managed (ownership, other tooling) are left alone.
+    """
+    metadata = _prepare_metadata(metadata_df)
+    desired = _apply_filters(_desired_from_normalised(metadata, as_of), database, schema, role)
+    actual = _normalise(actual_grants_df, GRANT_KEY)
+    actual = _apply_filters(actual[actual['privilege'].isin(ALL_TABLE_PRIVILEGES)], database, schema, role)
+    actual = actual.drop_duplicates(ignore_index=True)
+
+    missing = desired[~_key(desired, GRANT_KEY).isin(_key(actual, GRANT_KEY))].assign(action='GRANT')
+
+    managed = _key(actual, OBJECT_KEY).isin(_key(metadata, OBJECT_KEY))
+    stale = actual[managed & ~_key(actual, GRANT_KEY).isin(_key(desired, GRANT_KEY))]
+    stale = stale.assign(action='REVOKE', rbac_id=None)
+
+    plan = pd.concat([missing, stale], ignore_index=True)
+    plan = plan.sort_values(['action'] + GRANT_KEY, ignore_index=True)
+    plan['sql_statement'] = build_statements(plan) if not plan.empty else pd.Series(dtype=str)
+    return plan.reindex(columns=PLAN_COLUMNS)
+
+
+def _covered_schemas(metadata_df, catalog, as_of=None):
+    # (database, schema, role, privilege) groups whose desired grants cover every
+    # catalog table of the schema; coverage counts only tables in the snapshot
+    schema_sizes = catalog.groupby(['database_name', 'schema_name']).size().rename('catalog_tables').reset_index()
+    desired = desired_grants(metadata_df, as_of)
+    desired = desired[_key(desired, TABLE_KEY).isin(_key(catalog, TABLE_KEY))]
+    coverage = desired.groupby(SCHEMA_GROUP).size().rename('covered_tables').reset_index()
+    coverage = coverage.merge(schema_sizes, on=['database_name', 'schema_name'])
+    full = coverage['covered_tables'] == coverage['catalog_tables']
+    return coverage.loc[full & (coverage['catalog_tables'] >= COLLAPSE_MIN_TABLES), SCHEMA_GROUP]
+
+
+def collapse_schema_grants(plan, metadata_df, catalog_df, as_of=None):
+    """
+    Rewrite per-table GRANTs that add up to a whole schema into schema-level statements.
+
+    `catalog_df` is a snapshot of the base tables that exist (TABLE_KEY columns). A
+    (database, schema, role, privilege) group collapses when the desired grants cover
+    every catalog table of that schema and at least COLLAPSE_MIN_TABLES of them are
+    being granted. Its per-table plan rows are kept, so the audit log still gets one
+    row per table, but they all share one `GRANT ... ON ALL TABLES IN SCHEMA`
+    statement. Grants on future tables are planned separately by
+    `reconcile_future_grants`.
+    """
+    grants = plan[(plan['action'] == 'GRANT') & plan['table_name'].notna()]
+    if grants.empty or catalog_df.empty:
+        return plan
+
+    catalog = _normalise(catalog_df, TABLE_KEY).drop_duplicates(ignore_index=True)
+    full = _covered_schemas(metadata_df, catalog, as_of)
+
+    in_catalog = grants[_key(grants, TABLE_KEY).isin(_key(catalog, TABLE_KEY))]
+    pending = in_catalog.groupby(SCHEMA_GROUP).size().rename('pending').reset_index()
+    groups = full.merge(pending, on=SCHEMA_GROUP)
+    groups = groups.loc[groups['pending'] >= COLLAPSE_MIN_TABLES, SCHEMA_GROUP]
+    if groups.empty:
+        return plan
+
+    schema_target = groups['database_name'] + "." + groups['schema_name']
+    groups = groups.assign(
+        all_tables="GRANT " + groups['privilege'] + " ON ALL TABLES IN SCHEMA " + schema_target
+                   + " TO ROLE " + groups['role_name'],
+    )
+
+    plan = plan.copy()
+    rewrite = plan.index.isin(in_catalog.index) & _key(plan, SCHEMA_GROUP).isin(_key(groups, SCHEMA_GROUP))
+    statements = plan.loc[rewrite, SCHEMA_GROUP].merge(groups, on=SCHEMA_GROUP, how='left')['all_tables']
+    plan.loc[rewrite, 'sql_statement'] = statements.to_numpy()
+    return plan
+
+
+def managed_schemas(metadata_df, database=None, schema=None):
+    """(database, schema) pairs the metadata names, within the plan filters; where future grants are read."""
+    schemas = _apply_filters(_normalise(metadata_df, ['database_name', 'schema_name']), database, schema)
+    return sorted(set(schemas.itertuples(index=False, name=None)))
+
+
+def reconcile_future_grants(plan, metadata_df, catalog_df, future_df, as_of=None, database=None, schema=None,
+                            role=None, grant_future=False):
+    """
+    Add the `ON FUTURE TABLES IN SCHEMA` statements that keep future grants in line with the metadata.
+
+    `future_df` holds the future table grants that exist (SCHEMA_GROUP columns, as
+    `Backend.load_future_grants` returns them). A future grant is desired only with
+    `grant_future`, and only for a group whose desired grants cover every catalog
+    table of its schema (as for `collapse_schema_grants`). Missing desired ones are
+    granted. Managed privileges held on (database, schema, role) combinations the
+    metadata names, but no longer desired, are revoked. This includes every such
+    future grant when `grant_future` is off. Rows carry no table_name, so they are
+    statements rather than table grants in `plan_summary`.
+    """
+    catalog = _normalise(catalog_df, TABLE_KEY).drop_duplicates(ignore_index=True)
+    desired = _covered_schemas(metadata_df, catalog, as_of) if grant_future else pd.DataFrame(columns=SCHEMA_GROUP)
+    desired = _apply_filters(desired, database, schema, role)
+
+    actual = _normalise(future_df, SCHEMA_GROUP)
+    actual = _apply_filters(actual[actual['privilege'].isin(ALL_TABLE_PRIVILEGES)], database, schema, role)
+    actual = actual.drop_duplicates(ignore_index=True)
+
+    scope = ['database_name', 'schema_name', 'role_name']
+    managed = _key(actual, scope).isin(_key(_prepare_metadata(metadata_df), scope))
+    stale = actual[managed & ~_key(actual, SCHEMA_GROUP).isin(_key(desired, SCHEMA_GROUP))].assign(action='REVOKE')
+    missing = desired[~_key(desired, SCHEMA_GROUP).isin(_key(actual, SCHEMA_GROUP))].assign(action='GRANT')
+
+    future = pd.concat([missing, stale], ignore_index=True)
+    if future.empty:
+        return plan
+    future = future.assign(table_name=None, rbac_id=None)
+    direction = future['action'].map({'GRANT': ' TO ROLE ', 'REVOKE': ' FROM ROLE '})
+    future['sql_statement'] = (future['action'] + " " + future['privilege'] + " ON FUTURE TABLES IN SCHEMA "
+                               + future['database_name'] + "." + future['schema_name'] + direction
+                               + future['role_name'])
+    future = future.sort_values(['action'] + SCHEMA_GROUP, ignore_index=True).reindex(columns=PLAN_COLUMNS)
+    return pd.concat([plan, future], ignore_index=True) if not plan.empty else future
+
+
+def _privilege_list(mask):
+    return ', '.join(p for i, p in enumerate(ALL_TABLE_PRIVILEGES) if mask & (1 << i))
+
+
+def coalesce_privileges(plan):
+    """
+    Merge statements that differ only in privilege into one multi-privilege statement.
+
+    `GRANT SELECT ON TABLE t TO ROLE r` and `GRANT INSERT ON TABLE t TO ROLE r`
+    become `GRANT SELECT, INSERT ON TABLE t TO ROLE r`. The privileges are always
+    listed explicitly, never as `GRANT ALL`, which would also confer privileges
+    the metadata does not list. Works the same for REVOKEs and for the
+    schema-level statements from `collapse_schema_grants`. Each row keeps its own
+    privilege, so the audit log still records one row per logical privilege.
+    """
+    if plan.empty:
+        return plan
+    # Everything after the privilege list: "<object> TO|FROM ROLE <role>"
+    obj = pd.Series([sql.partition(' ON ')[2] for sql in plan['sql_statement']], index=plan.index)
+    target = plan['action'] + ' ON ' + obj
+    bits = plan['privilege'].map({p: 1 << i for i, p in enumerate(ALL_TABLE_PRIVILEGES)})
+    known = bits.notna() & obj.ne('')
+
+    # Privileges per statement target as a bitmask; rows sharing a schema-level
+    # statement repeat the same privilege, hence the drop_duplicates
+    held = pd.DataFrame({'target': target[known], 'bits': bits[known].astype(int)}).drop_duplicates()
+    masks = held.groupby('target')['bits'].sum()
+    names = {mask: _privilege_list(mask) for mask in masks.unique()}
+
+    plan = plan.copy()
+    privileges = target[known].map(masks).map(names)
+    plan.loc[known, 'sql_statement'] = plan.loc[known, 'action'] + ' ' + privileges + ' ON ' + obj[known]
+    return plan
+
+
+def plan_summary(plan, metadata_df, as_of=None, database=None, schema=None, role=None):
+    """
+    Counts for display: grants and revokes to issue, statements needed, grants already in place.
+
+    Pass the filters the plan was made with so 'unchanged' covers the same scope.
+    Table grants folded into a schema-level statement still count as planned;
+    FUTURE TABLES grants (no table_name) are statements, not table grants.
+    """
+    table_grants = plan[(plan['action'] == 'GRANT') & plan['table_name'].notna()]
+    desired = _apply_filters(desired_grants(metadata_df, as_of), database, schema, role)
+    planned = _key(desired, GRANT_KEY).isin(_key(_normalise(table_grants, GRANT_KEY), GRANT_KEY))
+    return {
+        'grants': len(table_grants),
+        'revokes': int((plan['action'] == 'REVOKE').sum()),
+        'statements': int(plan['sql_statement'].nunique()),
+        'unchanged': int((~planned).sum()),
+    }
@@ -0,0 +1,343 @@
+"""
+SnowGuard - Query Telemetry
+Per-query records (query id, SQL fingerprint, elapsed time, rows, bytes scanned)
+for every statement issued through an instrumented ConnectionPool, tagged with the
+dashboard page and interaction that issued it
+"""
+
+import contextvars
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from snowguard.spans import current_labels
+
+METRICS_TABLE = 'audit.adw_rbac_query_metrics'
+
+# Recent queries kept in memory; older ones are dropped once saved or not
+MAX_QUERIES = 20_000
+
+# Query ids per QUERY_HISTORY lookup
+HISTORY_BATCH = 500
+
+# QUERY_HISTORY table function; RESULT_LIMIT is capped at 10000 by Snowflake
+QUERY_HISTORY_QUERY = """
+    SELECT query_id, bytes_scanned, total_elapsed_time, rows_produced, warehouse_name
+    FROM TABLE(information_schema.query_history(result_limit => 10000))
+    WHERE query_id IN ({ids})
+"""
+
+QUERY_COLUMNS = [
+    'query_id', 'fingerprint', 'query_kind', 'query_text', 'page', 'interaction', 'started', 'elapsed_ms',
+    'rows', 'bytes_scanned', 'server_elapsed_ms', 'warehouse_name', 'error',
+]
+SLOWEST_COLUMNS = [
+    'fingerprint', 'query_kind', 'query_text', 'pages', 'interactions', 'executions', 'total_ms', 'mean_ms',
+    'max_ms', 'bytes_scanned', 'rows',
+]
+
+# Metrics table column for each saved record field
+METRICS_COLUMNS = {
+    'query_id': 'query_id', 'fingerprint': 'fingerprint', 'query_kind': 'query_kind', 'query_text': 'query_text',
+    'page': 'page', 'interaction': 'interaction', 'started': 'started_at', 'elapsed_ms': 'elapsed_ms',
+    'server_elapsed_ms': 'server_elapsed_ms', 'rows': 'rows_produced', 'bytes_scanned': 'bytes_scanned',
+    'warehouse_name': 'warehouse_name', 'error': 'error_message',
+}
+
+# Normalisation applied in order before hashing, so statements that differ only in
+# literals, bind values, IN-list length or the object they grant on share a fingerprint
+_NORMALISE = [
+    (re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL), " "),
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"%\(\w+\)s|%s|(?<!:):\w+"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)"), "(?)"),
+    (re.compile(r"(?:\(\?\)\s*,\s*)+\(\?\)"), "(?)"),
+    (re.compile(r"^\s*(GRANT|REVOKE)\s+.+?\s+ON\s+", re.IGNORECASE | re.DOTALL), r"\1 ? ON "),
+    (re.compile(r"\b((?:TABLE|SCHEMA|ROLE|IN\s+SCHEMA))\s+(?!\()[\w$.\"]+", re.IGNORECASE), r"\1 ?"),
+    (re.compile(r"\b[\w$]+\.information_schema\b", re.IGNORECASE), "?.information_schema"),
+    (re.compile(r"\s+"), " "),
+]
+
+# Set while the log reads QUERY_HISTORY or saves itself, so those queries are not recorded
+_muted = contextvars.ContextVar('snowguard_query_log_muted', default=False)
+
+
+def normalise(sql):
+    """`sql` with literals, bind parameters and granted-on object names replaced by ?."""
+    for pattern, replacement in _NORMALISE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip().rstrip(';').strip()
+
+
+def fingerprint(sql):
+    """Short stable hash of the normalised statement."""
+    return hashlib.sha1(normalise(sql).upper().encode('utf-8')).hexdigest()[:16]
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class QueryLog:
+    """
+    Thread-safe log of the queries issued through pools created with `query_log=`.
+
+    Each record holds the query id, fingerprint, normalised text, client-side
+    elapsed time and rows, plus the page and innermost non-query span open when
+    it was issued (see snowguard.spans). `enrich` fills bytes scanned and server
+    time from QUERY_HISTORY and `flush` saves records to METRICS_TABLE.
+    Async statements are recorded once a status poll sees them finish.
+    """
+
+    def __init__(self, max_queries=MAX_QUERIES):
+        self._queries = deque(maxlen=max_queries)
+        self._pending = {}
+        self._max_pending = max_queries
+        self._lock = threading.Lock()
+
+    def wrap(self, cnx):
+        """`cnx` with its cursors' execute calls recorded here."""
+        return InstrumentedConnection(cnx, self)
+
+    @contextmanager
+    def muted(self):
+        """Don't record queries issued inside the block on this thread."""
+        token = _muted.set(True)
+        try:
+            yield
+        finally:
+            _muted.reset(token)
+
+    def start(self, sql):
+        """A new record for `sql`, or None while muted."""
+        if _muted.get():
+            return None
+        page, interaction = current_labels()
+        return {
+            'query_id': None, 'fingerprint': fingerprint(sql), 'query_kind': sql.split(None, 1)[0].upper(),
+            'query_text': normalise(sql)[:4000], 'page': page, 'interaction': interaction,
+            'started': datetime.now(), 'elapsed_ms': None, 'rows': None, 'bytes_scanned': None,
+            'server_elapsed_ms': None, 'warehouse_name': None, 'error': None,
+            '_clock': time.perf_counter(), '_saved': False,
+        }
+
+    def finish(self, record, query_id=None, rows=None, error=None):
+        if record is None:
+            return
+        record['elapsed_ms'] = round((time.perf_counter() - record['_clock']) * 1000, 3)
+        record['query_id'] = query_id or record['query_id']
+        record['rows'] = rows if rows is None or rows >= 0 else None
+        if error is not None:
+            record['error'] = str(error)[:4000]
+        with self._lock:
+            self._queries.append(record)
+
+    def submitted(self, record, query_id):
+        """Hold an async statement's record until `settle` sees it finish."""
+        if record is None or not query_id:
+            return
+        record['query_id'] = query_id
+        with self._lock:
+            if len(self._pending) >= self._max_pending:
+                self._pending.pop(next(iter(self._pending)))
+            self._pending[query_id] = record
+
+    def settle(self, query_id, error=None):
+        with self._lock:
+            record = self._pending.pop(query_id, None)
+        self.finish(record, error=error)
+
+    @contextmanager
+    def timed(self, sql, cursor):
+        """Record one synchronous statement run inside the block on `cursor`."""
+        record = self.start(sql)
+        try:
+            yield record
+        except Exception as e:
+            self.finish(record, getattr(e, 'sfqid', None) or getattr(cursor, 'sfqid', None), error=e)
+            raise
+        self.finish(record, getattr(cursor, 'sfqid', None), getattr(cursor, 'rowcount', None))
+
+    def _records(self):
+        with self._lock:
+            return list(self._queries)
+
+    def frame(self):
+        """Recent queries, oldest first."""
+        return pd.DataFrame(self._records(), columns=QUERY_COLUMNS)
+
+    def slowest(self, limit=20):
+        """Query shapes by total elapsed time, like the vw_slowest_queries view."""
+        queries = self.frame()
+        if queries.empty:
+            return pd.DataFrame(columns=SLOWEST_COLUMNS)
+        queries[['page', 'interaction']] = queries[['page', 'interaction']].fillna('(background)')
+        grouped = queries.groupby('fingerprint', sort=False)
+        slowest = grouped.agg(
+            query_kind=('query_kind', 'first'),
+            query_text=('query_text', 'first'),
+            pages=('page', lambda s: ', '.join(s.unique())),
+            interactions=('interaction', lambda s: ', '.join(s.unique())),
+            executions=('elapsed_ms', 'size'),
+            total_ms=('elapsed_ms', 'sum'),
+            mean_ms=('elapsed_ms', 'mean'),
+            max_ms=('elapsed_ms', 'max'),
+            bytes_scanned=('bytes_scanned', lambda s: s.sum(min_count=1)),
+            rows=('rows', 'sum'),
+        ).reset_index()
+        slowest[['total_ms', 'mean_ms', 'max_ms']] = slowest[['total_ms', 'mean_ms', 'max_ms']].round(2)
+        return slowest.sort_values('total_ms', ascending=False, ignore_index=True).head(limit)[SLOWEST_COLUMNS]
+
+    def enrich(self, pool):
+        """Fill bytes scanned, server elapsed time and warehouse from QUERY_HISTORY; returns records updated."""
+        waiting = {}
+        for record in self._records():
+            if record['query_id'] and record['bytes_scanned'] is None:
+                waiting[record['query_id']] = record
+        ids = list(waiting)
+        updated = 0
+        with self.muted(), pool.connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                for start in range(0, len(ids), HISTORY_BATCH):
+                    batch = {f"id_{i}": query_id for i, query_id in enumerate(ids[start:start + HISTORY_BATCH])}
+                    cur.execute(QUERY_HISTORY_QUERY.format(ids=', '.join(f"%({k})s" for k in batch)), batch)
+                    for query_id, scanned, server_ms, rows, warehouse in cur.fetchall():
+                        record = waiting.get(query_id)
+                        if record is None:
+                            continue
+                        record['bytes_scanned'] = int(scanned or 0)
+                        record['server_elapsed_ms'] = server_ms
+                        record['warehouse_name'] = warehouse
+                        if record['rows'] is None:
+                            record['rows'] = rows
+                        updated += 1
+            finally:
+                cur.close()
+        return updated
+
+    def flush(self, pool):
+        """Save records not yet saved to METRICS_TABLE (after `enrich`); returns rows written."""
+        self.enrich(pool)
+        records = [r for r in self._records() if r['query_id'] and not r['_saved']]
+        if not records:
+            return 0
+        columns = list(METRICS_COLUMNS.values())
+        placeholders = ", ".join(f"%({field})s" for field in METRICS_COLUMNS)
+        rows = [{field: record[field] for field in METRICS_COLUMNS} for record in records]
+        with self.muted(), pool.connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                cur.executemany(
+                    f"INSERT INTO {METRICS_TABLE} ({', '.join(columns)}, record_created_by, record_create_ts) "
+                    f"VALUES ({placeholders}, CURRENT_USER(), CURRENT_TIMESTAMP())",
+                    rows
+                )
+            finally:
+                cur.close()
+        for record in records:
+            record['_saved'] = True
+        return len(records)
+
+    def to_records(self):
+        """Recent queries as JSON-ready dicts."""
+        return json.loads(self.frame().to_json(orient='records', date_format='iso'))
+
+    def to_prometheus(self):
+        """Per-fingerprint totals over the recent queries in the Prometheus text format."""
+        queries = self.frame()
+        lines = [
+            "# HELP snowguard_query_seconds Client-side time of queries issued by SnowGuard.",
+            "# TYPE snowguard_query_seconds summary",
+        ]
+        if queries.empty:
+            return "\n".join(lines) + "\n"
+        totals = queries.groupby(['fingerprint', 'query_kind']).agg(
+            count=('elapsed_ms', 'size'), ms=('elapsed_ms', 'sum'), scanned=('bytes_scanned', 'sum')
+        )
+        for (fp, kind), row in totals.iterrows():
+            labels = f'fingerprint="{fp}",kind="{_label(kind)}"'
+            lines.append(f"snowguard_query_seconds_count{{{labels}}} {int(row['count'])}")
+            lines.append(f"snowguard_query_seconds_sum{{{labels}}} {row['ms'] / 1000:.6f}")
+        lines += [
+            "# HELP snowguard_query_bytes_scanned_total Bytes scanned per QUERY_HISTORY.",
+            "# TYPE snowguard_query_bytes_scanned_total counter",
+        ]
+        for (fp, kind), row in totals.iterrows():
+            lines.append(f'snowguard_query_bytes_scanned_total{{fingerprint="{fp}",kind="{_label(kind)}"}} '
+                         f"{int(row['scanned'])}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self._pending.clear()
+
+
+class InstrumentedCursor:
+    """Cursor proxy recording execute, executemany and execute_async in a QueryLog."""
+
+    def __init__(self, cursor, log):
+        self._cursor = cursor
+        self._log = log
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _result(self, result):
+        # execute() returns the cursor for chaining; keep chained calls on the proxy
+        return self if result is self._cursor else result
+
+    def execute(self, command, params=None, **kwargs):
+        with self._log.timed(command, self._cursor):
+            return self._result(self._cursor.execute(command, params, **kwargs))
+
+    def executemany(self, command, seq_of_params, **kwargs):
+        with self._log.timed(command, self._cursor):
+            return self._result(self._cursor.executemany(command, seq_of_params, **kwargs))
+
+    def execute_async(self, command, params=None, **kwargs):
+        record = self._log.start(command)
+        try:
+            result = self._cursor.execute_async(command, params, **kwargs)
+        except Exception as e:
+            self._log.finish(record, getattr(self._cursor, 'sfqid', None), error=e)
+            raise
+        self._log.submitted(record, self._cursor.sfqid)
+        return result
+
+
+class InstrumentedConnection:
+    """Connection proxy handing out InstrumentedCursors and settling async queries on poll."""
+
+    def __init__(self, cnx, log):
+        self._cnx = cnx
+        self._log = log
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._cnx.cursor(*args, **kwargs), self._log)
+
+    def get_query_status_throw_if_error(self, query_id):
+        try:
+            status = self._cnx.get_query_status_throw_if_error(query_id)
+        except Exception as e:
+            self._log.settle(query_id, error=e)
+            raise
+        if not self._cnx.is_still_running(status):
+            self._log.settle(query_id)
+        return status
+
+
+# One log per process, shared by every session like the span recorder
+QUERY_LOG = QueryLog()
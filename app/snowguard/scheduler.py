@@ -0,0 +1,202 @@
+"""
+SnowGuard - Expiry Scheduler
+Applies effective-date boundaries as they come due instead of sweeping every row
+"""
+
+import heapq
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from snowguard.executor import apply_plan
+from snowguard.intervals import OPEN_END, OPEN_START, effective_days
+from snowguard.planner import (
+    ALL_TABLE_PRIVILEGES, GRANT_KEY, OBJECT_KEY, PLAN_COLUMNS, _prepare_metadata, build_statements,
+    coalesce_privileges
+)
+
+DAY = pd.Timedelta(days=1).value
+
+UPCOMING_COLUMNS = ['boundary_date', 'change'] + OBJECT_KEY + ['privilege', 'rbac_id']
+
+# Name the last tick is saved under (Backend.save_last_tick)
+DEFAULT_SCHEDULER = 'expiry'
+
+
+class SystemClock:
+    """Wall-clock time."""
+
+    def now(self):
+        return datetime.now()
+
+
+class ManualClock:
+    """Clock that only moves when told to, so schedules can be stepped through offline."""
+
+    def __init__(self, start=None):
+        self.current = pd.Timestamp(start or datetime.now())
+
+    def now(self):
+        return self.current
+
+    def advance(self, **delta):
+        """Move forward by a pd.Timedelta-style offset, e.g. advance(days=1)."""
+        self.current += pd.Timedelta(**delta)
+        return self.current
+
+
+class ExpiryScheduler:
+    """
+    Priority queue of upcoming effective-date boundaries for status-A metadata rows.
+
+    A row goes into effect on its effective_start_date (START) and out of effect the
+    day after its effective_end_date (END). `load` assumes grants were reconciled as
+    of `since` and queues only the boundaries after it; each `tick` pops the ones
+    that are due on the clock and applies just those: GRANTs for rows that started
+    and are still in effect, REVOKEs for rows that ended, minus any privilege
+    another row still grants on the same (object, role). With `auto_expire` off,
+    END boundaries are dropped without revoking.
+
+    The day each tick applied through is saved on the backend under `name`, and
+    `load` resumes from it, so a scheduler rebuilt on every dashboard rerun or
+    started by a nightly job never re-applies boundaries an earlier run handled.
+    """
+
+    def __init__(self, backend, clock=None, auto_expire=True, name=DEFAULT_SCHEDULER):
+        self.backend = backend
+        self.clock = clock or SystemClock()
+        self.auto_expire = auto_expire
+        self.name = name
+        self.queue = []
+        self.last_tick = None
+
+    def _today(self):
+        return pd.Timestamp(self.clock.now()).normalize().value
+
+    def load(self, metadata_df, since=None):
+        """
+        Index the metadata and queue every boundary after day `since`.
+
+        `since` defaults to the saved last tick, or today when the scheduler has
+        never ticked (grants are assumed to be reconciled already).
+        """
+        if since is None:
+            since = self.backend.load_last_tick(self.name)
+        metadata = _prepare_metadata(metadata_df.reset_index(drop=True))
+        self.metadata = metadata
+        self._active = (metadata['record_status_cd'] == 'A').to_numpy()
+        self._starts = effective_days(metadata['effective_start_date'], OPEN_START)
+        self._ends = effective_days(metadata['effective_end_date'], OPEN_END)
+        self._rows_by_object = {}
+        for position, key in enumerate(metadata[OBJECT_KEY].itertuples(index=False, name=None)):
+            self._rows_by_object.setdefault(key, []).append(position)
+
+        self.last_tick = self._today() if since is None else pd.Timestamp(since).normalize().value
+        rows = np.flatnonzero(self._active)
+        starts, ends = self._starts[rows], self._ends[rows]
+        # Stop at OPEN_END so end + DAY cannot overflow
+        ends = np.where(ends < OPEN_END, ends + DAY, OPEN_END)
+        self.queue = (
+            [(int(day), 'START', int(row)) for day, row in zip(starts, rows) if OPEN_START < day and day > self.last_tick]
+            + [(int(day), 'END', int(row)) for day, row in zip(ends, rows) if day < OPEN_END and day > self.last_tick]
+        )
+        heapq.heapify(self.queue)
+        return self
+
+    def __len__(self):
+        return len(self.queue)
+
+    def _privileges(self, position):
+        privilege = self.metadata.at[position, 'privilege']
+        return ALL_TABLE_PRIVILEGES if privilege == 'ALL' else [privilege]
+
+    def _in_effect(self, position, day):
+        return self._active[position] and self._starts[position] <= day <= self._ends[position]
+
+    def upcoming(self, n=10):
+        """The next `n` queued boundaries, soonest first."""
+        rows = []
+        for day, change, position in heapq.nsmallest(n, self.queue):
+            record = self.metadata.loc[position]
+            rows.append([pd.Timestamp(day), change] + [record[col] for col in OBJECT_KEY]
+                        + [record['privilege'], record['rbac_id']])
+        return pd.DataFrame(rows, columns=UPCOMING_COLUMNS)
+
+    def _plan(self, events, day):
+        desired = {}
+
+        def still_desired(key):
+            if key not in desired:
+                desired[key] = {
+                    p for position in self._rows_by_object[key] if self._in_effect(position, day)
+                    for p in self._privileges(position)
+                }
+            return desired[key]
+
+        rows = []
+        for change, position in events:
+            record = self.metadata.loc[position]
+            key = tuple(record[col] for col in OBJECT_KEY)
+            if change == 'START':
+                # A range that started and already ended since the last tick needs no grant
+                privileges = self._privileges(position) if self._in_effect(position, day) else []
+                action = 'GRANT'
+            else:
+                privileges = [p for p in self._privileges(position) if p not in still_desired(key)]
+                action = 'REVOKE'
+            rows += [(action, *key, p, record['rbac_id']) for p in privileges]
+
+        plan = pd.DataFrame(rows, columns=['action'] + GRANT_KEY + ['rbac_id'])
+        plan = plan.drop_duplicates(['action'] + GRANT_KEY, ignore_index=True)
+        plan = plan.sort_values(['action'] + GRANT_KEY, ignore_index=True)
+        plan['sql_statement'] = build_statements(plan) if not plan.empty else pd.Series(dtype=str)
+        return coalesce_privileges(plan.reindex(columns=PLAN_COLUMNS))
+
+    def due(self):
+        """Plan for the boundaries due now, without taking them off the queue."""
+        today = self._today()
+        events = []
+        # Walk only the part of the heap that is due: a child is never earlier than its parent
+        stack = [0] if self.queue else []
+        while stack:
+            i = stack.pop()
+            if i < len(self.queue) and self.queue[i][0] <= today:
+                events.append(self.queue[i][1:])
+                stack += [2 * i + 1, 2 * i + 2]
+        if not self.auto_expire:
+            events = [event for event in events if event[0] == 'START']
+        return self._plan(events, today)
+
+    def tick(self, dry_run=False, **apply_options):
+        """
+        Pop every due boundary and apply the resulting statements with `apply_plan`.
+
+        Returns (results, summary) as `apply_plan` does, with the number of
+        boundaries processed and END boundaries skipped added to the summary, or
+        (None, None) when nothing is due. A dry run leaves the boundaries queued.
+        """
+        today = self._today()
+        popped = []
+        while self.queue and self.queue[0][0] <= today:
+            popped.append(heapq.heappop(self.queue))
+        if dry_run:
+            for event in popped:
+                heapq.heappush(self.queue, event)
+        if not popped:
+            self._save(today, dry_run)
+            return None, None
+
+        events = [(change, position) for _, change, position in popped if self.auto_expire or change == 'START']
+        apply_options.setdefault('label', 'SnowGuard expiry scheduler')
+        results, summary = apply_plan(self.backend, self._plan(events, today), dry_run=dry_run, **apply_options)
+        # Saved once the statements have run; failures are in the audit log and are not retried
+        self._save(today, dry_run)
+        summary.update(boundaries=len(popped), expiries_skipped=len(popped) - len(events))
+        return results, summary
+
+    def _save(self, today, dry_run):
+        # Saved even when nothing was due, so the next load does not fall back to its own today
+        if not dry_run:
+            self.last_tick = today
+            self.backend.save_last_tick(self.name, pd.Timestamp(today))
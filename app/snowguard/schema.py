@@ -0,0 +1,113 @@
+"""
+SnowGuard - Frame Schemas
+Typed, low-memory dtypes for the metadata and audit log frames kept in session state
+"""
+
+import numpy as np
+import pandas as pd
+
+# A 'category' column is only converted while it has at most this many distinct
+# values per row; above that the categories cost more than the strings they replace
+CATEGORY_MAX_RATIO = 0.5
+
+METADATA_SCHEMA = {
+    'rbac_id': 'id',
+    'database_name': 'category',
+    'schema_name': 'category',
+    'table_name': 'category',
+    'role_name': 'category',
+    'permission_type': 'category',
+    'effective_start_date': 'datetime',
+    'effective_end_date': 'datetime',
+    'record_status_cd': 'category',
+    'record_created_by': 'category',
+    'record_create_ts': 'datetime',
+    'record_updated_by': 'category',
+    'record_updated_ts': 'datetime',
+}
+
+AUDIT_LOG_SCHEMA = {
+    'log_id': 'id',
+    'operation_type': 'category',
+    'database_name': 'category',
+    'schema_name': 'category',
+    'table_name': 'category',
+    'role_name': 'category',
+    'permission_type': 'category',
+    'execution_status': 'category',
+    'execution_time': 'datetime',
+    'record_status_cd': 'category',
+    'record_created_by': 'category',
+    'record_create_ts': 'datetime',
+    'record_updated_by': 'category',
+    'record_updated_ts': 'datetime',
+}
+
+
+def frame_memory(df):
+    """Bytes held by a frame, including the Python strings in object columns."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def untyped_memory(df):
+    """
+    Bytes `df` would hold without a schema: 'category' columns as plain strings and
+    integer ids as int64. Each categorical is expanded one column at a time, so
+    only a single untyped column is held at once. On an untyped frame this is
+    `frame_memory`.
+    """
+    total = frame_memory(df)
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            plain = series.astype(series.cat.categories.dtype)
+            total += int(plain.memory_usage(index=False, deep=True)) - int(series.memory_usage(index=False, deep=True))
+        elif pd.api.types.is_integer_dtype(series.dtype) and series.dtype.itemsize < 8:
+            total += (8 - series.dtype.itemsize) * len(series)
+    return total
+
+
+def _downcast_ids(series):
+    ids = pd.to_numeric(series, errors='coerce')
+    if ids.isna().any():
+        return ids
+    info = np.iinfo(np.int32)
+    fits = ids.empty or (ids.min() >= info.min and ids.max() <= info.max)
+    return ids.astype(np.int32 if fits else np.int64)
+
+
+def apply_schema(df, schema):
+    """Return `df` with the schema's dtypes applied; columns the frame lacks are skipped."""
+    df = df.copy(deep=False)
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        if kind == 'datetime':
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        elif kind == 'id':
+            df[col] = _downcast_ids(df[col])
+        elif kind == 'category' and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            if df[col].nunique() <= CATEGORY_MAX_RATIO * len(df):
+                df[col] = df[col].astype('category')
+    return df
+
+
+def concat_frames(base, new, schema):
+    """
+    Append `new` rows to a typed frame.
+
+    A plain concat of a categorical with strings (or with a categorical holding other
+    categories) falls back to object; here the base's categories are extended
+    instead, so the result keeps the compact dtypes without re-typing every row.
+    """
+    new = apply_schema(new, {col: kind for col, kind in schema.items() if kind != 'category'})
+    base = base.copy(deep=False)
+    for col in base.columns:
+        if col not in new.columns or not isinstance(base[col].dtype, pd.CategoricalDtype):
+            continue
+        categories = base[col].cat.categories
+        added = pd.Index(new[col].dropna().unique()).difference(categories)
+        if len(added):
+            base[col] = base[col].cat.add_categories(added)
+        new[col] = pd.Categorical(new[col], categories=base[col].cat.categories)
+    return pd.concat([base, new], ignore_index=True)
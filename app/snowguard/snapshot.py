@@ -0,0 +1,160 @@
+"""
+SnowGuard - Snapshot Cache
+Parquet copies of the metadata and audit log frames kept next to the app, reused
+by new sessions while a cheap fingerprint query shows the tables are unchanged
+"""
+
+import hashlib
+import json
+import os
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from snowguard.loaders import (
+    AUDIT_LOG_QUERY, METADATA_QUERY, append_audit_rows, audit_log_watermark, fetch_dataframe, load_audit_log,
+    load_audit_log_since, load_metadata
+)
+from snowguard.spans import span
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.snapshots')
+
+# Parquet schema metadata key holding what a snapshot was taken from
+KEY_FIELD = b'snowguard.snapshot'
+
+# One row per table: enough to tell whether anything was added, removed or updated
+FINGERPRINT_QUERIES = {
+    'metadata': """
+        SELECT COUNT(*) AS row_count, MAX(record_updated_ts) AS max_updated_ts
+        FROM audit.T_RBAC_METADATA
+    """,
+    'audit_log': """
+        SELECT COUNT(*) AS row_count, MAX(record_updated_ts) AS max_updated_ts, MAX(log_id) AS max_log_id
+        FROM audit.T_RBAC_AUDIT_LOG
+    """,
+}
+
+# The query each snapshot holds the result of; a changed query invalidates its snapshot
+FRAME_QUERIES = {'metadata': METADATA_QUERY, 'audit_log': AUDIT_LOG_QUERY}
+
+
+def _stamp(value):
+    # Timestamps as ISO text so fingerprints compare the same after a JSON round trip
+    return None if value is None or pd.isna(value) else pd.Timestamp(value).isoformat()
+
+
+def fetch_fingerprint(pool, name):
+    """{'row_count', 'max_updated_ts'[, 'max_log_id']} of the table behind frame `name`."""
+    row = fetch_dataframe(pool, FINGERPRINT_QUERIES[name]).iloc[0]
+    fingerprint = {'row_count': int(row['row_count']), 'max_updated_ts': _stamp(row['max_updated_ts'])}
+    if 'max_log_id' in row.index:
+        fingerprint['max_log_id'] = None if pd.isna(row['max_log_id']) else int(row['max_log_id'])
+    return fingerprint
+
+
+class SnapshotCache:
+    """
+    Parquet snapshots of the session frames under `directory`.
+
+    Each snapshot records, in its Parquet schema metadata, the `scope` (which
+    account or local database it came from), a hash of the query that produced
+    it and the table's fingerprint at the time. A load first runs the
+    fingerprint query; when it matches, the frame is read from disk with its
+    compact dtypes intact. When the audit log has only gained rows, those rows
+    are fetched from the snapshot's watermark and appended; anything else is a
+    full load that replaces the snapshot. Files are replaced atomically, so
+    concurrent sessions and processes only ever read a complete snapshot.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, scope=''):
+        self.directory = directory
+        self.scope = scope
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}.parquet")
+
+    def _key(self, name, fingerprint):
+        query = hashlib.sha1(FRAME_QUERIES[name].encode('utf-8')).hexdigest()[:16]
+        return {'scope': self.scope, 'query': query, 'fingerprint': fingerprint}
+
+    def stored_key(self, name):
+        """What the snapshot for `name` was taken from, or None without a readable snapshot."""
+        try:
+            metadata = pq.read_schema(self.path(name)).metadata or {}
+            return json.loads(metadata[KEY_FIELD])
+        except (OSError, KeyError, ValueError, pa.ArrowException):
+            return None
+
+    def _read(self, name):
+        with span(f"{name} snapshot read", 'query') as timing:
+            frame = pq.read_table(self.path(name)).to_pandas(self_destruct=True, split_blocks=True)
+            timing.rows = len(frame)
+        return frame
+
+    def _write(self, name, frame, key):
+        # Written beside the target and renamed over it; a failed write leaves the old snapshot
+        tmp = f"{self.path(name)}.{uuid.uuid4().hex}.tmp"
+        try:
+            with span(f"{name} snapshot write", 'export', rows=len(frame)):
+                os.makedirs(self.directory, exist_ok=True)
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                table = table.replace_schema_metadata({**(table.schema.metadata or {}), KEY_FIELD: json.dumps(key)})
+                pq.write_table(table, tmp)
+                os.replace(tmp, self.path(name))
+        except (OSError, pa.ArrowException):
+            # A read-only or full disk only costs the next session a full load
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def load_metadata(self, pool):
+        """`loaders.load_metadata`, served from the snapshot while the table is unchanged."""
+        key = self._key('metadata', fetch_fingerprint(pool, 'metadata'))
+        if self.stored_key('metadata') == key:
+            return self._read('metadata')
+        frame = load_metadata(pool)
+        self._write('metadata', frame, key)
+        return frame
+
+    def load_audit_log(self, pool):
+        """`loaders.load_audit_log`, served from the snapshot and topped up with new rows."""
+        fingerprint = fetch_fingerprint(pool, 'audit_log')
+        key = self._key('audit_log', fingerprint)
+        stored = self.stored_key('audit_log')
+        if stored == key:
+            return self._read('audit_log')
+        if self._only_added(stored, key):
+            frame = self._top_up(pool, fingerprint)
+            if frame is not None:
+                self._write('audit_log', frame, key)
+                return frame
+        frame = load_audit_log(pool)
+        self._write('audit_log', frame, key)
+        return frame
+
+    @staticmethod
+    def _only_added(stored, key):
+        # Rows can only have been appended if the count grew and neither maximum went backwards
+        if stored is None or (stored['scope'], stored['query']) != (key['scope'], key['query']):
+            return False
+        before, now = stored['fingerprint'], key['fingerprint']
+        if not 0 < before['row_count'] < now['row_count'] or now['max_updated_ts'] is None:
+            return False
+        return (
+            (now['max_log_id'] or 0) >= (before['max_log_id'] or 0)
+            and (before['max_updated_ts'] is None
+                 or pd.Timestamp(before['max_updated_ts']) <= pd.Timestamp(now['max_updated_ts']))
+        )
+
+    def _top_up(self, pool, fingerprint):
+        """The snapshot plus rows past its watermark, or None if that doesn't reproduce the table."""
+        audit_df = self._read('audit_log')
+        new_rows = load_audit_log_since(pool, audit_log_watermark(audit_df))
+        with span("audit_log snapshot append", 'transform', rows=len(new_rows)):
+            combined = append_audit_rows(audit_df, new_rows)
+        # A different count or newest update means old rows were also changed or removed
+        newest = pd.to_datetime(combined['record_updated_ts'], errors='coerce').max()
+        if len(combined) != fingerprint['row_count'] or _stamp(newest) != fingerprint['max_updated_ts']:
+            return None
+        return combined
@@ -0,0 +1,216 @@
+"""
+SnowGuard - Span Timings
+Lightweight timings for the app's hot paths (query, transform, render, export),
+grouped by rerun and page, with JSON and Prometheus text dumps
+"""
+
+import contextvars
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+KINDS = ('query', 'transform', 'render', 'export')
+
+# Recent spans and reruns kept for the Performance tab; totals are kept forever
+MAX_SPANS = 20_000
+MAX_RERUNS = 500
+
+SPAN_COLUMNS = ['rerun_id', 'page', 'kind', 'name', 'started', 'seconds', 'self_seconds', 'rows', 'thread']
+SUMMARY_COLUMNS = ['page', 'kind', 'name', 'count', 'mean_ms', 'p95_ms', 'max_ms', 'self_mean_ms', 'rows']
+
+# The rerun and innermost open span of the current thread / script run
+_rerun = contextvars.ContextVar('snowguard_rerun', default=None)
+_parent = contextvars.ContextVar('snowguard_span', default=None)
+
+
+class Span:
+    """One timed block; set `rows` inside the block to record how much it processed."""
+    __slots__ = ('name', 'kind', 'rows', 'started', 'seconds', 'child_seconds', 'parent')
+
+    def __init__(self, name, kind, rows=None, parent=None):
+        self.name = name
+        self.kind = kind
+        self.rows = rows
+        self.parent = parent
+        self.started = datetime.now()
+        self.seconds = 0.0
+        self.child_seconds = 0.0
+
+
+def current_labels():
+    """
+    (page, interaction) for work starting now: the current rerun's page and the
+    innermost open span that is not itself a query, e.g. "metadata filter" or
+    "page"; either is None outside a rerun or span.
+    """
+    rerun = _rerun.get()
+    span = _parent.get()
+    while span is not None and span.kind == 'query' and span.parent is not None:
+        span = span.parent
+    return rerun['page'] if rerun else None, span.name if span is not None else None
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class SpanRecorder:
+    """
+    Thread-safe store of span timings for one process.
+
+    `rerun(page)` brackets a Streamlit script run; spans opened inside it are
+    tagged with its id and page, and nested spans subtract from their parent's
+    self time, so a page's render span shows only the time not spent in the
+    queries and transforms it called. Spans opened on other threads (the
+    background loaders) are recorded without a rerun.
+    """
+
+    def __init__(self, max_spans=MAX_SPANS, max_reruns=MAX_RERUNS):
+        self._spans = deque(maxlen=max_spans)
+        self._reruns = deque(maxlen=max_reruns)
+        self._totals = {}
+        self._rerun_totals = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def rerun(self, page):
+        """Bracket one script run of `page`."""
+        rerun = {'rerun_id': next(self._ids), 'page': page, 'started': datetime.now()}
+        token = _rerun.set(rerun)
+        started = time.perf_counter()
+        try:
+            yield rerun
+        finally:
+            # Also reached on st.rerun() / st.stop(), which unwind by raising
+            rerun['seconds'] = time.perf_counter() - started
+            _rerun.reset(token)
+            with self._lock:
+                self._reruns.append(rerun)
+                total = self._rerun_totals.setdefault(page, [0, 0.0])
+                total[0] += 1
+                total[1] += rerun['seconds']
+
+    @contextmanager
+    def span(self, name, kind, rows=None):
+        """Time the block as a `kind` span; yields the Span so the block can set rows."""
+        parent = _parent.get()
+        span = Span(name, kind, rows, parent)
+        token = _parent.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.seconds = time.perf_counter() - started
+            _parent.reset(token)
+            if parent is not None:
+                parent.child_seconds += span.seconds
+            self._record(span)
+
+    def _record(self, span):
+        rerun = _rerun.get()
+        row = (
+            rerun['rerun_id'] if rerun else None, rerun['page'] if rerun else None, span.kind, span.name,
+            span.started, span.seconds, span.seconds - span.child_seconds, span.rows, threading.current_thread().name
+        )
+        key = (row[1], span.kind, span.name)
+        with self._lock:
+            self._spans.append(row)
+            total = self._totals.setdefault(key, [0, 0.0, 0])
+            total[0] += 1
+            total[1] += span.seconds
+            total[2] += span.rows or 0
+
+    def spans(self):
+        """Recent spans, oldest first."""
+        with self._lock:
+            rows = list(self._spans)
+        return pd.DataFrame(rows, columns=SPAN_COLUMNS)
+
+    def reruns(self):
+        """Recent reruns with their total seconds and per-kind self time."""
+        with self._lock:
+            reruns = pd.DataFrame(list(self._reruns), columns=['rerun_id', 'page', 'started', 'seconds'])
+        spans = self.spans()
+        if reruns.empty or spans.empty:
+            return reruns
+        by_kind = spans.pivot_table(index='rerun_id', columns='kind', values='self_seconds', aggfunc='sum')
+        return reruns.join(by_kind.reindex(columns=list(KINDS)), on='rerun_id').fillna(
+            {kind: 0.0 for kind in KINDS}
+        )
+
+    def summary(self):
+        """Per (page, kind, name) over the recent spans: count, mean/p95/max and mean self time in ms, rows."""
+        spans = self.spans()
+        if spans.empty:
+            return pd.DataFrame(columns=SUMMARY_COLUMNS)
+        spans['page'] = spans['page'].fillna('(background)')
+        grouped = spans.groupby(['page', 'kind', 'name'], sort=False)
+        summary = grouped.agg(
+            count=('seconds', 'size'),
+            mean_ms=('seconds', 'mean'),
+            p95_ms=('seconds', lambda s: np.percentile(s, 95)),
+            max_ms=('seconds', 'max'),
+            self_mean_ms=('self_seconds', 'mean'),
+            rows=('rows', 'sum'),
+        ).reset_index()
+        for col in ('mean_ms', 'p95_ms', 'max_ms', 'self_mean_ms'):
+            summary[col] = (summary[col] * 1000).round(2)
+        return summary.sort_values('mean_ms', ascending=False, ignore_index=True)[SUMMARY_COLUMNS]
+
+    def to_json(self):
+        """Summary, recent reruns and recent spans as a JSON document."""
+        return json.dumps({
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'summary': self.summary().to_dict('records'),
+            'reruns': json.loads(self.reruns().to_json(orient='records', date_format='iso')),
+            'spans': json.loads(self.spans().to_json(orient='records', date_format='iso')),
+        }, indent=2, default=str)
+
+    def to_prometheus(self):
+        """Cumulative totals in the Prometheus text exposition format."""
+        with self._lock:
+            totals = sorted(self._totals.items(), key=lambda item: tuple(str(k) for k in item[0]))
+            rerun_totals = sorted(self._rerun_totals.items())
+        lines = [
+            "# HELP snowguard_span_seconds Time spent in instrumented spans.",
+            "# TYPE snowguard_span_seconds summary",
+        ]
+        for (page, kind, name), (count, seconds, _) in totals:
+            labels = f'page="{_label(page or "")}",kind="{kind}",name="{_label(name)}"'
+            lines.append(f"snowguard_span_seconds_count{{{labels}}} {count}")
+            lines.append(f"snowguard_span_seconds_sum{{{labels}}} {seconds:.6f}")
+        lines += [
+            "# HELP snowguard_span_rows_total Rows processed by instrumented spans.",
+            "# TYPE snowguard_span_rows_total counter",
+        ]
+        for (page, kind, name), (_, _, rows) in totals:
+            labels = f'page="{_label(page or "")}",kind="{kind}",name="{_label(name)}"'
+            lines.append(f"snowguard_span_rows_total{{{labels}}} {rows}")
+        lines += [
+            "# HELP snowguard_rerun_seconds Dashboard reruns per page, or CLI runs per command.",
+            "# TYPE snowguard_rerun_seconds summary",
+        ]
+        for page, (count, seconds) in rerun_totals:
+            lines.append(f'snowguard_rerun_seconds_count{{page="{_label(page)}"}} {count}')
+            lines.append(f'snowguard_rerun_seconds_sum{{page="{_label(page)}"}} {seconds:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._reruns.clear()
+            self._totals.clear()
+            self._rerun_totals.clear()
+
+
+# One recorder per process, shared by every session like the connection pool
+RECORDER = SpanRecorder()
+span = RECORDER.span
@@ -0,0 +1,163 @@
+"""
+SnowGuard - Synthetic Data
+Generators for account-sized metadata, grants, catalogs, audit logs and upload
+files, used by the benchmark suite
+"""
+
+import numpy as np
+import pandas as pd
+
+from snowguard.planner import ALL_TABLE_PRIVILEGES, GRANT_KEY, TABLE_KEY, desired_grants
+from snowguard.schema import AUDIT_LOG_SCHEMA, METADATA_SCHEMA, apply_schema
+
+# Preset sizes; any of them can be overridden individually
+SCALES = {
+    'small': {'roles': 100, 'tables': 10_000, 'metadata_rows': 50_000, 'audit_rows': 200_000, 'upload_rows': 20_000},
+    'medium': {'roles': 1_000, 'tables': 100_000, 'metadata_rows': 500_000, 'audit_rows': 5_000_000,
+               'upload_rows': 200_000},
+    'account': {'roles': 10_000, 'tables': 1_000_000, 'metadata_rows': 2_000_000, 'audit_rows': 50_000_000,
+                'upload_rows': 1_000_000},
+}
+
+DATABASES = 20
+SCHEMAS_PER_DATABASE = 50
+
+# Share of metadata rows per permission type, most grants being read-only
+PERMISSION_WEIGHTS = {'SELECT': 0.7, 'INSERT': 0.08, 'UPDATE': 0.07, 'DELETE': 0.05, 'ALL': 0.1}
+
+# Name columns audit rows copy from the metadata row they refer to
+NAME_COLUMNS = ['database_name', 'schema_name', 'table_name', 'role_name']
+
+OPERATION_WEIGHTS = {'GRANT': 0.55, 'REVOKE': 0.15, 'DRY_RUN': 0.2, 'PROCESS_START': 0.05, 'PROCESS_END': 0.05}
+
+EPOCH = pd.Timestamp('2024-01-01')
+
+
+def _names(prefix, n):
+    return pd.Index([f"{prefix}_{i:07d}" for i in range(n)])
+
+
+def _categorical(codes, names):
+    return pd.Categorical.from_codes(codes, categories=names)
+
+
+def _table_parts(table_ids):
+    # Table i lives in database i % DATABASES and one of that database's schemas
+    return table_ids % DATABASES, (table_ids // DATABASES) % SCHEMAS_PER_DATABASE
+
+
+def synthetic_metadata(roles, tables, metadata_rows, seed=0, **_):
+    """
+    Metadata rows spread over `tables` tables and `roles` roles, typed like the
+    session frame (METADATA_SCHEMA). About 15% of rows have an end date, some
+    already past, and 5% are inactive.
+    """
+    rng = np.random.default_rng(seed)
+    table_ids = rng.integers(0, tables, metadata_rows)
+    database, schema = _table_parts(table_ids)
+    start = EPOCH + pd.to_timedelta(rng.integers(0, 1000, metadata_rows), unit='D')
+    end = pd.Series(start + pd.to_timedelta(rng.integers(30, 720, metadata_rows), unit='D'))
+    end = end.where(rng.random(metadata_rows) < 0.15)
+    created = EPOCH + pd.to_timedelta(rng.integers(0, 1000 * 86400, metadata_rows), unit='s')
+
+    metadata = pd.DataFrame({
+        'rbac_id': np.arange(1, metadata_rows + 1),
+        'database_name': _categorical(database, _names('DB', DATABASES)),
+        'schema_name': _categorical(schema, _names('SCHEMA', SCHEMAS_PER_DATABASE)),
+        'table_name': _categorical(table_ids, _names('T', tables)),
+        'role_name': _categorical(rng.integers(0, roles, metadata_rows), _names('ROLE', roles)),
+        'permission_type': rng.choice(list(PERMISSION_WEIGHTS), metadata_rows, p=list(PERMISSION_WEIGHTS.values())),
+        'effective_start_date': start,
+        'effective_end_date': end,
+        'description': 'Synthetic benchmark permission',
+        'record_status_cd': np.where(rng.random(metadata_rows) < 0.95, 'A', 'I'),
+        'record_created_by': 'BENCHMARK',
+        'record_create_ts': created,
+        'record_updated_by': 'BENCHMARK',
+        'record_updated_ts': created,
+    })
+    return apply_schema(metadata, METADATA_SCHEMA)
+
+
+def synthetic_catalog(tables, **_):
+    """Every synthetic table as TABLE_KEY rows, as `load_catalog` returns them."""
+    table_ids = np.arange(tables)
+    database, schema = _table_parts(table_ids)
+    return pd.DataFrame({
+        'database_name': _names('DB', DATABASES).take(database),
+        'schema_name': _names('SCHEMA', SCHEMAS_PER_DATABASE).take(schema),
+        'table_name': _names('T', tables),
+    })[TABLE_KEY]
+
+
+def synthetic_grants(metadata, coverage=0.9, stale=0.05, seed=0):
+    """
+    Actual grants for `metadata`: a `coverage` share of the desired grants plus
+    `stale` (as a share of the desired count) privileges no row asks for.
+    """
+    rng = np.random.default_rng(seed)
+    desired = desired_grants(metadata)
+    held = desired.loc[rng.random(len(desired)) < coverage, GRANT_KEY]
+    extra = desired.sample(n=int(len(desired) * stale), replace=True, random_state=seed)[GRANT_KEY]
+    extra = extra.assign(privilege=rng.choice(ALL_TABLE_PRIVILEGES, len(extra)))
+    return pd.concat([held, extra], ignore_index=True).drop_duplicates(ignore_index=True)
+
+
+def synthetic_audit_log(metadata, audit_rows, seed=0, **_):
+    """
+    Audit rows referring to random metadata rows, typed like the session frame.
+
+    sql_statement is built per metadata row and kept categorical so tens of
+    millions of rows fit in memory; the dashboards never read it.
+    """
+    rng = np.random.default_rng(seed)
+    refs = rng.integers(0, len(metadata), audit_rows)
+    statements = (
+        "GRANT " + metadata['permission_type'].astype(str) + " ON TABLE " + metadata['database_name'].astype(str)
+        + "." + metadata['schema_name'].astype(str) + "." + metadata['table_name'].astype(str)
+        + " TO ROLE " + metadata['role_name'].astype(str)
+    )
+    referenced = {col: metadata[col] for col in NAME_COLUMNS}
+    referenced['sql_statement'] = statements
+    for col, values in referenced.items():
+        codes, uniques = pd.factorize(values)
+        referenced[col] = _categorical(codes[refs], uniques)
+    executed = EPOCH + pd.to_timedelta(np.sort(rng.integers(0, 1000 * 86400, audit_rows)), unit='s')
+
+    audit_log = pd.DataFrame({
+        'log_id': np.arange(1, audit_rows + 1),
+        'operation_type': rng.choice(list(OPERATION_WEIGHTS), audit_rows, p=list(OPERATION_WEIGHTS.values())),
+        **{col: referenced[col] for col in NAME_COLUMNS},
+        'permission_type': metadata['permission_type'].to_numpy()[refs],
+        'sql_statement': referenced['sql_statement'],
+        'execution_status': np.where(rng.random(audit_rows) < 0.97, 'SUCCESS', 'FAILED'),
+        'error_message': None,
+        'execution_time': executed,
+        'record_status_cd': 'A',
+        'record_created_by': 'BENCHMARK',
+        'record_create_ts': executed,
+        'record_updated_by': 'BENCHMARK',
+        'record_updated_ts': executed,
+    })
+    return apply_schema(audit_log, AUDIT_LOG_SCHEMA)
+
+
+def write_upload_csv(path, tables, roles, upload_rows, error_rate=0.02, seed=0, **_):
+    """Write a bulk-upload CSV in the template's layout, with `error_rate` of rows invalid."""
+    rng = np.random.default_rng(seed)
+    table_ids = rng.integers(0, tables, upload_rows)
+    database, schema = _table_parts(table_ids)
+    upload = pd.DataFrame({
+        'database_name': _names('DB', DATABASES).take(database),
+        'schema_name': _names('SCHEMA', SCHEMAS_PER_DATABASE).take(schema),
+        'table_name': _names('T', tables).take(table_ids),
+        'role_name': _names('ROLE', roles).take(rng.integers(0, roles, upload_rows)),
+        'permission_type': rng.choice(list(PERMISSION_WEIGHTS), upload_rows),
+        'effective_start_date': (EPOCH + pd.to_timedelta(rng.integers(0, 1000, upload_rows), unit='D')).strftime('%Y-%m-%d'),
+        'effective_end_date': '',
+        'description': 'Synthetic upload row',
+    })
+    bad = rng.random(upload_rows) < error_rate
+    upload.loc[bad, 'permission_type'] = 'OWNERSHIP'
+    upload.to_csv(path, index=False)
+    return path
@@ -0,0 +1,79 @@
+"""
+SnowGuard - Bulk Upload Validation
+Column-wise validation of permission rows uploaded from CSV
+"""
+
+import numpy as np
+import pandas as pd
+
+VALID_PERMISSION_TYPES = ['SELECT', 'INSERT', 'UPDATE', 'DELETE', 'ALL']
+
+REQUIRED_COLUMNS = ['database_name', 'schema_name', 'table_name', 'role_name', 'permission_type', 'effective_start_date']
+
+DATE_COLUMNS = ['effective_start_date', 'effective_end_date']
+
+
+def is_blank(series):
+    """True where a value is missing or only whitespace."""
+    return series.isna() | series.astype(str).str.strip().eq('')
+
+
+def parse_dates(series):
+    """Parse a whole column of dates at once; unparseable values become NaT."""
+    # Fast path for the template's YYYY-MM-DD, then a per-value parse for the stragglers only
+    parsed = pd.to_datetime(series, errors='coerce', format='ISO8601')
+    retry = parsed.isna() & ~is_blank(series)
+    if retry.any():
+        parsed[retry] = pd.to_datetime(series[retry], errors='coerce', format='mixed')
+    return parsed
+
+
+def validate_permission_rows(upload_df, row_offset=2):
+    """
+    Validate uploaded permission rows without iterating over them.
+
+    Returns `(valid_df, error_report)`. `valid_df` holds the rows that passed with
+    parsed dates and upper-cased permission types. `error_report` has one row per
+    failing input row with its CSV line number (`row`, header is line 1 when
+    `row_offset=2`) and the messages joined by " | " (`errors`).
+    """
+    checks = []
+
+    # Check required fields
+    for col in REQUIRED_COLUMNS:
+        if col in upload_df.columns:
+            missing = is_blank(upload_df[col]).to_numpy()
+        else:
+            missing = np.ones(len(upload_df), dtype=bool)
+        checks.append(np.where(missing, f"Missing required field: {col}", None))
+
+    # Validate permission type
+    if 'permission_type' in upload_df.columns:
+        perm = upload_df['permission_type'].astype(str)
+        invalid = ~perm.str.upper().isin(VALID_PERMISSION_TYPES).to_numpy()
+        messages = ("Invalid permission type: " + perm + f". Must be one of {VALID_PERMISSION_TYPES}").to_numpy()
+        checks.append(np.where(invalid, messages, None))
+
+    # Validate dates (blank end dates are allowed; blank start dates are caught above)
+    parsed_dates = {}
+    for col in DATE_COLUMNS:
+        if col in upload_df.columns:
+            parsed_dates[col] = parse_dates(upload_df[col])
+            invalid = (parsed_dates[col].isna() & ~is_blank(upload_df[col])).to_numpy()
+            checks.append(np.where(invalid, f"Invalid {col} format (use YYYY-MM-DD)", None))
+
+    messages = np.column_stack(checks)
+    error_mask = pd.notna(messages).any(axis=1)
+
+    # Only failing rows need their messages stitched together
+    error_report = pd.DataFrame({
+        'row': np.flatnonzero(error_mask) + row_offset,
+        'errors': [' | '.join(m for m in row if m is not None) for row in messages[error_mask]],
+    })
+
+    valid_df = upload_df[~error_mask].copy()
+    for col, parsed in parsed_dates.items():
+        valid_df[col] = parsed[~error_mask]
+    if 'permission_type' in valid_df.columns:
+        valid_df['permission_type'] = valid_df['permission_type'].astype(str).str.upper()
+    return valid_df, error_report
@@ -0,0 +1,9 @@
+"""
+SnowGuard - Test Configuration
+Puts app/ on sys.path so the tests import snowguard the way the app does
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
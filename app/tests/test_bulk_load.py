@@ -0,0 +1,53 @@
+"""
+SnowGuard - Bulk Metadata Load Tests
+"""
+
+from datetime import datetime
+
+import pandas as pd
+
+from snowguard import bulk_load
+from snowguard.bulk_load import bulk_load_metadata, fetch_loaded_rows
+from snowguard.local import LocalAccount
+
+
+def _batch(tables):
+    return pd.DataFrame({
+        'database_name': 'DB', 'schema_name': 'S', 'table_name': tables, 'role_name': 'R',
+        'permission_type': 'SELECT', 'effective_start_date': '2025-01-01', 'effective_end_date': None,
+        'description': None,
+    })
+
+
+def test_loaded_rows_round_trip():
+    pool = LocalAccount().pool()
+    stats = bulk_load_metadata(pool, [_batch(['T1', 'T2']), _batch(['T3'])], 3, batch_size=2)
+    assert (stats['rows'], stats['batches'], stats['after_rbac_id']) == (3, 2, 0)
+
+    loaded = fetch_loaded_rows(pool, stats)
+    assert loaded['table_name'].tolist() == ['T1', 'T2', 'T3']
+    assert loaded['rbac_id'].tolist() == [1, 2, 3]
+
+
+def test_loads_sharing_a_timestamp_read_back_separately(monkeypatch):
+    # Two imports stamped with the same load_ts must still read back only their own rows
+    class FrozenClock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2025, 6, 1, 12, 0, 0)
+
+    monkeypatch.setattr(bulk_load, 'datetime', FrozenClock)
+    pool = LocalAccount().pool()
+    first = bulk_load_metadata(pool, [_batch(['T1', 'T2'])], 2)
+    second = bulk_load_metadata(pool, [_batch(['T3'])], 1)
+    assert first['load_ts'] == second['load_ts']
+
+    assert fetch_loaded_rows(pool, second)['table_name'].tolist() == ['T3']
+
+
+def test_copy_loads_go_through_the_pool_copy_fn(monkeypatch):
+    monkeypatch.setattr(bulk_load, 'COPY_MIN_ROWS', 2)
+    pool = LocalAccount().pool()
+    stats = bulk_load_metadata(pool, [_batch(['T1', 'T2'])], 2)
+    assert (stats['method'], stats['batches']) == ('copy', 1)
+    assert fetch_loaded_rows(pool, stats)['table_name'].tolist() == ['T1', 'T2']
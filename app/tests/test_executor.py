@@ -0,0 +1,145 @@
+"""
+SnowGuard - Grant Executor Tests
+"""
+
+import pandas as pd
+import pytest
+
+from snowguard.backends import FixtureBackend
+from snowguard.executor import apply_plan
+from snowguard.local import LocalBackend
+from snowguard.planner import (
+    ALL_TABLE_PRIVILEGES, GRANT_KEY, coalesce_privileges, collapse_schema_grants, managed_schemas,
+    plan_reconciliation, reconcile_future_grants
+)
+
+AS_OF = '2025-06-01'
+
+
+def _metadata():
+    rows = [('DB', 'S', 'T1', 'R', 'SELECT'), ('DB', 'S', 'T2', 'R', 'SELECT'), ('DB', 'X', 'T3', 'R', 'ALL')]
+    return pd.DataFrame([
+        {'rbac_id': i + 1, 'database_name': db, 'schema_name': schema, 'table_name': table, 'role_name': role,
+         'permission_type': privilege, 'effective_start_date': pd.Timestamp('2025-01-01'),
+         'effective_end_date': None, 'description': None, 'record_status_cd': 'A', 'record_created_by': 'TEST',
+         'record_create_ts': pd.Timestamp('2025-01-01'), 'record_updated_by': 'TEST',
+         'record_updated_ts': pd.Timestamp('2025-01-01')}
+        for i, (db, schema, table, role, privilege) in enumerate(rows)
+    ])
+
+
+def _plan(backend, grant_future=False):
+    metadata = backend.load_metadata()
+    plan = plan_reconciliation(metadata, backend.load_grants(), as_of=AS_OF)
+    schemas = managed_schemas(metadata)
+    catalog = backend.load_catalog([database for database, _ in schemas])
+    plan = collapse_schema_grants(plan, metadata, catalog, as_of=AS_OF)
+    plan = reconcile_future_grants(plan, metadata, catalog, backend.load_future_grants(schemas), as_of=AS_OF,
+                                   grant_future=grant_future)
+    return coalesce_privileges(plan)
+
+
+def _round_trip(backend, grant_future=False, **apply_options):
+    plan = _plan(backend, grant_future)
+    assert not plan.empty
+    results, summary = apply_plan(backend, plan, **apply_options)
+    assert summary['failed'] == 0
+    assert (results['execution_status'] == 'SUCCESS').all()
+    assert _plan(backend, grant_future).empty
+
+
+def test_apply_then_replan_is_empty_on_local_account():
+    backend = LocalBackend()
+    backend.account.seed(_metadata())
+    _round_trip(backend)
+    audit = backend.load_audit_log()
+    assert audit['operation_type'].tolist()[0] == 'PROCESS_START'
+    assert audit['operation_type'].tolist()[-1] == 'PROCESS_END'
+
+
+def test_concurrent_apply_then_replan_is_empty_on_local_account():
+    backend = LocalBackend()
+    backend.account.seed(_metadata())
+    _round_trip(backend, concurrency=4)
+
+
+def test_stale_grants_are_revoked_on_local_account():
+    backend = LocalBackend()
+    stale = pd.DataFrame([('DB', 'S', 'T1', 'R', 'INSERT')], columns=GRANT_KEY)
+    backend.account.seed(_metadata(), grants=stale)
+    plan = _plan(backend)
+    assert 'REVOKE INSERT ON TABLE DB.S.T1 FROM ROLE R' in set(plan['sql_statement'])
+    _round_trip(backend)
+
+
+def test_future_grants_are_revoked_once_coverage_shrinks_on_local_account():
+    backend = LocalBackend()
+    backend.account.seed(_metadata())
+    _round_trip(backend, grant_future=True)
+    assert backend.load_future_grants([('DB', 'S')])['privilege'].tolist() == ['SELECT']
+
+    backend.execute("UPDATE audit.adw_rbac_metadata SET effective_end_date = '2025-05-01' WHERE table_name = 'T2'")
+    plan = _plan(backend, grant_future=True)
+    assert 'REVOKE SELECT ON FUTURE TABLES IN SCHEMA DB.S FROM ROLE R' in set(plan['sql_statement'])
+    _round_trip(backend, grant_future=True)
+    assert backend.load_future_grants([('DB', 'S')]).empty
+
+
+def test_failed_statements_are_reported():
+    metadata = _metadata()
+    backend = FixtureBackend(metadata, fail_on={f"GRANT {', '.join(ALL_TABLE_PRIVILEGES)} ON TABLE DB.X.T3 TO ROLE R"})
+    results, summary = apply_plan(backend, _plan(backend))
+    assert summary['failed'] == 6
+    assert set(results.loc[results['execution_status'] == 'FAILED', 'table_name']) == {'T3'}
+    assert not _plan(backend).empty
+
+
+class _BatchRecordingBackend(FixtureBackend):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.audit_batches = []
+
+    def write_audit(self, rows):
+        self.audit_batches.append(len(rows))
+        super().write_audit(rows)
+
+
+class _UncancellableBackend(FixtureBackend):
+    def cancel(self, query_id):
+        raise RuntimeError('connection lost')
+
+
+def test_audit_rows_are_written_every_batch_size_rows():
+    backend = _BatchRecordingBackend(_metadata())
+    plan = _plan(backend)
+    apply_plan(backend, plan, audit_batch_size=2)
+    assert len(backend.audit_rows) == len(plan) + 2
+    assert max(backend.audit_batches) == 2
+    assert len(backend.audit_batches) == -(-len(backend.audit_rows) // 2)
+    assert [row['operation_type'] for row in backend.audit_rows[::len(backend.audit_rows) - 1]] == \
+        ['PROCESS_START', 'PROCESS_END']
+
+
+def test_completed_statements_are_audited_when_the_run_aborts():
+    backend = FixtureBackend(_metadata())
+    plan = _plan(backend)
+
+    def progress(fraction, done):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        apply_plan(backend, plan, progress=progress)
+    statement = backend.executed[0]
+    assert backend.executed == [statement]
+    assert {row['sql_statement'] for row in backend.audit_rows[1:-1]} == {statement}
+    assert (backend.audit_rows[-1]['operation_type'], backend.audit_rows[-1]['execution_status']) == \
+        ('PROCESS_END', 'FAILED')
+
+
+def test_failed_cancel_is_recorded_and_the_run_carries_on():
+    backend = _UncancellableBackend(_metadata(), latency=0.5)
+    plan = _plan(backend)
+    results, summary = apply_plan(backend, plan, concurrency=4, timeout=0.05)
+    assert summary['failed'] == len(plan)
+    assert results['error_message'].str.contains('cancel failed: connection lost').all()
+    assert backend.audit_rows[-1]['execution_status'] == 'SUCCESS'
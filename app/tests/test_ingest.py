@@ -0,0 +1,40 @@
+"""
+SnowGuard - Upload Ingest Tests
+"""
+
+import gc
+import io
+import os
+
+from snowguard.ingest import ingest_permission_csv
+
+CSV = (
+    "database_name,schema_name,table_name,role_name,permission_type,effective_start_date,effective_end_date,description\n"
+    "DB,S,T1,R,SELECT,2025-01-01,,ok\n"
+    "DB,S,T2,R,SELECT,not-a-date,,bad start date\n"
+)
+
+
+def test_cleanup_removes_spill_files_once():
+    ingest = ingest_permission_csv(io.StringIO(CSV))
+    assert (ingest.valid_rows, ingest.error_rows) == (1, 1)
+    assert sorted(os.listdir(ingest.workdir)) == ['valid_rows.parquet', 'validation_errors.csv']
+
+    ingest.cleanup()
+    ingest.cleanup()
+    assert not os.path.exists(ingest.workdir)
+
+
+def test_dropped_result_removes_its_spill_files():
+    # A session that ends without importing or cancelling still leaves nothing behind
+    ingest = ingest_permission_csv(io.StringIO(CSV))
+    workdir = ingest.workdir
+    del ingest
+    gc.collect()
+    assert not os.path.exists(workdir)
+
+
+def test_cleanup_keeps_other_files_in_a_given_workdir(tmp_path):
+    (tmp_path / 'keep.txt').write_text('x')
+    ingest_permission_csv(io.StringIO(CSV), workdir=str(tmp_path)).cleanup()
+    assert os.listdir(tmp_path) == ['keep.txt']
@@ -0,0 +1,27 @@
+"""
+SnowGuard - Effective Date Index Tests
+"""
+
+import pandas as pd
+
+from snowguard.intervals import EffectiveDateIndex
+from snowguard.synthetic import synthetic_metadata
+
+
+def test_timeline_matches_active_count():
+    metadata = synthetic_metadata(roles=20, tables=200, metadata_rows=2_000)
+    index = EffectiveDateIndex(metadata)
+    timeline = index.timeline('2024-01-01', '2026-12-31', freq='MS')
+    expected = [index.active_count(day) for day in timeline['date']]
+    assert timeline['active_permissions'].tolist() == expected
+    assert any(expected)
+
+
+def test_timeline_counts_open_and_closed_ranges():
+    metadata = pd.DataFrame({
+        'record_status_cd': ['A', 'A', 'A', 'I'],
+        'effective_start_date': [pd.Timestamp('2025-01-01'), pd.Timestamp('2025-01-03'), None, pd.Timestamp('2025-01-01')],
+        'effective_end_date': [None, pd.Timestamp('2025-01-04'), pd.Timestamp('2025-01-02'), None],
+    })
+    timeline = EffectiveDateIndex(metadata).timeline('2025-01-01', '2025-01-05')
+    assert timeline['active_permissions'].tolist() == [2, 2, 2, 2, 1]
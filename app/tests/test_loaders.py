@@ -0,0 +1,22 @@
+"""
+SnowGuard - Loader Tests
+"""
+
+from datetime import datetime
+
+from snowguard.loaders import build_audit_filter
+
+
+def test_audit_filter_parameterises_every_predicate():
+    where, params = build_audit_filter(['GRANT', 'REVOKE'], ['FAILED'], since=datetime(2025, 6, 1))
+    assert where == (
+        " WHERE operation_type IN (%(operation_type_0)s, %(operation_type_1)s)"
+        " AND execution_status IN (%(execution_status_0)s)"
+        " AND execution_time >= %(since)s"
+    )
+    assert params == {'operation_type_0': 'GRANT', 'operation_type_1': 'REVOKE',
+                      'execution_status_0': 'FAILED', 'since': datetime(2025, 6, 1)}
+
+
+def test_audit_filter_without_filters_is_empty():
+    assert build_audit_filter() == ("", {})
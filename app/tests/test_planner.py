@@ -0,0 +1,139 @@
+"""
+SnowGuard - Reconciliation Planner Tests
+"""
+
+import pandas as pd
+
+from snowguard.planner import (
+    ALL_TABLE_PRIVILEGES, GRANT_KEY, SCHEMA_GROUP, TABLE_KEY, coalesce_privileges, collapse_schema_grants,
+    plan_reconciliation, plan_summary, reconcile_future_grants
+)
+
+AS_OF = '2025-06-01'
+
+
+def _metadata(rows):
+    return pd.DataFrame([
+        {'rbac_id': i + 1, 'database_name': db, 'schema_name': schema, 'table_name': table, 'role_name': role,
+         'permission_type': privilege, 'effective_start_date': pd.Timestamp('2025-01-01'),
+         'effective_end_date': None, 'record_status_cd': 'A'}
+        for i, (db, schema, table, role, privilege) in enumerate(rows)
+    ])
+
+
+def _grants(rows):
+    return pd.DataFrame(rows, columns=GRANT_KEY)
+
+
+def test_plan_summary_unchanged_follows_plan_filters():
+    metadata = _metadata([
+        ('PROD', 'S', 'T1', 'R', 'SELECT'),
+        ('PROD', 'S', 'T2', 'R', 'SELECT'),
+        ('DEV', 'S', 'T1', 'R', 'SELECT'),
+    ])
+    actual = _grants([('DEV', 'S', 'T1', 'R', 'SELECT')])
+    plan = plan_reconciliation(metadata, actual, as_of=AS_OF, database='prod')
+    summary = plan_summary(plan, metadata, as_of=AS_OF, database='prod')
+    assert summary['grants'] == 2
+    assert summary['unchanged'] == 0
+
+    plan = plan_reconciliation(metadata, actual, as_of=AS_OF)
+    assert plan_summary(plan, metadata, as_of=AS_OF)['unchanged'] == 1
+
+
+def test_plan_reconciliation_grants_missing_and_revokes_stale():
+    metadata = _metadata([
+        ('db', 's', 't1', 'r', 'SELECT'),
+        ('DB', 'S', 'T2', 'R', 'ALL'),
+    ])
+    actual = _grants([
+        ('DB', 'S', 'T1', 'R', 'SELECT'),
+        ('DB', 'S', 'T1', 'R', 'INSERT'),
+        ('DB', 'S', 'T2', 'R', 'SELECT'),
+        ('DB', 'S', 'T2', 'R', 'OWNERSHIP'),
+        ('DB', 'S', 'T3', 'OTHER', 'SELECT'),
+    ])
+    plan = plan_reconciliation(metadata, actual, as_of=AS_OF)
+    grants = plan[plan['action'] == 'GRANT']
+    assert sorted(grants['privilege']) == sorted(set(ALL_TABLE_PRIVILEGES) - {'SELECT'})
+    assert set(grants['table_name']) == {'T2'}
+    # Only managed privileges on metadata objects are revoked
+    revokes = plan[plan['action'] == 'REVOKE']
+    assert revokes['sql_statement'].tolist() == ['REVOKE INSERT ON TABLE DB.S.T1 FROM ROLE R']
+
+
+def test_plan_reconciliation_skips_inactive_and_expired_rows():
+    metadata = _metadata([('DB', 'S', 'T1', 'R', 'SELECT'), ('DB', 'S', 'T2', 'R', 'SELECT')])
+    metadata.loc[0, 'record_status_cd'] = 'I'
+    metadata.loc[1, 'effective_end_date'] = pd.Timestamp('2025-05-31')
+    assert plan_reconciliation(metadata, _grants([]), as_of=AS_OF).empty
+
+
+def test_collapse_schema_grants_needs_full_catalog_coverage():
+    metadata = _metadata([('DB', 'S', t, 'R', 'SELECT') for t in ('T1', 'T2', 'T3')])
+    plan = plan_reconciliation(metadata, _grants([]), as_of=AS_OF)
+
+    catalog = pd.DataFrame([('DB', 'S', t) for t in ('T1', 'T2', 'T3')], columns=TABLE_KEY)
+    collapsed = collapse_schema_grants(plan, metadata, catalog, as_of=AS_OF)
+    tables = collapsed[collapsed['table_name'].notna()]
+    assert len(tables) == 3
+    assert set(tables['sql_statement']) == {'GRANT SELECT ON ALL TABLES IN SCHEMA DB.S TO ROLE R'}
+    # Future tables are left to reconcile_future_grants
+    assert len(collapsed) == 3
+
+    # A table the metadata does not cover keeps the per-table statements
+    catalog.loc[len(catalog)] = ('DB', 'S', 'T4')
+    kept = collapse_schema_grants(plan, metadata, catalog, as_of=AS_OF)
+    assert kept['sql_statement'].tolist() == plan['sql_statement'].tolist()
+
+
+def test_coalesce_privileges_merges_statements_per_target():
+    metadata = _metadata([
+        ('DB', 'S', 'T1', 'R', 'SELECT'),
+        ('DB', 'S', 'T1', 'R', 'INSERT'),
+        ('DB', 'S', 'T2', 'R', 'ALL'),
+    ])
+    plan = coalesce_privileges(plan_reconciliation(metadata, _grants([]), as_of=AS_OF))
+    assert len(plan) == 2 + len(ALL_TABLE_PRIVILEGES)
+    statements = set(plan['sql_statement'])
+    assert statements == {
+        'GRANT SELECT, INSERT ON TABLE DB.S.T1 TO ROLE R',
+        'GRANT ' + ', '.join(ALL_TABLE_PRIVILEGES) + ' ON TABLE DB.S.T2 TO ROLE R',
+    }
+
+
+def test_plan_summary_counts_collapsed_grants_as_planned():
+    metadata = _metadata([('DB', 'S', t, 'R', 'SELECT') for t in ('T1', 'T2')])
+    catalog = pd.DataFrame([('DB', 'S', 'T1'), ('DB', 'S', 'T2')], columns=TABLE_KEY)
+    plan = collapse_schema_grants(plan_reconciliation(metadata, _grants([]), as_of=AS_OF), metadata, catalog,
+                                  as_of=AS_OF)
+    summary = plan_summary(coalesce_privileges(plan), metadata, as_of=AS_OF)
+    assert summary == {'grants': 2, 'revokes': 0, 'statements': 1, 'unchanged': 0}
+
+
+def test_future_grants_are_opt_in_and_skip_ones_in_place():
+    metadata = _metadata([('DB', 'S', t, 'R', 'SELECT') for t in ('T1', 'T2')])
+    catalog = pd.DataFrame([('DB', 'S', 'T1'), ('DB', 'S', 'T2')], columns=TABLE_KEY)
+    none = pd.DataFrame(columns=SCHEMA_GROUP)
+    empty = plan_reconciliation(metadata, _grants([('DB', 'S', t, 'R', 'SELECT') for t in ('T1', 'T2')]), as_of=AS_OF)
+
+    assert reconcile_future_grants(empty, metadata, catalog, none, as_of=AS_OF).empty
+    plan = reconcile_future_grants(empty, metadata, catalog, none, as_of=AS_OF, grant_future=True)
+    assert plan['sql_statement'].tolist() == ['GRANT SELECT ON FUTURE TABLES IN SCHEMA DB.S TO ROLE R']
+    assert plan['table_name'].isna().all()
+
+    held = pd.DataFrame([('DB', 'S', 'R', 'SELECT')], columns=SCHEMA_GROUP)
+    assert reconcile_future_grants(empty, metadata, catalog, held, as_of=AS_OF, grant_future=True).empty
+
+
+def test_stale_future_grants_are_revoked():
+    metadata = _metadata([('DB', 'S', t, 'R', 'SELECT') for t in ('T1', 'T2')])
+    metadata.loc[1, 'effective_end_date'] = pd.Timestamp('2025-05-31')
+    catalog = pd.DataFrame([('DB', 'S', 'T1'), ('DB', 'S', 'T2')], columns=TABLE_KEY)
+    held = pd.DataFrame([('DB', 'S', 'R', 'SELECT'), ('DB', 'S', 'OTHER', 'SELECT')], columns=SCHEMA_GROUP)
+    plan = plan_reconciliation(metadata, _grants([('DB', 'S', 'T1', 'R', 'SELECT')]), as_of=AS_OF)
+
+    # T2 expired, so the schema is no longer fully covered; OTHER was never managed
+    plan = reconcile_future_grants(plan, metadata, catalog, held, as_of=AS_OF, grant_future=True)
+    assert plan['sql_statement'].tolist() == ['REVOKE SELECT ON FUTURE TABLES IN SCHEMA DB.S FROM ROLE R']
+    assert plan_summary(plan, metadata, as_of=AS_OF)['revokes'] == 1
@@ -0,0 +1,84 @@
+"""
+SnowGuard - Expiry Scheduler Tests
+"""
+
+import pandas as pd
+
+from snowguard.backends import FixtureBackend
+from snowguard.local import LocalBackend
+from snowguard.scheduler import DEFAULT_SCHEDULER, ExpiryScheduler, ManualClock
+
+
+def _metadata():
+    # Starts on 2025-03-02, last day in effect 2025-03-04, so it ends on 2025-03-05
+    return pd.DataFrame([{
+        'rbac_id': 1, 'database_name': 'DB', 'schema_name': 'S', 'table_name': 'T', 'role_name': 'R',
+        'permission_type': 'SELECT', 'effective_start_date': pd.Timestamp('2025-03-02'),
+        'effective_end_date': pd.Timestamp('2025-03-04'), 'record_status_cd': 'A',
+    }])
+
+
+def _tick(backend, clock, since=None):
+    # Rebuilt every time, as the Settings page and a nightly `tick` command do
+    return ExpiryScheduler(backend, clock=clock).load(_metadata(), since).tick()
+
+
+def test_boundaries_fire_once():
+    backend = FixtureBackend(_metadata())
+    clock = ManualClock('2025-03-01')
+    assert _tick(backend, clock) == (None, None)
+    assert backend.load_last_tick(DEFAULT_SCHEDULER) == pd.Timestamp('2025-03-01')
+
+    clock.advance(days=1)
+    _, summary = _tick(backend, clock)
+    assert summary['boundaries'] == 1 and summary['success'] == 1
+    assert backend.executed == ['GRANT SELECT ON TABLE DB.S.T TO ROLE R']
+
+    # Same day again, then a day with nothing due: no repeated GRANT
+    assert _tick(backend, clock) == (None, None)
+    clock.advance(days=1)
+    assert _tick(backend, clock) == (None, None)
+
+    clock.advance(days=3)
+    _, summary = _tick(backend, clock)
+    assert summary['boundaries'] == 1
+    assert backend.executed[1:] == ['REVOKE SELECT ON TABLE DB.S.T FROM ROLE R']
+    assert _tick(backend, clock) == (None, None)
+    assert len(backend.executed) == 2
+
+
+def test_missed_days_apply_every_boundary_once():
+    backend = FixtureBackend(_metadata())
+    clock = ManualClock('2025-03-01')
+    _tick(backend, clock)
+    clock.advance(days=10)
+    # Started and ended since the last tick: no grant, only the (harmless) revoke
+    _, summary = _tick(backend, clock)
+    assert summary['boundaries'] == 2
+    assert backend.executed == ['REVOKE SELECT ON TABLE DB.S.T FROM ROLE R']
+    assert backend.load_last_tick(DEFAULT_SCHEDULER) == pd.Timestamp('2025-03-11')
+    assert _tick(backend, clock) == (None, None)
+
+
+def test_dry_run_does_not_save_the_tick():
+    backend = FixtureBackend(_metadata())
+    clock = ManualClock('2025-03-02')
+    ExpiryScheduler(backend, clock=clock).load(_metadata(), '2025-03-01').tick(dry_run=True)
+    assert backend.load_last_tick(DEFAULT_SCHEDULER) is None
+    assert backend.executed == []
+
+
+def test_last_tick_is_saved_in_the_local_account():
+    backend = LocalBackend()
+    backend.account.seed(_metadata().assign(
+        description=None, record_created_by='TEST', record_create_ts=pd.Timestamp('2025-01-01'),
+        record_updated_by='TEST', record_updated_ts=pd.Timestamp('2025-01-01')
+    ))
+    clock = ManualClock('2025-03-02')
+    _, summary = _tick(backend, clock, since='2025-03-01')
+    assert summary['success'] == 1
+    assert backend.load_last_tick(DEFAULT_SCHEDULER) == pd.Timestamp('2025-03-02')
+    assert _tick(backend, clock) == (None, None)
+    clock.advance(days=1)
+    assert _tick(backend, clock) == (None, None)
+    assert backend.load_last_tick(DEFAULT_SCHEDULER) == pd.Timestamp('2025-03-03')
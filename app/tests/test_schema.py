@@ -0,0 +1,30 @@
+"""
+SnowGuard - Frame Schema Tests
+"""
+
+import pandas as pd
+
+from snowguard.schema import METADATA_SCHEMA, apply_schema, frame_memory, untyped_memory
+
+
+def _metadata(rows=200):
+    return pd.DataFrame({
+        'rbac_id': range(1, rows + 1),
+        'database_name': ['DB'] * rows,
+        'role_name': [f"ROLE_{i % 4}" for i in range(rows)],
+        'table_name': [f"TABLE_{i}" for i in range(rows)],
+    })
+
+
+def test_untyped_memory_is_the_footprint_of_an_untyped_frame():
+    frame = _metadata()
+    assert untyped_memory(frame) == frame_memory(frame)
+
+
+def test_untyped_memory_of_a_typed_frame_matches_the_frame_it_came_from():
+    frame = _metadata()
+    typed = apply_schema(frame, METADATA_SCHEMA)
+    assert typed['role_name'].dtype == 'category'
+    assert typed['rbac_id'].dtype == 'int32'
+    assert untyped_memory(typed) == frame_memory(frame)
+    assert frame_memory(typed) < untyped_memory(typed)
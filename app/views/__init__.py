@@ -0,0 +1,4 @@
+"""
+SnowGuard - Dashboard Pages
+One module per sidebar page; main.py imports only the page being shown
+"""
@@ -0,0 +1,244 @@
+"""
+SnowGuard - Add Permission Page
+Single-permission form and validated bulk CSV upload
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from snowguard.bulk_load import bulk_load_metadata, fetch_loaded_rows
+from snowguard.config import config_value
+from snowguard.ingest import ingest_permission_csv
+from snowguard.schema import METADATA_SCHEMA, concat_frames
+from snowguard.spans import span
+from views.session import get_app_config, get_connection_pool, get_session_pool, wait_for_metadata
+
+
+# Valid bulk-upload rows shown for review; the rest stay in the spill file until import
+BULK_PREVIEW_ROWS = 1_000
+
+
+def _start_import():
+    st.session_state.bulk_import_running = True
+
+
+def _discard_ingest():
+    # Spill files go as soon as their upload is replaced, removed or imported
+    cached = st.session_state.pop('bulk_ingest', None)
+    if cached is not None and cached[1] is not None:
+        cached[1].cleanup()
+
+
+def _import_valid_rows(ingest):
+    """Write the validated rows to the metadata table (or this session's copy); True once they are in."""
+    if get_session_pool() is not None:
+        # Persist to audit.adw_rbac_metadata; Snowflake assigns rbac_id from the IDENTITY column
+        max_batch_size = config_value(get_app_config(), 'performance', 'max_batch_size', 1000, int)
+        progress_bar = st.progress(0.0, text="Loading permissions into Snowflake...")
+        try:
+            stats = bulk_load_metadata(
+                get_connection_pool(),
+                ingest.iter_valid_batches(),
+                ingest.valid_rows,
+                batch_size=max_batch_size,
+                progress=lambda fraction, rows: progress_bar.progress(fraction, text=f"Loaded {rows:,} rows...")
+            )
+            loaded_df = fetch_loaded_rows(get_connection_pool(), stats)
+            st.session_state.metadata = concat_frames(st.session_state.metadata, loaded_df, METADATA_SCHEMA)
+            st.success(
+                f"✅ Successfully imported {stats['rows']} permissions! "
+                f"({stats['rows_per_sec']:,.0f} rows/sec over {stats['batches']} {stats['method'].upper()} batch(es))"
+            )
+            return True
+        except Exception as e:
+            # The spill files are kept so the import can be retried
+            st.error(f"❌ Bulk load failed: {e}")
+            return False
+        finally:
+            progress_bar.empty()
+    else:
+        # No Snowflake connection: the import only lives in this session
+        new_df = ingest.read_valid_rows()
+        new_df['rbac_id'] = range(st.session_state.metadata['rbac_id'].max() + 1, 
+                                   st.session_state.metadata['rbac_id'].max() + 1 + len(new_df))
+        new_df['record_status_cd'] = 'A'
+        new_df['record_created_by'] = 'BULK_UPLOAD'
+        new_df['record_create_ts'] = datetime.now()
+        new_df['record_updated_by'] = 'BULK_UPLOAD'
+        new_df['record_updated_ts'] = datetime.now()
+
+        st.session_state.metadata = concat_frames(st.session_state.metadata, new_df, METADATA_SCHEMA)
+        st.success(f"✅ Successfully imported {len(new_df)} permissions!")
+        return True
+
+
+def render():
+    st.markdown('<div class="main-header">📝 Add New Permission</div>', unsafe_allow_html=True)
+    wait_for_metadata()
+    
+    tab1, tab2 = st.tabs(["Single Permission", "Bulk Upload"])
+    
+    with tab1:
+        with st.form("add_permission_form"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                database = st.text_input("Database Name", placeholder="e.g., ADW_PROD")
+                schema = st.text_input("Schema Name", placeholder="e.g., ADS")
+                table = st.text_input("Table Name", placeholder="e.g., T_MBR_DIM")
+            
+            with col2:
+                role = st.text_input("Role Name", placeholder="e.g., FIN_ANALYST_ROLE")
+                permission = st.selectbox("Permission Type", ["SELECT", "INSERT", "UPDATE", "DELETE", "ALL"])
+                description = st.text_area("Description", placeholder="Business justification and context")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                start_date = st.date_input("Effective Start Date", value=datetime.now())
+            with col2:
+                end_date = st.date_input("Effective End Date (Optional)", value=None)
+            
+            submitted = st.form_submit_button("➕ Add Permission")
+    
+    with tab2:
+        st.subheader("📤 Bulk Upload from CSV")
+        
+        # Template download
+        col1, col2 = st.columns([3, 1])
+        with col2:
+            template_df = pd.DataFrame({
+                'database_name': ['ADW_PROD', 'ADW_PROD'],
+                'schema_name': ['ADS', 'REPORTING'],
+                'table_name': ['T_MBR_DIM', 'V_SUMMARY'],
+                'role_name': ['FIN_ANALYST_ROLE', 'EXEC_ROLE'],
+                'permission_type': ['SELECT', 'SELECT'],
+                'effective_start_date': ['2025-01-01', '2025-01-01'],
+                'effective_end_date': ['', '2025-12-31'],
+                'description': ['Member dimension access', 'Executive reports']
+            })
+            template_csv = template_df.to_csv(index=False)
+            st.download_button("📋 Download Template", template_csv, "rbac_template.csv", "text/csv")
+        
+        # File upload
+        uploaded_file = st.file_uploader("Upload CSV file", type=['csv'])
+        if uploaded_file is None and 'bulk_ingest' in st.session_state:
+            # The file was removed from the uploader: the upload is cancelled
+            _discard_ingest()
+        
+        if uploaded_file is not None:
+            try:
+                # Validation
+                st.subheader("Step 1: Validate Rows")
+                
+                # Stream the file through validation once per upload; reruns reuse the spill files
+                ingest_key = (uploaded_file.name, uploaded_file.size, getattr(uploaded_file, 'file_id', None))
+                cached = st.session_state.get('bulk_ingest')
+                if cached is None or cached[0] != ingest_key:
+                    _discard_ingest()
+                    progress_bar = st.progress(0.0, text="Validating rows...")
+                    uploaded_file.seek(0)
+                    with span("upload validation", 'transform') as timing:
+                        ingest = ingest_permission_csv(
+                            uploaded_file,
+                            progress=lambda fraction, rows: progress_bar.progress(fraction, text=f"Validated {rows:,} rows...")
+                        )
+                        timing.rows = ingest.total_rows
+                    progress_bar.empty()
+                    st.session_state.bulk_ingest = (ingest_key, ingest)
+                ingest = st.session_state.bulk_ingest[1]
+                
+                if ingest is None:
+                    # Imported on an earlier run; its spill files are already gone
+                    st.info("✅ This file has been imported. Upload another file to add more permissions.")
+                else:
+                    st.success(f"✅ File uploaded: {ingest.total_rows} rows")
+                    
+                    # Display validation results
+                    if ingest.error_rows:
+                        st.warning(f"⚠️ {ingest.error_rows} row(s) with errors out of {ingest.total_rows}")
+                        
+                        # Summarise errors by message instead of one expander per bad row
+                        error_summary = pd.DataFrame(ingest.error_summary.most_common(20), columns=['error', 'rows'])
+                        st.dataframe(error_summary, use_container_width=True, hide_index=True)
+                        
+                        with st.expander(f"🔴 Error details (first {len(ingest.error_preview)} of {ingest.error_rows})"):
+                            st.dataframe(ingest.error_preview, use_container_width=True, hide_index=True)
+                        
+                        # Download error report
+                        with open(ingest.error_path, 'rb') as error_file:
+                            st.download_button("📥 Download Error Report", error_file, "validation_errors.csv", "text/csv")
+                    
+                    if ingest.valid_rows:
+                        st.success(f"✅ {ingest.valid_rows} valid row(s) ready to import")
+                        
+                        # Step 2: Import confirmation
+                        st.subheader("Step 2: Review & Import")
+                        if ingest.valid_rows > BULK_PREVIEW_ROWS:
+                            st.caption(f"Showing the first {BULK_PREVIEW_ROWS:,} of {ingest.valid_rows:,} valid rows")
+                        st.dataframe(ingest.read_valid_rows(limit=BULK_PREVIEW_ROWS), use_container_width=True, hide_index=True)
+                        
+                        # The flag is set in the click callback, so the rerun that performs the
+                        # import already renders the button disabled and a second click can't
+                        # start an overlapping load
+                        importing = st.session_state.get('bulk_import_running', False)
+                        st.button("✅ Import Valid Rows", disabled=importing, on_click=_start_import)
+                        if importing:
+                            try:
+                                imported = _import_valid_rows(ingest)
+                            finally:
+                                st.session_state.bulk_import_running = False
+                            if imported:
+                                _discard_ingest()
+                                # Remember the file so the next rerun doesn't offer it for import again
+                                st.session_state.bulk_ingest = (ingest_key, None)
+                    else:
+                        st.error("❌ No valid rows to import. Please fix all errors and try again.")
+            
+            except Exception as e:
+                st.error(f"❌ Error reading file: {str(e)}")
+        
+        if submitted:
+            if database and schema and table and role:
+                new_id = st.session_state.metadata['rbac_id'].max() + 1
+                new_row = {
+                    'rbac_id': new_id,
+                    'database_name': database,
+                    'schema_name': schema,
+                    'table_name': table,
+                    'role_name': role,
+                    'permission_type': permission,
+                    'effective_start_date': start_date,
+                    'effective_end_date': end_date,
+                    'description': description,
+                    'record_status_cd': 'A'
+                }
+                st.session_state.metadata = concat_frames(st.session_state.metadata, pd.DataFrame([new_row]), METADATA_SCHEMA)
+                st.success(f"✅ Permission added successfully! (ID: {new_id})")
+            else:
+                st.error("❌ Please fill in all required fields")
+    
+    st.markdown("---")
+    st.subheader("Permission Guidelines")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("""
+        **Permission Types:**
+        - **SELECT**: Read access to table data
+        - **INSERT**: Add new rows to table
+        - **UPDATE**: Modify existing rows
+        - **DELETE**: Remove rows from table
+        - **ALL**: All available permissions
+        """)
+    
+    with col2:
+        st.markdown("""
+        **Best Practices:**
+        - Use principle of least privilege
+        - Provide clear business justification
+        - Use effective dates for temporary access
+        - Review permissions quarterly
+        - Document all access requests
+        """)
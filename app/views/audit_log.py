@@ -0,0 +1,142 @@
+"""
+SnowGuard - Audit Log Page
+Filtered, paginated view of the audit trail with export
+"""
+
+import io
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from snowguard.loaders import (
+    AUDIT_PAGE_COLUMNS, iter_audit_export, load_audit_filter_options, load_audit_page, load_audit_status_counts
+)
+from snowguard.spans import span
+from views.session import get_connection_pool, get_session_pool, wait_for_audit_log
+
+
+# Rows per Audit Log page; only the visible page is fetched from Snowflake
+AUDIT_PAGE_SIZE = 50
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_audit_filter_options():
+    """Distinct operation types/statuses for the Audit Log filters, shared across sessions."""
+    return load_audit_filter_options(get_connection_pool())
+
+
+def render():
+    st.markdown('<div class="main-header">🔍 Audit Log & Monitoring</div>', unsafe_allow_html=True)
+    
+    # Filters run in Snowflake when connected; the sample audit log is filtered in memory
+    audit_live = get_session_pool() is not None
+    if audit_live:
+        try:
+            op_options, status_options = get_audit_filter_options()
+        except Exception as e:
+            st.warning(f"⚠️ Could not query the audit log, showing the in-memory copy: {e}")
+            audit_live = False
+    if not audit_live:
+        op_options = wait_for_audit_log()['operation_type'].unique()
+        status_options = st.session_state.audit_log['execution_status'].unique()
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        op_filter = st.multiselect("Operation Type", op_options, default=None)
+    with col2:
+        status_filter = st.multiselect("Status", status_options, default=None)
+    with col3:
+        days_filter = st.selectbox("Time Range", ["Last 7 days", "Last 30 days", "All"])
+    
+    # Time filtering
+    now = datetime.now()
+    since = {"Last 7 days": now - timedelta(days=7), "Last 30 days": now - timedelta(days=30)}.get(days_filter)
+    audit_filters = {'operation_types': op_filter, 'statuses': status_filter, 'since': since}
+    
+    st.subheader("Complete Audit Trail")
+    
+    if audit_live:
+        # Keyset pagination: remember the log_id each page starts below; reset when filters change
+        filter_key = (tuple(op_filter), tuple(status_filter), days_filter)
+        if st.session_state.get('audit_page_filter_key') != filter_key:
+            st.session_state.audit_page_filter_key = filter_key
+            st.session_state.audit_page_cursors = [None]
+        cursors = st.session_state.audit_page_cursors
+        
+        try:
+            page_df, has_more = load_audit_page(get_connection_pool(), audit_filters, cursors[-1], AUDIT_PAGE_SIZE)
+            status_counts = load_audit_status_counts(get_connection_pool(), audit_filters)
+        except Exception as e:
+            st.error(f"❌ Could not query the audit log: {e}")
+            page_df, has_more, status_counts = pd.DataFrame(columns=AUDIT_PAGE_COLUMNS), False, {}
+        
+        # Page navigation runs in on_click callbacks so the cursor moves before the next query
+        nav1, nav2, nav3 = st.columns([1, 1, 4])
+        with nav1:
+            st.button("◀ Newer", disabled=len(cursors) == 1, on_click=cursors.pop)
+        with nav2:
+            st.button(
+                "Older ▶", disabled=not has_more or page_df.empty,
+                on_click=cursors.append, args=(page_df['log_id'].iloc[-1] if not page_df.empty else None,)
+            )
+        with nav3:
+            st.caption(f"Page {len(cursors)} · {AUDIT_PAGE_SIZE} rows per page")
+        
+        audit_display = page_df.drop(columns=['log_id'])
+        success_count = status_counts.get('SUCCESS', 0)
+        failed_count = status_counts.get('FAILED', 0)
+        total_ops = sum(status_counts.values())
+    else:
+        filtered_audit = st.session_state.audit_log.copy()
+        
+        if op_filter:
+            filtered_audit = filtered_audit[filtered_audit['operation_type'].isin(op_filter)]
+        if status_filter:
+            filtered_audit = filtered_audit[filtered_audit['execution_status'].isin(status_filter)]
+        if since is not None:
+            filtered_audit = filtered_audit[filtered_audit['execution_time'] >= since]
+        
+        audit_display = filtered_audit.sort_values('execution_time', ascending=False)[
+            ['operation_type', 'database_name', 'schema_name', 'table_name', 'role_name', 
+             'permission_type', 'execution_status', 'execution_time', 'record_created_by']
+        ].copy()
+        success_count = len(filtered_audit[filtered_audit['execution_status'] == 'SUCCESS'])
+        failed_count = len(filtered_audit[filtered_audit['execution_status'] == 'FAILED'])
+        total_ops = len(filtered_audit)
+    
+    audit_display['execution_time'] = pd.to_datetime(audit_display['execution_time']).dt.strftime('%Y-%m-%d %H:%M')
+    
+    with span("audit table", 'render', rows=len(audit_display)):
+        st.dataframe(audit_display, use_container_width=True, hide_index=True)
+    
+    st.markdown("---")
+    
+    # Audit statistics
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Successful Operations", success_count)
+    
+    with col2:
+        st.metric("Failed Operations", failed_count)
+    
+    with col3:
+        st.metric("Total Operations", total_ops)
+    
+    # Export audit log
+    if st.button("📥 Export Audit Log"):
+        if audit_live:
+            # Export covers every row matching the filters, not just the visible page;
+            # chunks are written as they arrive so the full result is only ever held as CSV text
+            with span("audit csv", 'export') as timing:
+                buffer, timing.rows = io.StringIO(), 0
+                for i, chunk in enumerate(iter_audit_export(get_connection_pool(), audit_filters)):
+                    chunk.to_csv(buffer, index=False, header=i == 0)
+                    timing.rows += len(chunk)
+                csv = buffer.getvalue()
+        else:
+            with span("audit csv", 'export', rows=len(audit_display)):
+                csv = audit_display.to_csv(index=False)
+        st.download_button("Download Audit CSV", csv, "audit_log.csv", "text/csv")
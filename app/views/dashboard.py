@@ -0,0 +1,123 @@
+"""
+SnowGuard - Dashboard Page
+Key permission metrics, charts and recent audit activity
+"""
+
+import plotly.express as px
+import streamlit as st
+
+from snowguard.aggregates import audit_aggregates, data_version, metadata_aggregates
+from snowguard.spans import span
+from views.session import wait_for_audit_log, wait_for_metadata
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def get_metadata_aggregates(version, _metadata):
+    """Dashboard metadata aggregates, shared across reruns and sessions while `version` holds."""
+    return metadata_aggregates(_metadata)
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def get_audit_aggregates(version, _audit_log):
+    """Dashboard audit log aggregates, shared across reruns and sessions while `version` holds."""
+    return audit_aggregates(_audit_log)
+
+
+def render():
+    st.markdown('<div class="main-header">🔐 RBAC Dashboard</div>', unsafe_allow_html=True)
+    st.markdown("Real-time overview of your Role-Based Access Control environment")
+    # If Snowflake wasn't configured or failed to load, show a single, friendly note
+    snowflake_notice = st.empty()
+    
+    # Aggregates are recomputed only when the data version (row count, newest update) changes
+    metadata = wait_for_metadata()
+    with span("metadata aggregates", 'transform', rows=len(metadata)):
+        md_stats = get_metadata_aggregates(data_version(metadata), metadata)
+
+    # Key Metrics
+    col1, col2, col3, col4, col5 = st.columns(5)
+    
+    with col1:
+        st.metric("Total Permissions", md_stats['total_permissions'], "+2 this week")
+    
+    with col2:
+        st.metric("Active Permissions", md_stats['active_permissions'], "●")
+    
+    with col3:
+        st.metric("Unique Roles", md_stats['unique_roles'])
+    
+    with col4:
+        st.metric("Databases", md_stats['unique_databases'])
+    
+    with col5:
+        # Audit-derived widgets are placeholders until the audit log query lands
+        success_ops_slot = st.empty()
+        success_ops_slot.metric("Successful Operations", "…")
+    
+    st.markdown("---")
+    
+    # Charts
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Permissions by Role")
+        with span("roles chart", 'render', rows=len(md_stats['by_role'])):
+            fig = px.bar(md_stats['by_role'], x='role_name', y='count', color='count', color_continuous_scale='Blues')
+            fig.update_layout(height=400, showlegend=False)
+            st.plotly_chart(fig, use_container_width=True)
+    
+    with col2:
+        st.subheader("Permissions by Database")
+        with span("databases chart", 'render', rows=len(md_stats['by_database'])):
+            fig = px.pie(md_stats['by_database'], names='database_name', values='count', color_discrete_sequence=px.colors.sequential.Blues)
+            fig.update_layout(height=400)
+            st.plotly_chart(fig, use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Permission Types Distribution")
+        with span("permission types chart", 'render', rows=len(md_stats['by_permission_type'])):
+            fig = px.bar(md_stats['by_permission_type'], x='permission_type', y='count', color='permission_type', 
+                         color_discrete_map={'SELECT': '#667eea', 'INSERT': '#764ba2', 'UPDATE': '#f093fb', 'DELETE': '#4facfe', 'ALL': '#43e97b'})
+            fig.update_layout(height=400, showlegend=False)
+            st.plotly_chart(fig, use_container_width=True)
+    
+    with col2:
+        st.subheader("Recent Operations (7 Days)")
+        recent_ops_slot = st.empty()
+        recent_ops_slot.info("⏳ Loading audit log...")
+    
+    st.markdown("---")
+    
+    # Recent Activity
+    st.subheader("Recent Activity")
+    recent_activity_slot = st.empty()
+    recent_activity_slot.info("⏳ Loading audit log...")
+
+    # Fill in the audit-derived widgets now that everything above has been sent to the browser
+    audit_log = wait_for_audit_log()
+    with span("audit aggregates", 'transform', rows=len(audit_log)):
+        al_stats = get_audit_aggregates(data_version(audit_log), audit_log)
+
+    success_ops_slot.metric("Successful Operations", al_stats['successful_operations'], "+1 today")
+
+    recent_ops = al_stats['recent_operations']
+    with span("recent operations chart", 'render', rows=len(recent_ops)):
+        fig = px.timeline(
+            recent_ops, 
+            x_start='execution_time', 
+            x_end=recent_ops['execution_time'],
+            y='operation_type',
+            color='execution_status',
+            color_discrete_map={'SUCCESS': '#43e97b', 'FAILED': '#fa7e1e'}
+        )
+        fig.update_layout(height=400)
+        recent_ops_slot.plotly_chart(fig, use_container_width=True)
+
+    recent_activity = al_stats['recent_activity'].copy()
+    recent_activity['execution_time'] = recent_activity['execution_time'].dt.strftime('%Y-%m-%d %H:%M')
+    recent_activity_slot.dataframe(recent_activity, use_container_width=True, hide_index=True)
+
+    if not st.session_state.get('snowflake_available', True):
+        snowflake_notice.info("Snowflake not configured, displaying dummy data")
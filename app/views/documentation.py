@@ -0,0 +1,132 @@
+"""
+SnowGuard - Documentation Page
+Quick start, API reference, SQL examples and troubleshooting
+"""
+
+import streamlit as st
+
+
+def render():
+    st.markdown('<div class="main-header">📚 Documentation & Quick Start</div>', unsafe_allow_html=True)
+    
+    tab1, tab2, tab3, tab4 = st.tabs(["Quick Start", "API Reference", "SQL Examples", "Troubleshooting"])
+    
+    with tab1:
+        st.subheader("🚀 Quick Start Guide")
+        
+        st.markdown("""
+        ### Getting Started in 5 Minutes
+        
+        **Step 1: Create Metadata Entry**
+        - Go to "Add Permission" tab
+        - Fill in database, schema, and table names
+        - Select the target role and permission type
+        - Click "Add Permission"
+        
+        **Step 2: Review in Dashboard**
+        - Check the dashboard to see your new permission
+        - Verify all details are correct
+        
+        **Step 3: Execute Grants**
+        - Use dry-run to simulate the changes
+        - Execute to apply permissions to Snowflake
+        
+        **Step 4: Monitor Changes**
+        - Check audit log for execution details
+        - Export reports for compliance
+        """)
+    
+    with tab2:
+        st.subheader("API Reference")
+        
+        st.markdown("""
+        ### Main Procedures
+        
+        **`USP_GRANT_RBAC`** - Grant permissions based on metadata
+        ```sql
+        CALL audit.USP_GRANT_RBAC(
+            p_database_filter VARCHAR(100) DEFAULT NULL,
+            p_schema_filter VARCHAR(100) DEFAULT NULL,
+            p_role_filter VARCHAR(100) DEFAULT NULL,
+            p_dry_run_flag VARCHAR(1) DEFAULT 'N'
+        );
+        ```
+        
+        **`USP_ADD_RBAC_ENTRY`** - Add new permission entry
+        ```sql
+        CALL audit.USP_ADD_RBAC_ENTRY(
+            p_database_name VARCHAR(100),
+            p_schema_name VARCHAR(100),
+            p_table_name VARCHAR(100),
+            p_role_name VARCHAR(100),
+            p_permission_type VARCHAR(50) DEFAULT 'SELECT'
+        );
+        ```
+        
+        **`GET_TABLE_RBAC_STATUS`** - Check permissions for a table
+        ```sql
+        SELECT * FROM TABLE(audit.GET_TABLE_RBAC_STATUS(
+            'DB_NAME', 'SCHEMA_NAME', 'TABLE_NAME'
+        ));
+        ```
+        """)
+    
+    with tab3:
+        st.subheader("SQL Examples")
+        
+        st.markdown("""
+        ### Common Queries
+        
+        **Permissions by Role**
+        ```sql
+        SELECT role_name, COUNT(*) as total_permissions
+        FROM audit.adw_rbac_metadata
+        WHERE record_status_cd = 'A'
+        GROUP BY role_name;
+        ```
+        
+        **Recent Failed Operations**
+        ```sql
+        SELECT * FROM audit.adw_rbac_audit_log
+        WHERE execution_status = 'FAILED'
+        AND execution_time >= DATEADD(DAY, -7, CURRENT_DATE())
+        ORDER BY execution_time DESC;
+        ```
+        
+        **Expired Permissions**
+        ```sql
+        SELECT * FROM audit.adw_rbac_metadata
+        WHERE effective_end_date < CURRENT_DATE()
+        AND record_status_cd = 'A';
+        ```
+        """)
+    
+    with tab4:
+        st.subheader("Troubleshooting")
+        
+        with st.expander("❓ No permissions showing up"):
+            st.markdown("""
+            **Solution:**
+            1. Check that metadata records have status 'A' (Active)
+            2. Verify effective dates are correct
+            3. Ensure the role exists in Snowflake
+            4. Check user has SELECT privilege on adw_rbac_metadata table
+            """)
+        
+        with st.expander("❓ Grants fail with 'Access denied'"):
+            st.markdown("""
+            **Solution:**
+            1. Verify executing user has GRANT privileges
+            2. Check target role exists
+            3. Ensure target table exists in Snowflake
+            4. Verify permissions on the target database/schema
+            """)
+        
+        with st.expander("❓ Audit log not populating"):
+            st.markdown("""
+            **Solution:**
+            1. Check audit log table exists and is accessible
+            2. Verify INSERT privileges on adw_rbac_audit_log
+            3. Enable logging flag in procedure call (p_log_details_flag = 'Y')
+            4. Check for any errors in execution
+            """)
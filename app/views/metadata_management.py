@@ -0,0 +1,141 @@
+"""
+SnowGuard - Metadata Management Page
+Browse, summarise and look up permissions, now or at any point in time
+"""
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from snowguard.index import PermissionIndex
+from snowguard.intervals import EffectiveDateIndex
+from snowguard.spans import span
+from views.session import wait_for_metadata
+
+
+def get_permission_index():
+    """Permission index over the session's metadata, rebuilt when the metadata or the date changes."""
+    metadata = wait_for_metadata()
+    key = (id(metadata), len(metadata), datetime.now().date())
+    cached = st.session_state.get('permission_index')
+    if cached is None or cached[0] != key:
+        with span("permission index build", 'transform', rows=len(metadata)):
+            cached = (key, PermissionIndex(metadata))
+        st.session_state.permission_index = cached
+    return cached[1]
+
+
+def get_effective_date_index():
+    """Effective date index over the session's metadata, rebuilt when the metadata changes."""
+    metadata = wait_for_metadata()
+    key = (id(metadata), len(metadata))
+    cached = st.session_state.get('effective_date_index')
+    if cached is None or cached[0] != key:
+        with span("effective date index build", 'transform', rows=len(metadata)):
+            cached = (key, EffectiveDateIndex(metadata))
+        st.session_state.effective_date_index = cached
+    return cached[1]
+
+
+def render():
+    st.markdown('<div class="main-header">📋 Metadata Management</div>', unsafe_allow_html=True)
+    permission_index = get_permission_index()
+    
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["View All", "By Role", "By Database", "Table Lookup", "Point in Time"])
+    
+    with tab1:
+        st.subheader("All Permissions")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            filter_role = st.multiselect("Filter by Role", st.session_state.metadata['role_name'].unique())
+        with col2:
+            filter_db = st.multiselect("Filter by Database", st.session_state.metadata['database_name'].unique())
+        with col3:
+            filter_status = st.multiselect("Filter by Status", ['A', 'I'], default=['A'])
+        
+        with span("metadata filter", 'transform', rows=len(permission_index)):
+            filtered_df = permission_index.metadata[permission_index.row_mask(filter_role, filter_db, filter_status)]
+        
+        with span("metadata table", 'render', rows=len(filtered_df)):
+            st.dataframe(filtered_df, use_container_width=True, hide_index=True)
+        
+        # Export option
+        if st.button("📥 Export to CSV"):
+            with span("metadata csv", 'export', rows=len(filtered_df)):
+                csv = filtered_df.to_csv(index=False)
+            st.download_button("Download CSV", csv, "rbac_metadata.csv", "text/csv")
+    
+    with tab2:
+        st.subheader("Permissions by Role")
+        role_summary = permission_index.role_summary()
+        
+        st.dataframe(role_summary, use_container_width=True, hide_index=True)
+    
+    with tab3:
+        st.subheader("Permissions by Database")
+        db_summary = permission_index.database_summary()
+        
+        st.dataframe(db_summary, use_container_width=True, hide_index=True)
+    
+    with tab4:
+        st.subheader("Table Lookup")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            lookup_db = st.selectbox("Database", sorted(permission_index.names['database_name']))
+        with col2:
+            lookup_schema = st.selectbox("Schema", permission_index.schemas(lookup_db))
+        with col3:
+            lookup_table = st.selectbox("Table", permission_index.tables(lookup_db, lookup_schema))
+        
+        if lookup_table:
+            st.markdown("**Effective privileges today**")
+            effective = permission_index.roles_for_table(lookup_db, lookup_schema, lookup_table)
+            if effective.empty:
+                st.info("No role has active access to this table today.")
+            else:
+                st.dataframe(effective[['role_name', 'privileges']], use_container_width=True, hide_index=True)
+            
+            st.markdown("**Metadata entries** (as returned by `audit.GET_TABLE_RBAC_STATUS`)")
+            st.dataframe(
+                permission_index.get_table_rbac_status(lookup_db, lookup_schema, lookup_table),
+                use_container_width=True, hide_index=True
+            )
+    
+    with tab5:
+        st.subheader("Point-in-Time Access")
+        date_index = get_effective_date_index()
+        
+        as_of = st.date_input("Access as of", datetime.now().date(), key="pit_as_of")
+        with span("point in time lookup", 'transform', rows=len(date_index)):
+            active_at = date_index.active_at(as_of)
+        st.metric("Permissions in effect", len(active_at))
+        st.dataframe(active_at, use_container_width=True, hide_index=True)
+        with span("point in time csv", 'export', rows=len(active_at)):
+            report_csv = active_at.to_csv(index=False)
+        st.download_button("📥 Download Report", report_csv, f"rbac_access_{as_of}.csv", "text/csv")
+        
+        st.markdown("**Changes between two dates**")
+        col1, col2 = st.columns(2)
+        with col1:
+            change_from = st.date_input("From", as_of - timedelta(days=30), key="pit_from")
+        with col2:
+            change_to = st.date_input("To", as_of, key="pit_to")
+        changes = date_index.changes_between(change_from, change_to)
+        if changes.empty:
+            st.info("No permissions start or end in this window.")
+        else:
+            st.dataframe(changes, use_container_width=True, hide_index=True)
+        
+        st.markdown("**Next expiries**")
+        st.dataframe(date_index.next_expiries(10, as_of), use_container_width=True, hide_index=True)
+        
+        st.markdown("**Timeline**")
+        timeline = date_index.timeline(as_of - timedelta(days=365), as_of + timedelta(days=90))
+        fig = px.line(timeline, x='date', y='active_permissions')
+        fig.add_vline(x=pd.Timestamp(as_of).timestamp() * 1000, line_dash='dash')
+        fig.update_layout(height=300)
+        st.plotly_chart(fig, use_container_width=True)
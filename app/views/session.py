@@ -0,0 +1,175 @@
+"""
+SnowGuard - Dashboard Session
+Process-wide resources and the per-session metadata/audit log frames shared by every page
+"""
+
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import streamlit as st
+
+from snowguard.config import CONFIG_PATH, config_value, load_config
+from snowguard.connection import ConnectionPool, build_conn_kwargs
+from snowguard.loaders import (
+    append_audit_rows, audit_log_watermark, load_audit_log, load_audit_log_since, load_metadata, sample_audit_log,
+    sample_metadata, submit_loads
+)
+from snowguard.query_log import QUERY_LOG
+from snowguard.schema import AUDIT_LOG_SCHEMA, METADATA_SCHEMA, apply_schema, frame_memory, untyped_memory
+from snowguard.spans import span
+
+# Dtypes applied to each session frame when it loads
+FRAME_SCHEMAS = {'metadata': METADATA_SCHEMA, 'audit_log': AUDIT_LOG_SCHEMA}
+
+
+@st.cache_resource(show_spinner=False)
+def get_app_config():
+    """app/config.ini, parsed once per process."""
+    return load_config()
+
+
+@st.cache_resource(show_spinner=False)
+def get_connection_pool():
+    """One Snowflake connection pool per process, shared by every browser session."""
+    config = get_app_config()
+    if config_value(config, 'local', 'enabled', False, bool):
+        # SQLite stand-in for an account: same queries, no Snowflake needed
+        from snowguard.local import account_from_config
+        return account_from_config(config).pool(
+            max_size=config_value(config, 'local', 'pool_size', 4, int), query_log=QUERY_LOG
+        )
+    # Expect Snowflake connection info in Streamlit secrets (recommended)
+    # Example structure in .streamlit/secrets.toml:
+    # [snowflake]
+    # user = "YOUR_USER"
+    # password = "YOUR_PASSWORD"
+    # account = "xy12345.us-east-1"
+    # warehouse = "COMPUTE_WH"
+    # role = "ACCOUNTADMIN"
+    # database = "ADW_PROD"
+    # schema = "AUDIT"
+    return ConnectionPool(build_conn_kwargs(st.secrets.get("snowflake", {})), query_log=QUERY_LOG)
+
+
+def get_session_pool():
+    """The shared pool, or None once this session has found Snowflake unconfigured."""
+    if st.session_state.get('snowflake_pool_error'):
+        return None
+    try:
+        return get_connection_pool()
+    except Exception as e:
+        st.session_state['snowflake_pool_error'] = str(e)
+        return None
+
+
+@st.cache_resource(show_spinner=False)
+def get_loader_executor():
+    """Worker threads shared by all sessions so startup queries run side by side."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="snowguard-loader")
+
+
+@st.cache_resource(show_spinner=False)
+def get_snapshot_cache():
+    """The on-disk snapshot cache from the [snapshot] section of config.ini, or None when disabled."""
+    config = get_app_config()
+    if not config_value(config, 'snapshot', 'enabled', False, bool):
+        return None
+    from snowguard.snapshot import SnapshotCache
+    # Relative paths sit next to config.ini, i.e. in the app directory
+    directory = os.path.join(os.path.dirname(CONFIG_PATH), config_value(config, 'snapshot', 'path', '.snapshots'))
+    if config_value(config, 'local', 'enabled', False, bool):
+        scope = f"local:{config_value(config, 'local', 'path', ':memory:')}"
+    else:
+        conn_kwargs = get_connection_pool().conn_kwargs
+        scope = f"{conn_kwargs.get('account')}/{conn_kwargs.get('database')}"
+    return SnapshotCache(directory, scope)
+
+
+def start_initial_loads():
+    """Submit the metadata and audit log queries together instead of one after the other."""
+    pending = [
+        name for name in ('metadata', 'audit_log')
+        if name not in st.session_state and f'{name}_future' not in st.session_state
+    ]
+    if not pending:
+        return
+    pool = get_session_pool()
+    if pool is not None:
+        # With a snapshot cache each load is a fingerprint query plus a Parquet read while nothing changed
+        cache = get_snapshot_cache()
+        loaders = {
+            'metadata': cache.load_metadata if cache else load_metadata,
+            'audit_log': cache.load_audit_log if cache else load_audit_log,
+        }
+        pending = {name: loaders[name] for name in pending}
+        futures = submit_loads(get_loader_executor(), pool, pending)
+    else:
+        # No usable connection pool (e.g. missing secrets); fail every load the same way
+        futures = {}
+        for name in pending:
+            futures[name] = Future()
+            futures[name].set_exception(ValueError(st.session_state['snowflake_pool_error']))
+    for name, future in futures.items():
+        st.session_state[f'{name}_future'] = future
+
+
+def wait_for_frame(name, label, fallback):
+    """Block until a startup load has finished and return its frame from session state."""
+    if name not in st.session_state:
+        future = st.session_state[f'{name}_future']
+        try:
+            # The query itself runs on a loader thread; this is how long the page waits for it
+            with span(f"wait for {name}", 'query'):
+                frame = future.result()
+            st.session_state[f'{name}_from_snowflake'] = True
+        except Exception as e:
+            # Record the error and fall back to embedded sample data for local/demo use
+            st.session_state['snowflake_available'] = False
+            st.session_state['snowflake_error'] = st.session_state.get('snowflake_error', '') + f"{label}: {e}; "
+            frame = fallback()
+        del st.session_state[f'{name}_future']
+        # Every session holds its own copy, so store it with compact dtypes. Loaded
+        # frames are already typed during the Arrow conversion; this types the fallback
+        with span(f"{name} schema", 'transform', rows=len(frame)):
+            before = untyped_memory(frame)
+            frame = st.session_state[name] = apply_schema(frame, FRAME_SCHEMAS[name])
+        st.session_state.setdefault('frame_memory', {})[label] = {
+            'rows': len(frame), 'before': before, 'after': frame_memory(frame)
+        }
+    return st.session_state[name]
+
+
+def wait_for_metadata():
+    return wait_for_frame('metadata', 'Metadata', sample_metadata)
+
+
+def wait_for_audit_log():
+    audit_df = wait_for_frame('audit_log', 'AuditLog', sample_audit_log)
+    # Only a frame that came from Snowflake can be topped up incrementally
+    if st.session_state.get('audit_log_from_snowflake') and 'audit_log_watermark' not in st.session_state:
+        st.session_state.audit_log_watermark = audit_log_watermark(audit_df)
+        st.session_state.audit_log_refreshed_at = time.time()
+    return audit_df
+
+
+def refresh_audit_log():
+    """Append audit rows newer than the session's watermark; returns the number of new rows."""
+    if 'audit_log_watermark' not in st.session_state:
+        return 0
+    new_rows = load_audit_log_since(get_connection_pool(), st.session_state.audit_log_watermark)
+    with span("audit_log append", 'transform', rows=len(new_rows)):
+        st.session_state.audit_log = append_audit_rows(st.session_state.audit_log, new_rows)
+    st.session_state.audit_log_watermark = audit_log_watermark(new_rows, st.session_state.audit_log_watermark)
+    st.session_state.audit_log_refreshed_at = time.time()
+    return len(new_rows)
+
+
+def wait_and_rerun(deadline):
+    """Sleep until `deadline`, then rerun so the auto-refresh picks up new audit rows."""
+    heartbeat = st.empty()
+    while time.time() < deadline:
+        time.sleep(1)
+        # Touching an element lets Streamlit abandon this run as soon as the user interacts
+        heartbeat.empty()
+    st.rerun()
@@ -0,0 +1,245 @@
+"""
+SnowGuard - Settings Page
+Connection test, dry-run simulation, expiry scheduler, preferences and performance timings
+"""
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from snowguard.backends import SCHEDULER_STATE_TABLE, FixtureBackend, SnowflakeBackend
+from snowguard.config import config_value
+from snowguard.planner import (
+    coalesce_privileges, collapse_schema_grants, managed_schemas, plan_reconciliation, plan_summary,
+    reconcile_future_grants
+)
+from snowguard.query_log import METRICS_TABLE, QUERY_LOG
+from snowguard.scheduler import DEFAULT_SCHEDULER, ExpiryScheduler
+
+from snowguard.spans import KINDS, RECORDER
+from views.session import get_app_config, get_connection_pool, get_session_pool, wait_for_metadata
+
+
+def render():
+    st.markdown('<div class="main-header">⚙️ Configuration & Settings</div>', unsafe_allow_html=True)
+    auto_expire_default = config_value(get_app_config(), 'app', 'auto_expire_permissions', True, bool)
+    
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(
+        ["Snowflake Connection", "Dry Run Simulation", "Expiry Scheduler", "Preferences", "Performance"]
+    )
+    
+    with tab1:
+        st.subheader("Snowflake Connection Settings")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            account = st.text_input("Snowflake Account", placeholder="xy12345.us-east-1")
+            user = st.text_input("Username", placeholder="admin_user")
+        with col2:
+            warehouse = st.text_input("Warehouse", placeholder="COMPUTE_WH")
+            database = st.text_input("Database", placeholder="ADW_PROD")
+        
+        if st.button("🔗 Test Connection"):
+            try:
+                get_connection_pool().ping()
+                st.success("✅ Connection successful!")
+            except Exception as e:
+                st.error(f"❌ Connection failed: {e}")
+    
+    with tab2:
+        st.subheader("Dry Run Simulation")
+        st.markdown("""
+        Test your permission changes before applying them to production.
+        """)
+        
+        if st.checkbox("Enable Dry Run Mode"):
+            st.info("🔍 Dry run mode enabled - Changes will be simulated but not executed")
+            
+            if st.button("Run Dry Simulation"):
+                with st.spinner("Comparing metadata with current grants..."):
+                    metadata = wait_for_metadata()
+                    pool = get_session_pool()
+                    if pool is not None and st.session_state.get('metadata_from_snowflake'):
+                        backend = SnowflakeBackend(pool)
+                        metadata = backend.load_metadata()
+                    else:
+                        # Offline: nothing is granted yet, so every active permission is planned
+                        backend = FixtureBackend(metadata)
+                    plan = plan_reconciliation(metadata, backend.load_grants())
+                    schemas = managed_schemas(metadata)
+                    catalog = backend.load_catalog([database for database, _ in schemas])
+                    plan = collapse_schema_grants(plan, metadata, catalog)
+                    # Future grants are only revoked here; granting them is the CLI's --future-grants
+                    plan = reconcile_future_grants(plan, metadata, catalog, backend.load_future_grants(schemas))
+                    plan = coalesce_privileges(plan)
+                    summary = plan_summary(plan, metadata)
+                st.success(f"""
+                **Dry Run Report:**
+                - Total permissions to grant: {summary['grants']}
+                - Total permissions to revoke: {summary['revokes']}
+                - Statements to execute: {summary['statements']}
+                - Grants already in place (skipped): {summary['unchanged']}
+                """)
+                if not plan.empty:
+                    st.dataframe(plan.drop(columns=['rbac_id']), use_container_width=True, hide_index=True)
+    
+    with tab3:
+        st.subheader("Expiry Scheduler")
+        st.markdown("""
+        Applies only the permissions that started or ended since the last run,
+        instead of re-checking every metadata row.
+        """)
+        
+        metadata = wait_for_metadata()
+        pool = get_session_pool()
+        if pool is not None and st.session_state.get('metadata_from_snowflake'):
+            backend = SnowflakeBackend(pool)
+        else:
+            # Kept for the session so the offline scheduler remembers its last tick across reruns
+            if 'scheduler_fixture' not in st.session_state:
+                st.session_state.scheduler_fixture = FixtureBackend(metadata)
+            backend = st.session_state.scheduler_fixture
+        try:
+            last_tick = backend.load_last_tick(DEFAULT_SCHEDULER)
+        except Exception as e:
+            st.warning(f"⚠️ Could not read the scheduler state ({SCHEDULER_STATE_TABLE}): {e}")
+            last_tick = None
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if last_tick is None:
+                # First run: the user says how far grants were already reconciled
+                since = st.date_input("Last applied on", datetime.now().date() - timedelta(days=1))
+            else:
+                since = None
+                st.markdown(f"**Last applied through:** {last_tick:%Y-%m-%d}")
+        with col2:
+            scheduler_dry_run = st.checkbox(
+                "Dry run", value=config_value(get_app_config(), 'features', 'dry_run_default', False, bool),
+                key="scheduler_dry_run"
+            )
+        
+        scheduler = ExpiryScheduler(
+            backend, auto_expire=st.session_state.get('auto_expire', auto_expire_default)
+        ).load(metadata, since)
+        
+        due = scheduler.due()
+        st.markdown(f"**Due now:** {due['sql_statement'].nunique()} statement(s)")
+        if not due.empty:
+            st.dataframe(due.drop(columns=['rbac_id']), use_container_width=True, hide_index=True)
+        if st.button("▶️ Apply Due Changes", disabled=due.empty):
+            with st.spinner("Applying due changes..."):
+                results, summary = scheduler.tick(
+                    dry_run=scheduler_dry_run,
+                    concurrency=config_value(get_app_config(), 'performance', 'grant_concurrency', 1, int)
+                )
+            if summary is None:
+                st.info("Nothing is due; another run already applied these boundaries.")
+            else:
+                st.success(
+                    f"Applied {summary['statements']} statement(s) for {summary['boundaries']} boundary(ies): "
+                    f"{summary['success']} succeeded, {summary['failed']} failed"
+                )
+        
+        st.markdown("**Upcoming boundaries**")
+        st.dataframe(scheduler.upcoming(20), use_container_width=True, hide_index=True)
+    
+    with tab4:
+        st.subheader("User Preferences")
+        
+        theme = st.selectbox("Theme", ["Light", "Dark", "Auto"])
+        audit_retention = st.slider("Audit Log Retention (days)", 30, 365, 90)
+        auto_expire = st.checkbox("Auto-expire permissions on end date", value=auto_expire_default, key="auto_expire")
+        notifications = st.checkbox("Enable email notifications", value=True)
+        
+        if st.button("💾 Save Preferences"):
+            st.success("✅ Preferences saved!")
+        
+        if st.session_state.get('frame_memory'):
+            st.markdown("**Session data memory**")
+            st.dataframe(
+                pd.DataFrame([
+                    {
+                        'frame': label,
+                        'rows': report['rows'],
+                        'untyped (MB)': round(report['before'] / 2**20, 2),
+                        'typed (MB)': round(report['after'] / 2**20, 2),
+                    }
+                    for label, report in st.session_state.frame_memory.items()
+                ]),
+                use_container_width=True, hide_index=True
+            )
+
+    with tab5:
+        st.subheader("Performance")
+        st.markdown("""
+        Span timings from every session of this app process. Each rerun splits its
+        time into query, transform, render and export spans; a span's self time
+        excludes the spans nested inside it, so the page's render span shows the
+        time spent outside them.
+        """)
+        
+        reruns = RECORDER.reruns()
+        if reruns.empty:
+            st.info("No timings recorded yet; open another page and come back.")
+        else:
+            pages = sorted(reruns['page'].unique())
+            page_filter = st.selectbox("Page", ["All pages"] + pages, key="performance_page")
+            recent = reruns if page_filter == "All pages" else reruns[reruns['page'] == page_filter]
+            recent = recent.tail(20).iloc[::-1]
+            ms = recent[['seconds'] + [k for k in KINDS if k in recent.columns]].mul(1000).round(1)
+            st.markdown("**Recent reruns (ms)**")
+            st.dataframe(
+                pd.concat([recent[['rerun_id', 'page', 'started']], ms.rename(columns={'seconds': 'total'})], axis=1),
+                use_container_width=True, hide_index=True
+            )
+            
+            summary = RECORDER.summary()
+            if page_filter != "All pages":
+                summary = summary[summary['page'] == page_filter]
+            st.markdown("**Spans**")
+            st.dataframe(summary, use_container_width=True, hide_index=True)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.download_button("📥 JSON", RECORDER.to_json(), "snowguard_timings.json", "application/json")
+        with col2:
+            st.download_button("📥 Prometheus", RECORDER.to_prometheus(), "snowguard_timings.prom", "text/plain")
+        with col3:
+            if st.button("🗑️ Reset Timings"):
+                RECORDER.reset()
+                st.rerun()
+        
+        st.markdown("**Slowest queries**")
+        st.caption(
+            "Every Snowflake query issued through the connection pool, grouped by SQL fingerprint, "
+            "with the pages and interactions that issued it. Bytes scanned come from QUERY_HISTORY."
+        )
+        slowest = QUERY_LOG.slowest()
+        page_name = st.session_state.get('performance_page', "All pages")
+        if page_name != "All pages":
+            slowest = slowest[slowest['pages'].str.contains(page_name, regex=False)]
+        if slowest.empty:
+            st.info("No queries recorded yet.")
+        else:
+            st.dataframe(slowest, use_container_width=True, hide_index=True)
+        
+        pool = get_session_pool()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if st.button("🔎 Fetch Bytes Scanned", disabled=pool is None):
+                try:
+                    st.success(f"Updated {QUERY_LOG.enrich(pool)} queries from QUERY_HISTORY")
+                except Exception as e:
+                    st.error(f"QUERY_HISTORY lookup failed: {e}")
+        with col2:
+            if st.button("💾 Save to Metrics Table", disabled=pool is None):
+                try:
+                    st.success(f"Saved {QUERY_LOG.flush(pool)} queries to {METRICS_TABLE}")
+                except Exception as e:
+                    st.error(f"Saving query metrics failed: {e}")
+        with col3:
+            st.download_button(
+                "📥 Queries CSV", QUERY_LOG.frame().to_csv(index=False), "snowguard_queries.csv", "text/csv"
+            )